@@ -0,0 +1,265 @@
+import os
+import sys
+import json
+import platform
+import resource
+import subprocess
+import tempfile
+import click
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from random import Random
+from time import perf_counter
+
+sys.path.append('.')
+from simulation import setup_simulation, simulation_metrics, print_simulation_result
+from utils import read_orders, log_obj, log_flush, log_close
+
+
+PREP_TIME_DISTRIBUTIONS = {
+	'constant': lambda rng, value: value,
+	'uniform': lambda rng, low, high: rng.uniform(low, high),
+	'exponential': lambda rng, mean: rng.expovariate(1 / mean),
+	'lognormal': lambda rng, mu, sigma: rng.lognormvariate(mu, sigma)
+}
+PREP_TIME_DIST = 'uniform:2,10'
+
+
+def parse_distribution(value):
+	"""
+	Parse a prepTime distribution
+	:param value: 'name:param1,param2', e.g. 'uniform:2,10', 'exponential:6' or 'constant:5'
+	:return: fnc(rng: Random) returning a prepTime
+	"""
+	name, _, params = value.partition(':')
+	if name not in PREP_TIME_DISTRIBUTIONS:
+		raise ValueError('Unknown prepTime distribution: {0}'.format(name))
+	dist = PREP_TIME_DISTRIBUTIONS[name]
+	params = [float(p) for p in params.split(',') if p]
+	return lambda rng: max(0.0, dist(rng, *params))
+
+
+def generate_orders(filename, num_orders, prep_time_dist=PREP_TIME_DIST, seed=0):
+	"""
+	Write a synthetic orders file as newline delimited JSON
+	:param filename: orders file
+	:param num_orders: number of orders
+	:param prep_time_dist: prepTime distribution, see `parse_distribution`
+	:param seed: seed for the prepTime of the orders
+	"""
+	# Not Random(seed): the prepTimes would be correlated with the couriers arrival of a simulation with the same seed
+	rng = Random('orders:{0}'.format(seed))
+	prep_time = parse_distribution(prep_time_dist)
+	with open(filename, 'w') as f:
+		for idx in range(num_orders):
+			f.write(json.dumps({
+				'id': '{0:036d}'.format(idx),
+				'name': 'Order {0}'.format(idx),
+				'prepTime': round(prep_time(rng), 3)
+			}) + '\n')
+
+
+def timed(iterable, timer):
+	"""
+	:param iterable: iterable to consume
+	:param timer: list where the seconds spent producing the items are accumulated in the first element
+	:return: generator of the items of iterable
+	"""
+	iterator = iter(iterable)
+	while True:
+		start = perf_counter()
+		try:
+			item = next(iterator)
+		except StopIteration:
+			timer[0] += perf_counter() - start
+			return
+		timer[0] += perf_counter() - start
+		yield item
+
+
+def bench_simulation(filename, config):
+	"""
+	Time a simulation end to end, the same phases as `simulate_orders`
+	:param filename: orders file
+	:param config: configuration object for simulation
+	:return: dictionary with the metrics of the simulation, the events processed, the seconds of each phase
+		('ingest': reading and parsing orders, 'simulate': running the events, 'report': results and log)
+		and the peak RSS of the process in MB
+	"""
+	ingest = [0.0]
+	start = perf_counter()
+	env, kitchen, delivery = setup_simulation(timed(read_orders(filename), ingest), config)
+	events = 0
+	step = env.step
+	all_done = delivery.all_done
+	while not all_done.processed:
+		step()
+		events += 1
+	simulate = perf_counter() - start - ingest[0]
+
+	start = perf_counter()
+	log_flush()
+	with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+		print_simulation_result(kitchen, delivery)
+	metrics = simulation_metrics(env, kitchen, delivery)
+	log_obj(metrics)
+	log_close()
+	report = perf_counter() - start
+
+	metrics.update({
+		'events': events,
+		'events_per_second': events / simulate if simulate else None,
+		'ingest_time': ingest[0],
+		'simulate_time': simulate,
+		'report_time': report,
+		'total_time': ingest[0] + simulate + report,
+		# ru_maxrss is in KB on Linux
+		'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+	})
+	return metrics
+
+
+def run_isolated(filename, config):
+	"""
+	Run `bench_simulation` in a new process, so the peak RSS is only the one of this simulation
+	"""
+	with ProcessPoolExecutor(max_workers=1) as executor:
+		return executor.submit(bench_simulation, filename, config).result()
+
+
+def git_version():
+	"""
+	:return: short hash of the current commit, None outside a git repository
+	"""
+	try:
+		return subprocess.run(
+			['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+		).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def compare(results, baseline, max_ratio):
+	"""
+	Compare the throughput with a previous benchmark
+	:param results: list of benchmark results
+	:param baseline: benchmark file of a previous version
+	:param max_ratio: max allowed ratio between the baseline events/sec and the current one
+	:return: list of (result, ratio) of the regressions
+	"""
+	with open(baseline) as f:
+		previous = {
+			(r['strategy'], r['num_orders'], r['prep_time_dist']): r for r in json.load(f)['results']
+		}
+	regressions = []
+	for result in results:
+		base = previous.get((result['strategy'], result['num_orders'], result['prep_time_dist']))
+		if base is None or not result['events_per_second']:
+			continue
+		ratio = base['events_per_second'] / result['events_per_second']
+		if ratio > max_ratio:
+			regressions.append((result, ratio))
+	return regressions
+
+
+@click.command()
+@click.option('-n', '--sizes', default='1000,100000,1000000', show_default=True,
+			  help='Comma separated number of orders.')
+@click.option('-d', '--prep_time_dist', multiple=True, default=[PREP_TIME_DIST], show_default=True,
+			  help="prepTime distribution of the orders, 'constant:v', 'uniform:a,b', 'exponential:mean' or "
+				   "'lognormal:mu,sigma', can be repeated.")
+@click.option('--strategies', default='fifo,matched', show_default=True,
+			  help='Comma separated strategies.')
+@click.option('-o', '--orders_per_second', default=2, show_default=True,
+			  help='Number of orders per second for the Kitchen.')
+@click.option('-c', '--cooks_in_kitchen', default=16, show_default=True,
+			  help='Number of orders that can be processed in parallel.')
+@click.option('-s', '--seed', default=0, show_default=True,
+			  help='Seed for the orders and the simulations.')
+@click.option('-l', '--log_sink', multiple=True, default=['none'], show_default=True,
+			  type=click.Choice(['file', 'none']), help='Outputs for the events log.')
+@click.option('--log_format', default='text', show_default=True, type=click.Choice(['text', 'binary']),
+			  help='Events log file format.')
+@click.option('--orders_dir', default=None, type=click.Path(file_okay=False),
+			  help='Directory for the generated orders files, reused between runs.  Defaults to a temporary directory.')
+@click.option('--output', default='benchmark.json', show_default=True,
+			  help='Results file (JSON).')
+@click.option('--baseline', default=None, type=click.Path(exists=True),
+			  help='Results file of a previous version to compare the events/sec with.')
+@click.option('--max_ratio', default=1.2, show_default=True,
+			  help='Max allowed slowdown of the events/sec against the baseline.')
+def run(sizes, prep_time_dist, strategies, orders_per_second, cooks_in_kitchen, seed, log_sink, log_format,
+		orders_dir, output, baseline, max_ratio):
+	"""
+	Benchmark the simulation engine on synthetic orders: events/sec, peak RSS and the time of each phase.
+	"""
+	sizes = [int(s) for s in sizes.split(',')]
+	strategies = strategies.split(',')
+	with tempfile.TemporaryDirectory() as tmp_dir:
+		orders_dir = orders_dir or tmp_dir
+		os.makedirs(orders_dir, exist_ok=True)
+		results = []
+		print('{0:<8} {1:>9} {2:<16} {3:>10} {4:>12} {5:>9} {6:>9} {7:>9} {8:>9}'.format(
+			'STRATEGY', 'ORDERS', 'PREP TIME', 'EVENTS', 'EVENTS/S', 'INGEST', 'SIMULATE', 'REPORT', 'RSS MB'
+		))
+		for dist in prep_time_dist:
+			for size in sizes:
+				filename = os.path.join(orders_dir, 'orders_{0}_{1}_{2}.ndjson'.format(size, dist.replace(':', '_'), seed))
+				if not os.path.exists(filename):
+					generate_orders(filename, size, dist, seed)
+				for strategy in strategies:
+					config = {
+						'orders_per_second': orders_per_second,
+						'cooks_in_kitchen': cooks_in_kitchen,
+						'strategy': strategy,
+						'courier_arrival_time_min': 3,
+						'courier_arrival_time_max': 15,
+						'courier_arrival_dist_fnc': None,
+						'print_info': False,
+						'mode': 'virtual',
+						'seed': seed,
+						'log_sinks': log_sink,
+						'log_format': log_format
+					}
+					result = run_isolated(filename, config)
+					result.update({'strategy': strategy, 'num_orders': size, 'prep_time_dist': dist})
+					results.append(result)
+					print('{0:<8} {1:>9} {2:<16} {3:>10} {4:>12.0f} {5:>8.3f}s {6:>8.3f}s {7:>8.3f}s {8:>9.1f}'.format(
+						strategy.upper(),
+						size,
+						dist,
+						result['events'],
+						result['events_per_second'] or 0,
+						result['ingest_time'],
+						result['simulate_time'],
+						result['report_time'],
+						result['peak_rss_mb']
+					))
+	with open(output, 'w') as f:
+		json.dump({
+			'version': git_version(),
+			'date': datetime.now().isoformat(timespec='seconds'),
+			'python': platform.python_version(),
+			'platform': platform.platform(),
+			'settings': {
+				'orders_per_second': orders_per_second,
+				'cooks_in_kitchen': cooks_in_kitchen,
+				'seed': seed,
+				'log_sinks': list(log_sink),
+				'log_format': log_format
+			},
+			'results': results
+		}, f, indent=2)
+	if baseline:
+		regressions = compare(results, baseline, max_ratio)
+		for result, ratio in regressions:
+			print('REGRESSION {0} {1} orders {2}: {3:.2f}x slower'.format(
+				result['strategy'].upper(), result['num_orders'], result['prep_time_dist'], ratio
+			))
+		if regressions:
+			raise click.ClickException('Events/sec regressed against {0}'.format(baseline))
+
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,76 @@
+import os
+import sys
+import click
+import simpy
+from contextlib import redirect_stdout
+from random import Random
+from time import perf_counter
+
+sys.path.append('.')
+from models import Kitchen, Delivery, Order, Courier
+
+
+def bench_matching(num_orders, strategy, seed=0):
+	"""
+	Time the courier/order matching of a Delivery with a backlog of `num_orders`.
+	Half of the orders are ready before their courier arrives and the other half after, couriers arrive in random order.
+	:param num_orders: number of orders in the backlog
+	:param strategy: 'fifo' | 'matched' | 'multi', 'multi' couriers take up to 3 ready orders without waiting
+	:param seed: seed for the couriers arrival order
+	:return: seconds spent matching
+	"""
+	env = simpy.Environment()
+	kitchen = Kitchen(env, 1)
+	options = {'capacity': 3, 'window': 0} if strategy == 'multi' else None
+	delivery = Delivery(env, kitchen, strategy, strategy_options=options)
+	orders = [Order(str(i), 'bench', 0) for i in range(num_orders)]
+	couriers = [Courier('c' + str(i), 0, str(i)) for i in range(num_orders)]
+	for order, courier in zip(orders, couriers):
+		order.added_time = order.start_time = order.end_time = 0
+		courier.arrival_time = 0
+	Random(seed).shuffle(couriers)
+	half = num_orders // 2
+
+	def order_ready(order):
+		kitchen.orders_for_delivery[order.id] = order
+		delivery.on_order_ready(order)
+
+	with open(os.devnull, 'w') as devnull, redirect_stdout(devnull):
+		start = perf_counter()
+		for order in orders[:half]:
+			order_ready(order)
+		for courier in couriers:
+			delivery.on_courier_arrived(courier)
+		for order in orders[half:]:
+			order_ready(order)
+		elapsed = perf_counter() - start
+	assert delivery.orders_picked_up == num_orders
+	return elapsed
+
+
+@click.command()
+@click.option('-n', '--sizes', default='1000,10000,100000,1000000', show_default=True,
+			  help='Comma separated backlog sizes.')
+@click.option('--max_ratio', default=3.0, show_default=True,
+			  help='Max allowed ratio between the per order time of the largest and the smallest backlog.')
+def run(sizes, max_ratio):
+	"""
+	Regression benchmark for the matching of couriers and orders: the time per order must not grow with the backlog.
+	"""
+	sizes = [int(s) for s in sizes.split(',')]
+	failed = False
+	for strategy in ['fifo', 'matched', 'multi']:
+		base = None
+		for size in sizes:
+			per_order = bench_matching(size, strategy) / size
+			base = base or per_order
+			print('{0:<8} {1:>9} orders {2:>9.3f} us/order {3:>6.2f}x'.format(
+				strategy.upper(), size, per_order * 1e6, per_order / base
+			))
+			failed = failed or per_order / base > max_ratio
+	if failed:
+		raise click.ClickException('Matching time per order grows with the backlog size')
+
+
+if __name__ == '__main__':
+	run()
@@ -0,0 +1,59 @@
+import sys
+import subprocess
+import click
+from statistics import median
+from time import perf_counter
+
+
+STARTUP_COMMANDS = ['--help', 'run --help', 'replay --help', 'sweep --help', 'estimate --help', 'events --help']
+# Modules of the simulations, not imported until a command needs them
+HEAVY_MODULES = ['simpy', 'numpy', 'asyncio', 'multiprocessing', 'concurrent.futures', 'http.server', 'simulation']
+
+
+def measure_startup(args, runs=10):
+	"""
+	Time the cold start of the CLI: a new interpreter running `python -m cli ARGS`
+	:param args: list of arguments of the CLI
+	:param runs: number of runs
+	:return: list of the wall seconds of each run
+	"""
+	times = []
+	for _ in range(runs):
+		start = perf_counter()
+		subprocess.run([sys.executable, '-m', 'cli'] + args, check=True, stdout=subprocess.DEVNULL)
+		times.append(perf_counter() - start)
+	return times
+
+
+def imported_modules():
+	"""
+	:return: the HEAVY_MODULES imported by `import cli`, in a new interpreter
+	"""
+	code = 'import sys, cli; print(" ".join(m for m in {0!r} if m in sys.modules))'.format(HEAVY_MODULES)
+	return subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout.split()
+
+
+@click.command()
+@click.option('-n', '--runs', default=10, show_default=True,
+			  help='Number of cold starts of each command.')
+@click.option('--max_ms', default=100.0, show_default=True,
+			  help='Budget of the median cold start of each command, in milliseconds.')
+def run(runs, max_ms):
+	"""
+	Regression benchmark for the startup of the CLI: the median cold start of each command must stay under the budget
+	and the modules of the simulations must not be imported to parse the options.
+	"""
+	failed = False
+	for command in STARTUP_COMMANDS:
+		times = measure_startup(command.split(), runs)
+		print('{0:<18} median {1:>7.1f} ms   min {2:>7.1f} ms'.format(command, median(times) * 1e3, min(times) * 1e3))
+		failed = failed or median(times) * 1e3 > max_ms
+	modules = imported_modules()
+	if modules:
+		print('HEAVY MODULES IMPORTED: {0}'.format(' '.join(modules)))
+	if failed or modules:
+		raise click.ClickException('The CLI startup is over the budget of {0:g} ms'.format(max_ms))
+
+
+if __name__ == '__main__':
+	run()
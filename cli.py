@@ -1,11 +1,60 @@
-import json
+import os
+import time
 import click
-from random import uniform
-from defaults import ORDERS_PER_SECOND, COOKS_IN_KITCHEN, COURIER_ARRIVAL_TIME_MAX, COURIER_ARRIVAL_TIME_MIN
-from simulation import simulate_orders
+from itertools import chain
+from defaults import (
+	ORDERS_PER_SECOND, COOKS_IN_KITCHEN, COURIER_ARRIVAL_TIME_MAX, COURIER_ARRIVAL_TIME_MIN, SIMULATION_MODE,
+	SIMULATION_FACTOR, BATCH_INTERVAL, COURIER_CAPACITY, PICKUP_WINDOW
+)
+# Only the modules with the choices and defaults of the options are imported here, the ones of the simulations
+# (simpy, numpy, asyncio, multiprocessing) are imported by the commands that use them
+from utils.log import LOG_SINKS, LOG_LEVEL, LOG_FORMAT, LOG_DIR
+from models.strategy import STRATEGIES
+from models.policies import KITCHEN_POLICIES, KITCHEN_POLICY
+from utils.ingest import read_orders, read_traces
+from utils.distributions import parse_courier_distribution
+from utils.report import REPORT_SORTS, REPORT_FORMATS
+from estimator import ESTIMATOR_STRATEGIES
 
 
-@click.command()
+@click.group()
+def cli():
+	"""
+	Simulate the fulfillment of delivery orders for a kitchen.
+	"""
+
+
+def read_order_files(filenames, trace):
+	"""
+	:param filenames: orders files
+	:param trace: merge the files by the 'arrivalTime' of the orders instead of reading them one after the other
+	:return: generator of orders
+	"""
+	if trace:
+		return read_traces(filenames)
+	return chain.from_iterable(read_orders(filename) for filename in filenames)
+
+
+def validate_courier_dist(ctx, param, value):
+	if value is not None:
+		try:
+			parse_courier_distribution(value)
+		except (ValueError, OSError) as e:
+			raise click.BadParameter(str(e))
+	return value
+
+
+def validate_intake_address(ctx, param, value):
+	if value is not None:
+		from utils.intake import parse_intake_address
+		try:
+			parse_intake_address(value)
+		except ValueError as e:
+			raise click.BadParameter(str(e))
+	return value
+
+
+@cli.command()
 @click.option('-o', '--orders_per_second', show_default=True, default=ORDERS_PER_SECOND,
 			  help='Number of orders per second for the Kitchen.')
 @click.option('-c', '--cooks_in_kitchen', show_default=True, default=COOKS_IN_KITCHEN,
@@ -14,32 +63,532 @@ from simulation import simulate_orders
 			  help='Min time for a courier to arrival.')
 @click.option('-tmax', '--courier_arrival_time_max', show_default=True, default=COURIER_ARRIVAL_TIME_MAX,
 			  help='Max time for a courier to arrival.')
+@click.option('--courier_dist', default=None, callback=validate_courier_dist,
+			  help="Distribution of the courier arrival delays pre-sampled with numpy: 'uniform' between -tmin and "
+				   "-tmax, 'lognormal:MU,SIGMA' or 'empirical:FILE' of historical delays.  By default uniform from the "
+				   "seeded random generator.")
+@click.option('-m', '--mode', show_default=True, default=SIMULATION_MODE, type=click.Choice(['realtime', 'virtual']),
+			  help="Run paced by the wall clock ('realtime') or as fast as possible ('virtual').")
+@click.option('-f', '--factor', show_default=True, default=SIMULATION_FACTOR, type=float,
+			  help="Real seconds per simulated second for 'realtime' mode (0.1 runs 10 times faster).")
+@click.option('-s', '--seed', type=int, default=None,
+			  help='Seed for the random generator of the simulations.')
+@click.option('-l', '--log_sink', multiple=True, show_default=True, default=LOG_SINKS,
+			  type=click.Choice(['stdout', 'file', 'none']),
+			  help="Outputs for the events, can be repeated.  'none' disables the events log and the console output.")
+@click.option('-v', '--log_level', show_default=True, default=LOG_LEVEL, type=click.IntRange(0, 2),
+			  help='Events verbosity: 0 no events, 1 events, 2 events and wait time details.')
+@click.option('--log_format', show_default=True, default=LOG_FORMAT, type=click.Choice(['text', 'binary']),
+			  help="Events log file format, 'binary' logs can be read with the 'events' command.")
+@click.option('--log_dir', show_default=True, default=LOG_DIR, type=click.Path(file_okay=False),
+			  help='Directory of the events logs, the files written next to them and the checkpoints.')
 @click.option('--print_info', is_flag=True, show_default=True, default=False,
 			  help='Print Simulation info with Orders and Courier data.')
-@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
-def run(filename, orders_per_second, cooks_in_kitchen, courier_arrival_time_min, courier_arrival_time_max, print_info):
+@click.option('--kitchen_policy', show_default=True, default=KITCHEN_POLICY, type=click.Choice(list(KITCHEN_POLICIES)),
+			  help="Scheduling of the cooks: arrival order ('fifo'), shortest prepTime first ('spt'), earliest courier "
+				   "arrival first ('earliest_courier') or smallest order 'priority' first.")
+@click.option('--preemptive', is_flag=True, default=False,
+			  help='Orders preempt the cooks of the orders in preparation that the policy schedules after them.')
+@click.option('--report_sort', show_default=True, default='pickup', type=click.Choice(REPORT_SORTS),
+			  help="Order of the rows of the orders and couriers tables: as picked up ('pickup') or longest 'wait' first.")
+@click.option('--report_offset', show_default=True, default=0, type=click.IntRange(min=0),
+			  help='Number of rows of the orders and couriers tables to skip, e.g. to show a page.')
+@click.option('--report_limit', default=None, type=click.IntRange(min=0),
+			  help="Number of rows of the orders and couriers tables, e.g. the top N with '--report_sort wait'.  "
+				   "[default: all]")
+@click.option('--report_format', show_default=True, default='text', type=click.Choice(REPORT_FORMATS),
+			  help="Format of the orders and couriers tables, 'csv' and 'json' are written next to the events log "
+				   "with the 'file' sink.")
+@click.option('--strategies', show_default=True, default='fifo,matched',
+			  help='Comma separated strategies to simulate: {0}.'.format(', '.join(STRATEGIES)))
+@click.option('--batch_interval', show_default=True, default=BATCH_INTERVAL, type=float,
+			  help="Seconds between the assignments of the 'batched' strategy.")
+@click.option('--courier_capacity', show_default=True, default=COURIER_CAPACITY, type=click.IntRange(min=1),
+			  help="Max orders a courier of the 'multi' strategy picks up in one trip.")
+@click.option('--pickup_window', show_default=True, default=PICKUP_WINDOW, type=click.FloatRange(min=0),
+			  help="Max seconds a courier of the 'multi' strategy waits for more ready orders after picking up its own, "
+				   "0 to leave with the orders ready at its pickup.")
+@click.option('--trace', is_flag=True, default=False,
+			  help="Replay the orders at their 'arrivalTime' instead of -o orders per second, with the courier delays "
+				   "of their 'courierArrivalTime' if present.  Many FILENAMES are merged by time.")
+@click.option('--compression', show_default=True, default=1.0, type=click.FloatRange(min=0, min_open=True),
+			  help='The time between the arrivals of a --trace is divided by it, e.g. 2 replays an hour in 30 minutes.')
+@click.option('--live', default=None, callback=validate_intake_address,
+			  help="Receive the orders from a live feed instead of FILENAMES in 'realtime' mode: newline delimited "
+				   "JSON orders on 'PORT', 'HOST:PORT' or 'unix:PATH', until an 'END' line, see the 'feed' command.")
+@click.option('--metrics_interval', default=None, type=click.FloatRange(min=0, min_open=True),
+			  help="Simulated seconds between samples of the live metrics, written as CSV next to the events log "
+				   "with the 'file' sink.  Disabled by default.")
+@click.option('--metrics_port', default=None, type=click.IntRange(0, 65535),
+			  help='Serve the live metrics in Prometheus text format on http://127.0.0.1:PORT/metrics during the run, '
+				   'needs --metrics_interval.')
+@click.option('--profile', is_flag=True, default=False,
+			  help="Print the wall time and events of each process type and the realtime lag, with the 'file' sink "
+				   "also written as cProfile (.prof) and folded stacks (.folded) files next to the events log.")
+@click.option('--checkpoint_interval', default=None, type=click.FloatRange(min=0, min_open=True),
+			  help="Simulated seconds between checkpoints, written to 'LOG_DIR/STRATEGY.checkpoint' to continue the "
+				   "simulation with the 'resume' command.  Disabled by default.")
+@click.option('--warmup', is_flag=True, default=False,
+			  help="Stop after the first checkpoint, e.g. to fork the simulations of a 'sweep' from it.")
+@click.option('--cache_dir', default=None, envvar='SIMULATION_CACHE_DIR', type=click.Path(file_okay=False),
+			  help='Directory of the cache of the results of the seeded simulations, the same orders files and '
+				   'parameters return the cached results without simulating.  [env: SIMULATION_CACHE_DIR]')
+@click.option('--cache_max_mb', show_default=True, default=64.0, type=click.FloatRange(min=0),
+			  help='Max size of the cache, the least recently used results are evicted.')
+@click.option('--no_cache', is_flag=True, default=False,
+			  help='Simulate even if the results are cached, and refresh them.')
+@click.argument('filenames', nargs=-1, type=click.Path(exists=True, writable=False, readable=True))
+def run(filenames, orders_per_second, cooks_in_kitchen, courier_arrival_time_min, courier_arrival_time_max, courier_dist,
+		mode, factor, seed, log_sink, log_level, log_format, log_dir, print_info, kitchen_policy, preemptive, report_sort,
+		report_offset, report_limit, report_format, strategies, batch_interval, courier_capacity, pickup_window, trace,
+		compression, live, metrics_interval, metrics_port, profile, checkpoint_interval, warmup, cache_dir,
+		cache_max_mb, no_cache):
 	"""
-	Simulate the fulfillment of delivery orders for a kitchen.
-	Run 2 simulations;
+	Run a simulation for each strategy, by default 2 simulations;
 		1: using the 'FIFO' strategy for couriers where the courier picks up the next available order
 		2: using the 'MATCHED' strategy for couriers where each courier has an order assigned and may only pick up that order.
+	The 'BATCHED' strategy periodically assigns the pending orders to the couriers minimizing the total wait time.
+	With the 'MULTI' strategy couriers pick up many ready orders in one trip.
 	"""
+	from simulation import simulate_orders
 	# Simulation parameters
 	simulation_config = {
 		'orders_per_second': orders_per_second,
 		'cooks_in_kitchen': cooks_in_kitchen,
-		'strategy': 'fifo',
 		'courier_arrival_time_min': courier_arrival_time_min,
 		'courier_arrival_time_max': courier_arrival_time_max,
-		'courier_arrival_dist_fnc': uniform,
-		'print_info': print_info
+		'courier_arrival_dist_fnc': None,
+		'courier_arrival_dist': courier_dist,
+		'print_info': print_info,
+		'mode': mode,
+		'factor': factor,
+		'seed': seed,
+		'log_sinks': log_sink,
+		'log_level': log_level,
+		'log_format': log_format,
+		'log_dir': log_dir,
+		'kitchen_policy': kitchen_policy,
+		'kitchen_preemptive': preemptive,
+		'report_sort': report_sort,
+		'report_offset': report_offset,
+		'report_limit': report_limit,
+		'report_format': report_format,
+		'batch_interval': batch_interval,
+		'courier_capacity': courier_capacity,
+		'pickup_window': pickup_window,
+		'trace': trace,
+		'trace_compression': compression,
+		'live_intake': live,
+		'metrics_interval': metrics_interval,
+		'metrics_port': metrics_port,
+		'profile': profile,
+		'checkpoint_interval': checkpoint_interval,
+		'checkpoint_stop': warmup,
+		'cache_dir': cache_dir,
+		'cache_bypass': no_cache,
+		'cache_max_bytes': int(cache_max_mb * (1 << 20))
+	}
+	if live is None and not filenames:
+		raise click.BadParameter('needs FILENAMES or --live', param_hint='FILENAMES')
+	if live is not None and (filenames or trace):
+		raise click.BadParameter('can not be used with FILENAMES or --trace', param_hint='--live')
+	if live is not None and (mode != 'realtime' or checkpoint_interval is not None):
+		raise click.BadParameter("needs the 'realtime' mode and can not be checkpointed", param_hint='--live')
+	if metrics_port is not None and metrics_interval is None:
+		raise click.BadParameter('needs --metrics_interval', param_hint='--metrics_port')
+	if warmup and checkpoint_interval is None:
+		raise click.BadParameter('needs --checkpoint_interval', param_hint='--warmup')
+	if report_format != 'text' and 'file' not in log_sink:
+		raise click.BadParameter("needs the 'file' log sink", param_hint='--report_format')
+	if cache_dir and seed is not None and live is None:
+		from utils.cache import files_digest
+		simulation_config['orders_digest'] = files_digest(filenames)
+	for strategy in strategies.split(','):
+		if strategy not in STRATEGIES:
+			raise click.BadParameter('Unknown strategy: {0}'.format(strategy), param_hint='--strategies')
+		simulation_config['strategy'] = strategy
+		simulation_config['checkpoint_file'] = os.path.join(log_dir, '{0}.checkpoint'.format(strategy))
+		simulate_orders(read_order_files(filenames, trace), simulation_config)
+
+
+@cli.command(params=[param for param in run.params if param.name not in ['trace', 'live']])
+@click.pass_context
+def replay(ctx, **options):
+	"""
+	Replay the orders of traces at their 'arrivalTime', the same as 'run --trace'.  Many FILENAMES are merged by time.
+	"""
+	ctx.invoke(run, trace=True, **options)
+
+
+@cli.command()
+@click.option('-o', '--orders_per_second', type=int, default=None,
+			  help='Number of orders per second for the Kitchen after the checkpoint.  [default: the checkpoint one]')
+@click.option('-tmin', '--courier_arrival_time_min', type=float, default=None,
+			  help='Min time for a courier to arrival after the checkpoint.  [default: the checkpoint one]')
+@click.option('-tmax', '--courier_arrival_time_max', type=float, default=None,
+			  help='Max time for a courier to arrival after the checkpoint.  [default: the checkpoint one]')
+@click.option('-m', '--mode', default=None, type=click.Choice(['realtime', 'virtual']),
+			  help='Simulation mode after the checkpoint.  [default: the checkpoint one]')
+@click.option('-f', '--factor', default=None, type=float,
+			  help="Real seconds per simulated second for 'realtime' mode.  [default: the checkpoint one]")
+@click.option('-s', '--seed', type=int, default=None,
+			  help='A seed different from the checkpoint one forks a new random stream for the couriers arrival.  '
+				   '[default: continue the checkpoint stream]')
+@click.option('-l', '--log_sink', multiple=True, show_default=True, default=LOG_SINKS,
+			  type=click.Choice(['stdout', 'file', 'none']),
+			  help="Outputs for the events, can be repeated.  'none' disables the events log and the console output.")
+@click.option('-v', '--log_level', show_default=True, default=LOG_LEVEL, type=click.IntRange(0, 2),
+			  help='Events verbosity: 0 no events, 1 events, 2 events and wait time details.')
+@click.option('--print_info', is_flag=True, show_default=True, default=False,
+			  help='Print Simulation info with Orders and Courier data.')
+@click.option('--checkpoint_interval', default=None, type=click.FloatRange(min=0, min_open=True),
+			  help='Simulated seconds between checkpoints, written to the CHECKPOINT file.  Disabled by default.')
+@click.argument('checkpoint', type=click.Path(exists=True, dir_okay=False))
+@click.argument('filenames', nargs=-1, required=True, type=click.Path(exists=True, writable=False, readable=True))
+def resume(checkpoint, filenames, orders_per_second, courier_arrival_time_min, courier_arrival_time_max, mode, factor,
+		   seed, log_sink, log_level, print_info, checkpoint_interval):
+	"""
+	Continue a simulation from a checkpoint written by 'run --checkpoint_interval'.  FILENAMES are the orders files of
+	the checkpointed simulation, the orders received before the checkpoint are skipped.
+	"""
+	from simulation import simulate_orders
+	from utils.checkpoint import load_checkpoint
+	state = load_checkpoint(checkpoint)
+	overrides = {
+		'orders_per_second': orders_per_second,
+		'courier_arrival_time_min': courier_arrival_time_min,
+		'courier_arrival_time_max': courier_arrival_time_max,
+		'mode': mode,
+		'factor': factor,
+		'seed': seed
+	}
+	simulation_config = dict(state['config'], **{k: v for k, v in overrides.items() if v is not None})
+	simulation_config.update({
+		'courier_arrival_dist_fnc': None,
+		'print_info': print_info,
+		'log_sinks': log_sink,
+		'log_level': log_level,
+		'checkpoint_interval': checkpoint_interval,
+		'checkpoint_file': checkpoint,
+		'checkpoint_stop': False
+	})
+	simulate_orders(read_order_files(filenames, simulation_config.get('trace')), simulation_config, state)
+
+
+@cli.command()
+@click.option('-o', '--orders_per_second', show_default=True, default=str(ORDERS_PER_SECOND),
+			  help="Orders per second values: comma separated and/or 'start:stop[:step]' ranges.")
+@click.option('-c', '--cooks_in_kitchen', show_default=True, default=str(COOKS_IN_KITCHEN),
+			  help="Cooks in kitchen values: comma separated and/or 'start:stop[:step]' ranges.")
+@click.option('-tmin', '--courier_arrival_time_min', show_default=True, default=str(COURIER_ARRIVAL_TIME_MIN),
+			  help="Min courier arrival time values: comma separated and/or 'start:stop[:step]' ranges.")
+@click.option('-tmax', '--courier_arrival_time_max', show_default=True, default=str(COURIER_ARRIVAL_TIME_MAX),
+			  help="Max courier arrival time values: comma separated and/or 'start:stop[:step]' ranges.")
+@click.option('--strategies', show_default=True, default='fifo,matched',
+			  help='Comma separated strategies to simulate for each combination.')
+@click.option('-s', '--seed', show_default=True, default=0,
+			  help='Base seed, each combination gets its own seed derived from it.')
+@click.option('-w', '--workers', type=int, default=None,
+			  help='Number of worker processes.  [default: number of CPUs]')
+@click.option('--output', show_default=True, default='sweep.csv', type=click.Path(writable=True),
+			  help="Results table, CSV or Parquet when ending with '.parquet'.")
+@click.option('--checkpoint', default=None, type=click.Path(exists=True, dir_okay=False),
+			  help='Fork every simulation from the state of a checkpoint instead of simulating the warm-up again, '
+				   'the strategy and cooks in kitchen are the checkpoint ones.')
+@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
+def sweep(filename, orders_per_second, cooks_in_kitchen, courier_arrival_time_min, courier_arrival_time_max,
+		  strategies, seed, workers, output, checkpoint):
+	"""
+	Run the simulations for every combination of the parameters ranges in parallel, in virtual time,
+	and collect their metrics into a single table.
+	"""
+	from sweep import parse_range, sweep_configs, run_sweep, write_rows, checkpoint_base_config
+	from utils.checkpoint import load_checkpoint
+	grid = {
+		'orders_per_second': parse_range(orders_per_second),
+		'cooks_in_kitchen': parse_range(cooks_in_kitchen),
+		'courier_arrival_time_min': parse_range(courier_arrival_time_min),
+		'courier_arrival_time_max': parse_range(courier_arrival_time_max)
+	}
+	base_config = {}
+	strategies = strategies.split(',')
+	if checkpoint:
+		base_config = checkpoint_base_config(load_checkpoint(checkpoint))
+		grid['cooks_in_kitchen'] = [base_config['cooks_in_kitchen']]
+		strategies = [base_config['strategy']]
+	configs = sweep_configs(grid, strategies, base_config, seed)
+	rows = run_sweep(filename, configs, workers, checkpoint)
+	write_rows(rows, output)
+	click.echo('{0} simulations written to {1}'.format(len(rows), output))
+
+
+@cli.command()
+@click.option('-n', '--replications', show_default=True, default=30,
+			  help='Number of replications for each strategy.')
+@click.option('-o', '--orders_per_second', show_default=True, default=ORDERS_PER_SECOND,
+			  help='Number of orders per second for the Kitchen.')
+@click.option('-c', '--cooks_in_kitchen', show_default=True, default=COOKS_IN_KITCHEN,
+			  help='Number of orders that can be processed in parallel.')
+@click.option('-tmin', '--courier_arrival_time_min', show_default=True, default=COURIER_ARRIVAL_TIME_MIN,
+			  help='Min time for a courier to arrival.')
+@click.option('-tmax', '--courier_arrival_time_max', show_default=True, default=COURIER_ARRIVAL_TIME_MAX,
+			  help='Max time for a courier to arrival.')
+@click.option('--courier_dist', default=None, callback=validate_courier_dist,
+			  help="Distribution of the courier arrival delays pre-sampled with numpy: 'uniform' between -tmin and "
+				   "-tmax, 'lognormal:MU,SIGMA' or 'empirical:FILE' of historical delays.  By default uniform from the "
+				   "seeded random generator.")
+@click.option('--strategies', show_default=True, default='fifo,matched',
+			  help='Comma separated strategies to simulate.')
+@click.option('-s', '--seed', show_default=True, default=0,
+			  help='Seed of the first replication, the following ones use the next seeds.')
+@click.option('--kitchen_policy', show_default=True, default=KITCHEN_POLICY, type=click.Choice(list(KITCHEN_POLICIES)),
+			  help="Scheduling of the cooks: arrival order ('fifo'), shortest prepTime first ('spt'), earliest courier "
+				   "arrival first ('earliest_courier') or smallest order 'priority' first.")
+@click.option('--preemptive', is_flag=True, default=False,
+			  help='Orders preempt the cooks of the orders in preparation that the policy schedules after them.')
+@click.option('--confidence', show_default=True, default=0.95,
+			  help='Confidence level for the intervals of the mean wait times.')
+@click.option('-w', '--workers', type=int, default=None,
+			  help='Number of worker processes.  [default: number of CPUs]')
+@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
+def replicate(filename, replications, orders_per_second, cooks_in_kitchen, courier_arrival_time_min,
+			  courier_arrival_time_max, courier_dist, kitchen_policy, preemptive, strategies, seed, confidence, workers):
+	"""
+	Run seeded replications of the simulations in parallel, in virtual time, and report
+	mean, confidence interval and percentiles of the order and courier wait times.
+	"""
+	from replication import replication_configs, run_replications, REPLICATION_METRICS
+	base_config = {
+		'orders_per_second': orders_per_second,
+		'cooks_in_kitchen': cooks_in_kitchen,
+		'courier_arrival_time_min': courier_arrival_time_min,
+		'courier_arrival_time_max': courier_arrival_time_max,
+		'courier_arrival_dist': courier_dist,
+		'kitchen_policy': kitchen_policy,
+		'kitchen_preemptive': preemptive
+	}
+	configs = replication_configs(base_config, replications, strategies.split(','), seed)
+	stats = {}
+	for done, (result, stats) in enumerate(run_replications(filename, configs, workers), 1):
+		summary = {metric: stats[result['strategy']][metric].summary(confidence) for metric in REPLICATION_METRICS}
+		click.echo((
+			'{0:>6}/{1:<6} {2:<8} SEED {3:<8} '
+			'ORDER WAIT {4:.4f}s [{5:.4f}, {6:.4f}]   COURIER WAIT {7:.4f}s [{8:.4f}, {9:.4f}]'
+		).format(
+			done,
+			len(configs),
+			result['strategy'].upper(),
+			result['seed'],
+			summary['order_wait_time']['mean'],
+			summary['order_wait_time']['ci_low'],
+			summary['order_wait_time']['ci_high'],
+			summary['courier_wait_time']['mean'],
+			summary['courier_wait_time']['ci_low'],
+			summary['courier_wait_time']['ci_high']
+		))
+	click.echo('=' * 120)
+	click.echo('=== RESULTS ({0} REPLICATIONS, {1:g}% CONFIDENCE) '.format(replications, confidence * 100).ljust(120, '='))
+	click.echo('{0:<10}{1:<20}{2:>12}{3:>12}{4:>12}{5:>12}{6:>12}{7:>12}'.format(
+		'Strategy', 'Metric', 'Mean', 'CI low', 'CI high', 'p50', 'p95', 'p99'
+	))
+	for strategy, metrics in stats.items():
+		for metric, metric_stats in metrics.items():
+			summary = metric_stats.summary(confidence)
+			click.echo('{0:<10}{1:<20}{2:>11.4f}s{3:>11.4f}s{4:>11.4f}s{5:>11.4f}s{6:>11.4f}s{7:>11.4f}s'.format(
+				strategy.upper(),
+				metric.upper().replace('_', ' '),
+				summary['mean'],
+				summary['ci_low'],
+				summary['ci_high'],
+				summary['p50'],
+				summary['p95'],
+				summary['p99']
+			))
+	click.echo('=' * 120)
+
+
+@cli.command()
+@click.option('-o', '--orders_per_second', show_default=True, default=ORDERS_PER_SECOND,
+			  help='Number of orders per second for all the kitchens.')
+@click.option('-c', '--cooks_in_kitchen', show_default=True, default=COOKS_IN_KITCHEN,
+			  help='Default number of orders that can be processed in parallel by a kitchen.')
+@click.option('-tmin', '--courier_arrival_time_min', show_default=True, default=COURIER_ARRIVAL_TIME_MIN,
+			  help='Default min time for a courier to arrival.')
+@click.option('-tmax', '--courier_arrival_time_max', show_default=True, default=COURIER_ARRIVAL_TIME_MAX,
+			  help='Default max time for a courier to arrival.')
+@click.option('--courier_dist', default=None, callback=validate_courier_dist,
+			  help="Distribution of the courier arrival delays pre-sampled with numpy: 'uniform' between -tmin and "
+				   "-tmax, 'lognormal:MU,SIGMA' or 'empirical:FILE' of historical delays.  By default uniform from the "
+				   "seeded random generator.")
+@click.option('--strategy', show_default=True, default='fifo', type=click.Choice(list(STRATEGIES)),
+			  help='Default strategy of the kitchens.')
+@click.option('-s', '--seed', show_default=True, default=0,
+			  help='Seed for the random generators, each region gets its own seed derived from it.')
+@click.option('-w', '--workers', show_default=True, default=1,
+			  help='Number of worker processes the regions are partitioned across.')
+@click.argument('topology_file', type=click.Path(exists=True, writable=False, readable=True))
+@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
+def topology(topology_file, filename, orders_per_second, cooks_in_kitchen, courier_arrival_time_min,
+			 courier_arrival_time_max, courier_dist, strategy, seed, workers):
+	"""
+	Simulate many kitchens grouped in regions that share courier pools, in virtual time.
+	"""
+	from topology import load_topology, run_topology
+	config = {
+		'orders_per_second': orders_per_second,
+		'cooks_in_kitchen': cooks_in_kitchen,
+		'strategy': strategy,
+		'courier_arrival_time_min': courier_arrival_time_min,
+		'courier_arrival_time_max': courier_arrival_time_max,
+		'courier_arrival_dist_fnc': None,
+		'courier_arrival_dist': courier_dist,
+		'mode': 'virtual',
+		'seed': seed
+	}
+	metrics, kitchens = run_topology(filename, load_topology(topology_file), config, workers)
+
+	def format_wait(wait_time):
+		return '{0:>13.4f}s'.format(wait_time) if wait_time is not None else '{0:>14}'.format('-')
+
+	click.echo('=' * 120)
+	click.echo('{0:<20}{1:<20}{2:>10}{3:>12}{4:>14}{5:>14}'.format(
+		'Region', 'Kitchen', 'Orders', 'End', 'Order wait', 'Courier wait'
+	))
+	for kitchen in kitchens:
+		click.echo('{0:<20}{1:<20}{2:>10}{3:>11.1f}s{4}{5}'.format(
+			kitchen['region'],
+			kitchen['kitchen'],
+			kitchen['orders'],
+			kitchen['end_time'],
+			format_wait(kitchen['avg_order_wait_time']),
+			format_wait(kitchen['avg_courier_wait_time'])
+		))
+	click.echo('=' * 120)
+	click.echo('ORDERS: {0}'.format(metrics['orders']))
+	click.echo('SIMULATION TIME: {0:.1f}s'.format(metrics['simulation_time']))
+	click.echo('AVG ORDER WAIT TIME: {0}'.format(format_wait(metrics['avg_order_wait_time']).strip()))
+	click.echo('AVG COURIER WAIT TIME: {0}'.format(format_wait(metrics['avg_courier_wait_time']).strip()))
+	click.echo('BARRIERS: {0}   COURIERS TRANSFERRED: {1}'.format(metrics['barriers'], metrics['couriers_transferred']))
+	click.echo('=' * 120)
+
+
+@cli.command()
+@click.option('-o', '--orders_per_second', show_default=True, default=ORDERS_PER_SECOND,
+			  help='Number of orders per second for the Kitchen.')
+@click.option('-c', '--cooks_in_kitchen', show_default=True, default=COOKS_IN_KITCHEN,
+			  help='Number of orders that can be processed in parallel.')
+@click.option('-tmin', '--courier_arrival_time_min', show_default=True, default=COURIER_ARRIVAL_TIME_MIN,
+			  help='Min time for a courier to arrival.')
+@click.option('-tmax', '--courier_arrival_time_max', show_default=True, default=COURIER_ARRIVAL_TIME_MAX,
+			  help='Max time for a courier to arrival.')
+@click.option('--courier_dist', show_default=True, default='uniform', callback=validate_courier_dist,
+			  help="Distribution of the courier arrival delays: 'uniform' between -tmin and -tmax, "
+				   "'lognormal:MU,SIGMA' or 'empirical:FILE' of historical delays.")
+@click.option('--strategies', show_default=True, default='fifo,matched',
+			  help='Comma separated strategies to estimate: {0}.'.format(', '.join(ESTIMATOR_STRATEGIES)))
+@click.option('-s', '--seed', type=int, default=None,
+			  help="Seed for the courier arrival delays, the ones of 'run --courier_dist' with the same seed.")
+@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
+def estimate(filename, orders_per_second, cooks_in_kitchen, courier_arrival_time_min, courier_arrival_time_max,
+			 courier_dist, strategies, seed):
+	"""
+	Estimate the average wait times of a simulation in milliseconds, without simulating.  Exact with 1 cook in the
+	kitchen, an approximation with more cooks.  Only the 'fifo' kitchen policy is supported.
+	"""
+	from estimator import estimate_orders
+	config = {
+		'orders_per_second': orders_per_second,
+		'cooks_in_kitchen': cooks_in_kitchen,
+		'courier_arrival_time_min': courier_arrival_time_min,
+		'courier_arrival_time_max': courier_arrival_time_max,
+		'courier_arrival_dist': courier_dist,
+		'seed': seed
 	}
-	with open(filename) as f:
-		simulation_orders = json.load(f)
-		simulate_orders(simulation_orders, simulation_config)
-		simulation_config['strategy'] = 'matched'
-		simulate_orders(simulation_orders, simulation_config)
+	click.echo('=' * 120)
+	click.echo('{0:<10}{1:>10}{2:>18}{3:>18}{4:>18}{5:>12}'.format(
+		'Strategy', 'Orders', 'Simulation time', 'Order wait', 'Courier wait', 'Estimate'
+	))
+	for strategy in strategies.split(','):
+		if strategy not in ESTIMATOR_STRATEGIES:
+			raise click.BadParameter('Unknown strategy: {0}'.format(strategy), param_hint='--strategies')
+		metrics = estimate_orders(read_orders(filename), dict(config, strategy=strategy))
+		click.echo('{0:<10}{1:>10}{2:>17.1f}s{3:>17.4f}s{4:>17.4f}s{5:>12}'.format(
+			strategy.upper(),
+			metrics['orders'],
+			metrics['simulation_time'],
+			metrics['avg_order_wait_time'],
+			metrics['avg_courier_wait_time'],
+			'exact' if metrics['exact'] else 'approx'
+		))
+	click.echo('=' * 120)
+
+
+@cli.command()
+@click.option('-r', '--rate', type=click.FloatRange(min=0, min_open=True), default=None,
+			  help='Orders per second sent to the intake.  [default: as fast as possible]')
+@click.option('-n', '--connections', show_default=True, default=1, type=click.IntRange(min=1),
+			  help='Number of concurrent connections sharing the orders and the rate.')
+@click.option('--no_end', is_flag=True, default=False,
+			  help="Do not end the feed after the orders, e.g. to feed more files to the same simulation.")
+@click.option('--timeout', show_default=True, default=30.0, type=click.FloatRange(min=0),
+			  help='Seconds to keep retrying the connections while the simulation starts.')
+@click.argument('address', callback=validate_intake_address)
+@click.argument('filenames', nargs=-1, required=True, type=click.Path(exists=True, writable=False, readable=True))
+def feed(address, filenames, rate, connections, no_end, timeout):
+	"""
+	Load generator for 'run --live ADDRESS': send the orders of FILENAMES to the live intake of a simulation.
+	"""
+	from utils.intake import feed_orders
+	orders = list(read_order_files(filenames, False))
+	start = time.perf_counter()
+	result = feed_orders(address, orders, rate, connections, not no_end, timeout)
+	elapsed = time.perf_counter() - start
+	click.echo('ORDERS SENT: {0}   ACCEPTED: {1}   REJECTED: {2}   RATE: {3:.1f} orders/s'.format(
+		result['sent'],
+		result['accepted'],
+		result['rejected'],
+		result['sent'] / elapsed if elapsed else 0.0
+	))
+
+
+@cli.command(context_settings={'allow_extra_args': True, 'allow_interspersed_args': False})
+@click.argument('benchmark', type=click.Choice(['engine', 'matching', 'startup']))
+@click.pass_context
+def bench(ctx, benchmark):
+	"""
+	Run a benchmark of the 'benchmarks' package with its own options, e.g. 'bench engine --help'.
+	"""
+	from importlib import import_module
+	command = import_module('benchmarks.' + benchmark).run
+	command.main(ctx.args, prog_name='{0} {1}'.format(ctx.command_path, benchmark), standalone_mode=False)
+
+
+@cli.command()
+@click.option('-t', '--event_type', multiple=True,
+			  help="Only show events of this type, e.g. 'ORDER PICKED UP', can be repeated.")
+@click.option('--order_id', default=None,
+			  help='Only show the events of this order.')
+@click.option('--config', 'show_config', is_flag=True, default=False,
+			  help='Show the configuration and the metrics of the simulation.')
+@click.argument('filename', type=click.Path(exists=True, writable=False, readable=True))
+def events(filename, event_type, order_id, show_config):
+	"""
+	Read a binary events log.
+	"""
+	from utils.eventlog import EventLogReader
+	with EventLogReader(filename) as reader:
+		if show_config:
+			for obj in reader.objects():
+				click.echo(obj)
+			return
+		for event in reader.events(event_type or None, order_id):
+			click.echo('{0:>12.4f} {1:<20} {2:<38} {3}'.format(
+				event.time,
+				event.event,
+				event.id,
+				' '.join([str(a) for a in event.args])
+			))
 
 
 if __name__ == '__main__':
-	run()
+	cli()
@@ -3,4 +3,9 @@ ORDERS_PER_SECOND = 2
 COOKS_IN_KITCHEN = 1
 COURIER_ARRIVAL_TIME_MIN = 3
 COURIER_ARRIVAL_TIME_MAX = 15
+SIMULATION_MODE = 'realtime'
+SIMULATION_FACTOR = 1
+BATCH_INTERVAL = 2
+COURIER_CAPACITY = 3
+PICKUP_WINDOW = 0
 # END DEFAULTS
@@ -0,0 +1,71 @@
+from utils.distributions import DelaySampler
+
+
+# Strategies with a closed form for the pickups
+ESTIMATOR_STRATEGIES = ['fifo', 'matched']
+
+
+def estimate_wait_times(prep_times, config):
+	"""
+	Estimate the results of `simulation.simulate_orders` without simulating, with a vectorized recurrence over the
+	arrival, start, ready and pickup times of the orders.  Needs numpy.
+
+	The kitchen is a FIFO queue: the delay of each order until a cook starts it is given by the Lindley recurrence of
+	the work in the kitchen, exact with 1 cook.  With more cooks it is a fluid approximation: the work ahead of the
+	order is drained by all the cooks at once, but the other cooks are still busy with their mean residual prepTime
+	when the order starts.  Couriers arrive after their delay, 'matched' couriers pick up their own order and 'fifo'
+	couriers, in arrival order, the orders in ready order.
+
+	:param prep_times: prepTime of each order, in arrival order
+	:param config: configuration object for simulation, see `simulation.simulate_orders`, only the 'fifo' kitchen
+		policy, the 'fifo' and 'matched' strategies and the 'courier_arrival_dist' distributions are supported.
+		With 'courier_arrival_dist' the delays are the ones of the simulation with the same seed, otherwise they are
+		uniform from a numpy stream.
+	:return: dictionary with the metrics of `simulation.simulation_metrics` and 'exact': False for approximations
+	"""
+	import numpy
+	if config['strategy'] not in ESTIMATOR_STRATEGIES:
+		raise ValueError('The estimator only supports the strategies: {0}'.format(', '.join(ESTIMATOR_STRATEGIES)))
+	if config.get('kitchen_policy', 'fifo') != 'fifo' or config.get('kitchen_preemptive'):
+		raise ValueError("The estimator only supports the 'fifo' kitchen policy")
+	prep_times = numpy.asarray(prep_times, dtype=numpy.float64)
+	size = len(prep_times)
+	cooks = config['cooks_in_kitchen']
+	if size == 0:
+		return {'orders': 0, 'simulation_time': 0, 'avg_order_wait_time': 0.0, 'avg_courier_wait_time': 0.0, 'exact': True}
+	# `orders_per_second` orders are received at the start of each second
+	arrival_times = (numpy.arange(size) // config['orders_per_second']).astype(numpy.float64)
+	# Lindley recurrence of the work in the kitchen before each arrival: w[i] = max(0, w[i-1] + x[i-1]),
+	# solved with the running minimum of the cumulative sum of x
+	work = numpy.zeros(size)
+	numpy.cumsum(prep_times[:-1] - cooks * numpy.diff(arrival_times), out=work[1:])
+	work -= numpy.minimum.accumulate(work)
+	residual = (prep_times ** 2).mean() / (2 * prep_times.mean()) if prep_times.any() else 0.0
+	queue_times = numpy.maximum(work - (cooks - 1) * residual, 0) / cooks
+	ready_times = arrival_times + queue_times + prep_times
+
+	sampler = DelaySampler(config.get('courier_arrival_dist') or 'uniform', config.get('seed'))
+	courier_times = arrival_times + sampler.sample(
+		size, config['courier_arrival_time_min'], config['courier_arrival_time_max']
+	)
+	if config['strategy'] == 'fifo':
+		ready_times.sort()
+		courier_times.sort()
+	pickup_times = numpy.maximum(ready_times, courier_times)
+	return {
+		'orders': size,
+		'simulation_time': float(pickup_times.max()),
+		'avg_order_wait_time': float((pickup_times - ready_times).mean()),
+		'avg_courier_wait_time': float((pickup_times - courier_times).mean()),
+		'exact': cooks == 1
+	}
+
+
+def estimate_orders(orders, config):
+	"""
+	:param orders: iterable of order dictionaries, e.g. a generator from `read_orders`
+	:param config: configuration object for simulation, see `estimate_wait_times`
+	:return: estimated metrics of the simulation of the orders
+	"""
+	import numpy
+	return estimate_wait_times(numpy.fromiter((order['prepTime'] for order in orders), dtype=numpy.float64), config)
@@ -1,2 +1,27 @@
-from .delivery import Delivery
-from .kitchen import Kitchen
\ No newline at end of file
+# The re-exports are imported on first use, so the strategies and kitchen policies can be listed, e.g. by the CLI
+# options, without importing simpy
+_EXPORTS = {
+	'Delivery': 'delivery',
+	'Kitchen': 'kitchen',
+	'Order': 'order',
+	'Courier': 'courier',
+	'OrderResults': 'results',
+	'CourierResults': 'results',
+	'Strategy': 'strategy',
+	'FifoStrategy': 'strategy',
+	'MatchedStrategy': 'strategy',
+	'BatchedStrategy': 'strategy',
+	'MultiOrderStrategy': 'strategy',
+	'STRATEGIES': 'strategy'
+}
+
+
+def __getattr__(name):
+	if name not in _EXPORTS:
+		raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+	from importlib import import_module
+	return getattr(import_module('.' + _EXPORTS[name], __name__), name)
+
+
+def __dir__():
+	return sorted(list(globals()) + list(_EXPORTS))
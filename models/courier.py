@@ -0,0 +1,31 @@
+class Courier:
+	"""
+	Class used to represent a Courier, timestamps are simulation times in seconds
+
+	Attributes:
+		id: courier ID
+		arrival_delay: seconds the courier takes to arrive to the kitchen
+		order_id: ID of the order assigned by the strategy, or of the picked up order
+		dispatch_time: time the courier was dispatched
+		arrival_time: time the courier arrived to the kitchen
+		delivery_time: time the courier picked up the order
+		wait_time: seconds the courier waited for the order
+	"""
+	__slots__ = (
+		'id',
+		'arrival_delay',
+		'order_id',
+		'dispatch_time',
+		'arrival_time',
+		'delivery_time',
+		'wait_time'
+	)
+
+	def __init__(self, id, arrival_delay, order_id=None):
+		self.id = id
+		self.arrival_delay = arrival_delay
+		self.order_id = order_id
+		self.dispatch_time = None
+		self.arrival_time = None
+		self.delivery_time = None
+		self.wait_time = None
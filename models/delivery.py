@@ -1,7 +1,10 @@
-from datetime import datetime
+import simpy
 from random import uniform
-from utils import gen_id, log_event, log_stdout
+from utils import log_event, log_stdout
 from defaults import COURIER_ARRIVAL_TIME_MIN, COURIER_ARRIVAL_TIME_MAX
+from .courier import Courier
+from .results import CourierResults
+from .strategy import STRATEGIES
 
 
 class Delivery:
@@ -9,12 +12,19 @@ class Delivery:
 	Class used to represent a Delivery system for a Kitchen
 
 	Attributes:
-		couriers_fifo: list of couriers for 'fifo' strategy
-		couriers_done: list of couriers that already delivered the order
-		couriers_matched: dictionary of couriers for 'matched' strategy where key is the order ID and value the courier
+		couriers_done: CourierResults columnar store of the couriers that already picked up their orders
+		strategy: Strategy deciding which courier picks up which order
 		kitchen: the Kitchen object where orders are processed
+		courier_arrived: store signaling the couriers that arrived to the kitchen
+		courier_pool: simpy Container of idle couriers shared with other kitchens, None for an unlimited fleet
+		couriers_en_route: dictionary of the couriers traveling to the kitchen where key is the courier ID
+		couriers_dispatched: number of couriers dispatched
+		couriers_arrived: number of couriers that arrived to the kitchen
+		couriers_recalled: number of couriers sent back because their order was picked up by another courier
+		orders_picked_up: number of orders that left the kitchen with a courier
+		metrics: LiveMetrics notified on each pickup, None when live metrics are disabled
+		all_done: event triggered when all the expected orders were delivered
 		action: simulation process
-		end_loop: flag for ending the simulation loop
 	"""
 	def __init__(
 			self,
@@ -23,54 +33,92 @@ class Delivery:
 			strategy='fifo',
 			arrival_time_min=COURIER_ARRIVAL_TIME_MIN,
 			arrival_time_max=COURIER_ARRIVAL_TIME_MAX,
-			arrival_dist_fnc=uniform
+			arrival_dist_fnc=uniform,
+			courier_pool=None,
+			strategy_options=None,
+			courier_id_prefix='courier-',
+			keep_results=True
 	):
 		"""
 		Initialize Delivery object
 		:param env: simpy simulation environment
 		:param kitchen: the Kitchen object where orders are processed
+		:param strategy: name of the strategy in STRATEGIES or a Strategy class
 		:param arrival_dist_fnc: fnc(min: int, max: int) random function for generating the arrival time for couriers
 		:param arrival_time_min: first parameter for arrival_dist_fnc
 		:param arrival_time_max: second parameter for arrival_dist_fnc
+		:param courier_pool: simpy Container with the number of idle couriers, couriers are taken from it when dispatched
+			and put back when they return from the delivery, None to dispatch a new courier for each order
+		:param strategy_options: dictionary of keyword arguments for the strategy, e.g. 'interval' for 'batched'
+		:param courier_id_prefix: prefix of the courier IDs, followed by the number of the courier dispatch
+		:param keep_results: keep a row for each courier in `couriers_done`, or else only the aggregates
 		"""
 		self.__env = env
-		self.couriers_fifo = []
-		self.couriers_done = []
-		self.couriers_matched = {}
-		self.__strategy = strategy
+		self.couriers_done = CourierResults(keep_results)
 		self.kitchen = kitchen
-		self.end_loop = False
-		self.action = env.process(self.run())
+		self.courier_arrived = simpy.Store(env)
+		self.all_done = env.event()
+		self.__orders_expected = None
 		self.__arrival_time_min = arrival_time_min
 		self.__arrival_time_max = arrival_time_max
 		self.__arrival_dist_fnc = arrival_dist_fnc
+		self.courier_pool = courier_pool
+		self.couriers_en_route = {}
+		self.couriers_dispatched = 0
+		self.couriers_arrived = 0
+		self.couriers_recalled = 0
+		self.orders_picked_up = 0
+		self.__courier_id_prefix = courier_id_prefix
+		self.metrics = None
+		strategy_class = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+		self.strategy = strategy_class(env, self, **(strategy_options or {}))
+		self.action = env.process(self.run())
 
-	def __dispatch_new_courier(self, order):
-		arrival_delay = self.__arrival_dist_fnc(self.__arrival_time_min, self.__arrival_time_max)
-		courier_id = gen_id()
-		if self.__strategy == 'matched':
-			log_event('COURIER DISPATCHED', courier_id, 'DELAY', arrival_delay, 'ORDER ASSIGNED', order['id'])
+	def __dispatch_new_courier(self, order, arrival_delay=None):
+		if self.courier_pool is not None:
+			# Wait for an idle courier of the pool
+			yield self.courier_pool.get(1)
+		if arrival_delay is None:
+			arrival_delay = self.__arrival_dist_fnc(self.__arrival_time_min, self.__arrival_time_max)
+		self.couriers_dispatched += 1
+		# Counter based IDs: deterministic and cheaper than UUIDs
+		courier = Courier(self.__courier_id_prefix + str(self.couriers_dispatched), arrival_delay)
+		courier.dispatch_time = self.__env.now
+		self.strategy.on_courier_dispatched(courier, order)
+		if courier.order_id is not None:
+			log_event('COURIER DISPATCHED', courier.id, 'DELAY', arrival_delay, 'ORDER ASSIGNED', courier.order_id)
 		else:
-			log_event('COURIER DISPATCHED', courier_id, 'DELAY', arrival_delay)
+			log_event('COURIER DISPATCHED', courier.id, 'DELAY', arrival_delay)
+		self.couriers_en_route[courier.id] = courier
 		yield self.__env.timeout(arrival_delay)
-		if self.__strategy == 'matched':
-			log_event('COURIER ARRIVED', courier_id, 'ORDER ASSIGNED', order['id'])
+		self.__courier_arrived(courier)
+
+	def __resume_courier(self, courier):
+		# The courier was dispatched before the checkpoint
+		yield self.__env.timeout(courier.dispatch_time + courier.arrival_delay - self.__env.now)
+		self.__courier_arrived(courier)
+
+	def __courier_arrived(self, courier):
+		if courier.order_id is not None:
+			log_event('COURIER ARRIVED', courier.id, 'ORDER ASSIGNED', courier.order_id)
 		else:
-			log_event('COURIER ARRIVED', courier_id)
-		courier = {
-			'id': courier_id,
-			'arrival_delay': arrival_delay,
-			'arrival_time': datetime.now(),
-		}
-		self.couriers_fifo.append(courier)
-		self.couriers_matched[order['id']] = courier
+			log_event('COURIER ARRIVED', courier.id)
+		courier.arrival_time = self.__env.now
+		del self.couriers_en_route[courier.id]
+		self.couriers_arrived += 1
+		self.courier_arrived.put(courier)
 
-	def dispatch_new_courier(self, order):
+	def dispatch_new_courier(self, order, arrival_delay=None):
 		"""
-		Dispatch a new courier
+		Dispatch a new courier, without courier pool the courier leaves right away and `order.courier_eta` is set
 		:param order:
+		:param arrival_delay: seconds the courier takes to arrive, e.g. observed in a trace, None to sample it
 		"""
-		self.__env.process(self.__dispatch_new_courier(order))
+		if self.courier_pool is None:
+			if arrival_delay is None:
+				arrival_delay = self.__arrival_dist_fnc(self.__arrival_time_min, self.__arrival_time_max)
+			order.courier_eta = self.__env.now + arrival_delay
+		self.__env.process(self.__dispatch_new_courier(order, arrival_delay))
 
 	def pickup_order(self, courier, order):
 		"""
@@ -78,48 +126,137 @@ class Delivery:
 		:param courier: The courier who delivered the order
 		:param order: The order delivered
 		"""
-		courier['delivery_time'] = order['delivered_time']
-		courier['wait_time'] = (courier['delivery_time'] - courier['arrival_time']).total_seconds()
-		courier['order'] = order
+		self.pickup_orders(courier, [order])
+
+	def pickup_orders(self, courier, orders):
+		"""
+		Set the orders delivered for the courier, the courier leaves the kitchen with all of them
+		:param courier: The courier who delivered the orders
+		:param orders: The orders delivered, already picked up from the kitchen, the first one is the courier order
+		"""
+		courier.delivery_time = self.__env.now
+		courier.wait_time = courier.delivery_time - courier.arrival_time
+		courier.order_id = orders[0].id
 		self.couriers_done.append(courier)
-		log_event('ORDER PICKED UP', order['id'], order['name'], "COURIER:", courier['id'])
-		log_stdout('           ORDER WAIT TIME: {0} s.'.format(order['wait_time']))
-		log_stdout('           COURIER WAIT TIME: {0} s.'.format(courier['wait_time']))
+		self.orders_picked_up += len(orders)
+		if self.metrics is not None:
+			self.metrics.on_pickup(orders, courier)
+		if self.courier_pool is not None:
+			self.__env.process(self.__return_courier())
+		for order in orders:
+			log_event('ORDER PICKED UP', order.id, order.name, "COURIER:", courier.id)
+			log_stdout('           ORDER WAIT TIME: {0} s.'.format(order.wait_time))
+		log_stdout('           COURIER WAIT TIME: {0} s.'.format(courier.wait_time))
+		self.__check_all_done()
+
+	def recall_courier(self, courier):
+		"""
+		Send back a courier that arrived for an order picked up by another courier
+		:param courier: the courier that arrived to the kitchen
+		"""
+		log_event('COURIER RECALLED', courier.id, 'ORDER ASSIGNED', courier.order_id)
+		self.couriers_recalled += 1
+		if self.courier_pool is not None:
+			self.__env.process(self.__return_courier())
+
+	def __return_courier(self):
+		# The trip to the customer and back to the pool takes as long as a trip to the kitchen
+		yield self.__env.timeout(self.__arrival_dist_fnc(self.__arrival_time_min, self.__arrival_time_max))
+		self.courier_pool.put(1)
+
+	def expect_orders(self, count):
+		"""
+		Set the number of orders of the simulation, `all_done` is triggered when all of them are delivered
+		:param count: number of orders sent to the kitchen
+		"""
+		self.__orders_expected = count
+		self.__check_all_done()
+
+	def __check_all_done(self):
+		if (
+				self.__orders_expected is not None and
+				self.orders_picked_up >= self.__orders_expected and
+				not self.all_done.triggered
+		):
+			self.all_done.succeed()
+
+	def snapshot(self):
+		"""
+		State of the delivery for a checkpoint, taken when all the events before the checkpoint time were processed
+		:return: dictionary with the couriers en route, the results, the counters, the state of the random generator of
+			the couriers arrival and the state of the strategy
+		"""
+		if self.courier_pool is not None:
+			raise ValueError('Deliveries with a courier pool can not be checkpointed')
+		random = self.__random_stream()
+		if random is None:
+			raise ValueError('Only couriers arrival distributions with getstate/setstate can be checkpointed')
+		return {
+			'couriers_en_route': list(self.couriers_en_route.values()),
+			'couriers_done': self.couriers_done,
+			'couriers_dispatched': self.couriers_dispatched,
+			'couriers_arrived': self.couriers_arrived,
+			'couriers_recalled': self.couriers_recalled,
+			'orders_picked_up': self.orders_picked_up,
+			'orders_expected': self.__orders_expected,
+			'random': random.getstate(),
+			'strategy': self.strategy.snapshot()
+		}
+
+	def __random_stream(self):
+		# A method of a random.Random or a DelaySampler
+		stream = getattr(self.__arrival_dist_fnc, '__self__', self.__arrival_dist_fnc)
+		return stream if hasattr(stream, 'getstate') and hasattr(stream, 'setstate') else None
+
+	def restore(self, state, restore_random=True):
+		"""
+		Restore the state of a checkpoint into a new delivery, before running its environment
+		:param state: dictionary from `snapshot`
+		:param restore_random: restore the state of the random generator of the couriers arrival, False to continue
+			with the current state of the generator, e.g. a different seed
+		"""
+		for courier in state['couriers_en_route']:
+			self.couriers_en_route[courier.id] = courier
+			self.__env.process(self.__resume_courier(courier))
+		self.couriers_done = state['couriers_done']
+		self.couriers_dispatched = state['couriers_dispatched']
+		self.couriers_arrived = state['couriers_arrived']
+		self.couriers_recalled = state['couriers_recalled']
+		self.orders_picked_up = state['orders_picked_up']
+		if restore_random:
+			self.__random_stream().setstate(state['random'])
+		self.strategy.restore(state['strategy'])
+		if state['orders_expected'] is not None:
+			self.expect_orders(state['orders_expected'])
+
+	def on_order_ready(self, order):
+		"""
+		Deliver an order that is ready if there is a courier available for it
+		:param order: the order ready for delivery
+		"""
+		self.strategy.on_order_ready(order)
+
+	def on_courier_arrived(self, courier):
+		"""
+		Deliver an order with the courier that arrived if there is an order available for it
+		:param courier: the courier that arrived to the kitchen
+		"""
+		self.strategy.on_courier_arrived(courier)
 
 	def run(self):
+		"""
+		Match couriers and orders only when an order is ready or a courier arrives
+		"""
+		order_ready = self.kitchen.order_ready.get()
+		courier_arrived = self.courier_arrived.get()
 		while True:
-			if (
-					self.__strategy == 'fifo' and
-					len(self.couriers_fifo) > 0 and
-					self.kitchen.has_orders_for_delivery()
-			):
-				"""
-				For 'fifo' strategy pick the first available courier and assign the first order available for delivery
-				"""
-				courier = self.couriers_fifo.pop(0)
-				order = self.kitchen.pickup_first_order_for_delivery()
-				self.pickup_order(courier, order)
-			elif (
-					self.__strategy == 'matched' and
-					len(self.couriers_matched.keys()) > 0 and
-					self.kitchen.has_orders_for_delivery()
-			):
-				"""
-				For 'matched' strategy.  For the available orders check if the assigned courier is available.
-				"""
-				delivered = False
-				for order in self.kitchen.orders_for_delivery:
-					if order['id'] in self.couriers_matched.keys():
-						self.kitchen.pickup_order_for_delivery(order)
-						self.pickup_order(self.couriers_matched[order['id']], order)
-						del self.couriers_matched[order['id']]
-						delivered = True
-				if not delivered:
-					yield self.__env.timeout(0.1)
-			else:
-				if self.end_loop:
-					break
-				yield self.__env.timeout(0.1)
+			yield order_ready | courier_arrived
+			if order_ready.triggered:
+				self.on_order_ready(order_ready.value)
+				order_ready = self.kitchen.order_ready.get()
+			if courier_arrived.triggered:
+				self.on_courier_arrived(courier_arrived.value)
+				courier_arrived = self.courier_arrived.get()
 
 	def avg_wait_time(self):
-		return sum([c['wait_time'] for c in self.couriers_done]) / len(self.couriers_done)
+		return self.couriers_done.avg_wait_time()
@@ -1,6 +1,11 @@
 import simpy
-from datetime import datetime
+from collections import OrderedDict
+from heapq import heappush, heappop, heapify
+from itertools import count
+from operator import itemgetter
 from utils import log_event
+from .results import OrderResults
+from .policies import KITCHEN_POLICIES, KITCHEN_POLICY
 
 
 class Kitchen:
@@ -8,27 +13,44 @@ class Kitchen:
 	Class used to represent a Kitchen
 
 	Attributes:
-		orders: list of pending orders orders
-		orders_processing: list of orders that are being processed
-		orders_for_delivery: list of orders ready for delivery
-		orders_delivered: list of orders already delivered
+		orders: pending orders, heap of (key, sequence, order) where key is given by the scheduling policy,
+			or dictionary of the orders waiting for a cook where key is the order ID for a preemptive kitchen
+		orders_processing: dictionary of orders that are being processed where key is the order ID
+		orders_for_delivery: ordered dictionary of orders ready for delivery where key is the order ID
+		orders_delivered: OrderResults columnar store of the orders already delivered
+		orders_received: number of orders received
+		num_cooks: number of cooks
+		busy_time: cook-seconds spent preparing orders, of the preparations already finished or preempted
+		order_ready: store signaling the orders that are ready for delivery
 		action: simulation process
-		end_loop: flag for ending the simulation loop
 	"""
-	def __init__(self, env, num_cooks):
+	def __init__(self, env, num_cooks, policy=KITCHEN_POLICY, preemptive=False, keep_results=True):
 		"""
 		Initialize Kitchen object
 		:param env: simpy simulation environment
 		:param num_cooks: number of cooks available / number of orders that can be processed in parallel
+		:param policy: scheduling policy of the cooks, one of KITCHEN_POLICIES:
+			'fifo': arrival order, 'spt': shortest prepTime first, 'earliest_courier': earliest courier arrival first,
+			'priority': smallest order priority first
+		:param preemptive: orders preempt the cook of an order in preparation with a larger key,
+			which is resumed later for its remaining prepTime
+		:param keep_results: keep a row for each delivered order in `orders_delivered`, or else only the aggregates
 		"""
 		self.__env = env
-		self.__cooks = simpy.Resource(env, num_cooks)
-		self.orders = []
-		self.orders_processing = []
-		self.orders_for_delivery = []
-		self.orders_delivered = []
+		self.__key = KITCHEN_POLICIES[policy]
+		self.__preemptive = preemptive
+		self.__sequence = count()
+		self.__cooks = simpy.PreemptiveResource(env, num_cooks) if preemptive else simpy.Resource(env, num_cooks)
+		self.__order_received = None
+		self.orders = {} if preemptive else []
+		self.orders_processing = {}
+		self.orders_for_delivery = OrderedDict()
+		self.orders_delivered = OrderResults(keep_results)
+		self.orders_received = 0
+		self.num_cooks = num_cooks
+		self.busy_time = 0.0
+		self.order_ready = simpy.Store(env)
 		self.action = env.process(self.run())
-		self.end_loop = False
 
 	def has_orders_for_delivery(self):
 		"""
@@ -37,54 +59,148 @@ class Kitchen:
 		return len(self.orders_for_delivery) > 0
 
 	def __pickup_order_for_delivery(self, order):
-		order['delivered_time'] = datetime.now()
-		order['wait_time'] = (order['delivered_time'] - order['end_time']).total_seconds()
+		order.delivered_time = self.__env.now
+		order.wait_time = order.delivered_time - order.end_time
 		self.orders_delivered.append(order)
 		return order
 
 	def pickup_order_for_delivery(self, order):
 		"""
 		:param: order to set as delivered
-		:return: order with 'delivered_time' and 'wait_time' attributes
+		:return: order with `delivered_time` and `wait_time` set
 		"""
-		self.orders_for_delivery.remove(order)
+		del self.orders_for_delivery[order.id]
 		return self.__pickup_order_for_delivery(order)
 
 	def pickup_first_order_for_delivery(self):
 		"""
 		Set the first order available for delivery as delivered
-		:return: order delivered with 'delivered_time' and 'wait_time' attributes
+		:return: order delivered with `delivered_time` and `wait_time` set
 		"""
 		assert(len(self.orders_for_delivery) > 0)
-		order = self.orders_for_delivery.pop(0)
+		_, order = self.orders_for_delivery.popitem(last=False)
 		return self.__pickup_order_for_delivery(order)
 
 	def create_order(self, order):
-		log_event('ORDER RECEIVED', order['id'], order['name'])
-		order['added_time'] = datetime.now()
-		self.orders.append(order)
+		log_event('ORDER RECEIVED', order.id, order.name)
+		order.added_time = self.__env.now
+		self.orders_received += 1
+		if self.__preemptive:
+			self.orders[order.id] = order
+			self.__env.process(self.process_order_preemptive(order))
+			return
+		heappush(self.orders, (self.__key(order), next(self.__sequence), order))
+		if self.__order_received is not None and not self.__order_received.triggered:
+			self.__order_received.succeed()
 
 	def run(self):
+		if self.__preemptive:
+			# Each order requests its cook with its key as priority
+			return
 		while True:
-			if len(self.orders) > 0:
-				cook = self.__cooks.request()
-				yield cook
-				order = self.orders.pop(0)
-				order['start_time'] = datetime.now()
-				self.__env.process(self.process_order(order, cook))
-			else:
-				if self.end_loop:
-					break
-				yield self.__env.timeout(0.1)
+			if len(self.orders) == 0:
+				# Sleep until a new order is received
+				self.__order_received = self.__env.event()
+				yield self.__order_received
+			cook = self.__cooks.request()
+			yield cook
+			_, _, order = heappop(self.orders)
+			self.__env.process(self.process_order(order, cook))
 
 	def process_order(self, order, cook):
-		self.orders_processing.append(order)
-		yield self.__env.timeout(order['prepTime'])
-		log_event('ORDER PREPARED', order['id'], order['name'])
-		order['end_time'] = datetime.now()
-		self.orders_processing.remove(order)
-		self.orders_for_delivery.append(order)
+		order.start_time = self.__env.now
+		self.orders_processing[order.id] = order
+		yield self.__env.timeout(order.prep_time)
+		self.busy_time += order.prep_time
+		self.__order_prepared(order)
+		self.__cooks.release(cook)
+
+	def __resume_order(self, order, cook):
+		# The preparation started before the checkpoint, the busy time until the checkpoint is already counted
+		remaining = order.start_time + order.prep_time - self.__env.now
+		yield self.__env.timeout(remaining)
+		self.busy_time += remaining
+		self.__order_prepared(order)
 		self.__cooks.release(cook)
 
+	def __order_prepared(self, order):
+		log_event('ORDER PREPARED', order.id, order.name)
+		order.end_time = self.__env.now
+		del self.orders_processing[order.id]
+		self.orders_for_delivery[order.id] = order
+		self.order_ready.put(order)
+
+	def process_order_preemptive(self, order):
+		remaining = order.prep_time
+		key = self.__key(order)
+		while True:
+			with self.__cooks.request(priority=key, preempt=True) as cook:
+				try:
+					yield cook
+				except simpy.Interrupt:
+					# Preempted by an order received at the same time, before starting
+					continue
+				if order.start_time is None:
+					order.start_time = self.__env.now
+					del self.orders[order.id]
+					self.orders_processing[order.id] = order
+				started = self.__env.now
+				try:
+					yield self.__env.timeout(remaining)
+					self.busy_time += remaining
+					break
+				except simpy.Interrupt:
+					self.busy_time += self.__env.now - started
+					remaining -= self.__env.now - started
+					log_event('ORDER PREEMPTED', order.id, order.name)
+		self.__order_prepared(order)
+
+	def cooks_busy(self):
+		"""
+		:return: number of cooks preparing an order
+		"""
+		return self.__cooks.count
+
+	def snapshot(self, now):
+		"""
+		State of the kitchen for a checkpoint, taken when all the events before `now` were processed and none after it
+		:param now: time of the checkpoint
+		:return: dictionary with the orders of each stage, in the order they entered it, and the counters
+		"""
+		if self.__preemptive:
+			# The remaining prepTime of the preempted orders is only known by their processes
+			raise ValueError('Preemptive kitchens can not be checkpointed')
+		return {
+			'orders': [order for _, _, order in sorted(self.orders, key=itemgetter(1))],
+			'orders_processing': list(self.orders_processing.values()),
+			'orders_for_delivery': list(self.orders_for_delivery.values()),
+			'orders_delivered': self.orders_delivered,
+			'orders_received': self.orders_received,
+			# Count the busy time until the checkpoint of the orders in preparation
+			'busy_time': self.busy_time + sum(now - order.start_time for order in self.orders_processing.values())
+		}
+
+	def restore(self, state):
+		"""
+		Restore the state of a checkpoint into a new kitchen, before running its environment.
+		The orders in preparation take a cook right away and finish at the same time they would have.
+		:param state: dictionary from `snapshot`, the pending orders are scheduled with the policy of this kitchen
+		"""
+		if self.__preemptive:
+			raise ValueError('Preemptive kitchens can not be checkpointed')
+		if len(state['orders_processing']) > self.num_cooks:
+			raise ValueError('The checkpoint has more orders in preparation than cooks in the kitchen')
+		self.orders = [(self.__key(order), seq, order) for seq, order in enumerate(state['orders'])]
+		heapify(self.orders)
+		self.__sequence = count(len(self.orders))
+		for order in state['orders_processing']:
+			self.orders_processing[order.id] = order
+			self.__env.process(self.__resume_order(order, self.__cooks.request()))
+		for order in state['orders_for_delivery']:
+			self.orders_for_delivery[order.id] = order
+		self.orders_delivered = state['orders_delivered']
+		self.orders_received = state['orders_received']
+		self.busy_time = state['busy_time']
+
 	def avg_wait_time(self):
-		return sum([o['wait_time'] for o in self.orders_delivered]) / len(self.orders_delivered)
\ No newline at end of file
+		return self.orders_delivered.avg_wait_time()
@@ -0,0 +1,49 @@
+class Order:
+	"""
+	Class used to represent an Order, timestamps are simulation times in seconds
+
+	Attributes:
+		id: order ID
+		name: name of the dish
+		prep_time: seconds needed to prepare the order
+		priority: scheduling priority for the 'priority' kitchen policy, smaller first
+		courier_eta: predicted arrival time of the courier dispatched for the order, None if unknown
+		added_time: time the order was received by the kitchen
+		start_time: time a cook started preparing the order
+		end_time: time the order was ready for delivery
+		delivered_time: time the order was picked up by a courier
+		wait_time: seconds the order waited for a courier
+	"""
+	__slots__ = (
+		'id',
+		'name',
+		'prep_time',
+		'priority',
+		'courier_eta',
+		'added_time',
+		'start_time',
+		'end_time',
+		'delivered_time',
+		'wait_time'
+	)
+
+	def __init__(self, id, name, prep_time, priority=0):
+		self.id = id
+		self.name = name
+		self.prep_time = prep_time
+		self.priority = priority
+		self.courier_eta = None
+		self.added_time = None
+		self.start_time = None
+		self.end_time = None
+		self.delivered_time = None
+		self.wait_time = None
+
+	@classmethod
+	def from_dict(cls, order):
+		"""
+		:param order: order as read from the orders file: {'id': str, 'name': str, 'prepTime': int, 'priority': int}
+			where 'priority' is optional
+		:return: Order object
+		"""
+		return cls(order['id'], order['name'], order['prepTime'], order.get('priority', 0))
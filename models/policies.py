@@ -0,0 +1,9 @@
+# Scheduling policies of the cooks: key of the orders, the order with the smallest key is prepared first,
+# orders with the same key are prepared in arrival order
+KITCHEN_POLICIES = {
+	'fifo': lambda order: 0,
+	'spt': lambda order: order.prep_time,
+	'earliest_courier': lambda order: order.courier_eta if order.courier_eta is not None else float('inf'),
+	'priority': lambda order: order.priority
+}
+KITCHEN_POLICY = 'fifo'
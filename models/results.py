@@ -0,0 +1,124 @@
+from array import array
+
+
+class OrderResults:
+	"""
+	Columnar store of the delivered orders, timestamps are kept in float arrays.  Without columns only the count and
+	the wait time total are kept, the memory does not grow with the orders.
+
+	Attributes:
+		ids: list of order IDs
+		names: list of order names
+		prep_times, added_times, start_times, end_times, delivered_times, wait_times: float arrays, empty without
+			columns
+		count: number of delivered orders
+		wait_time_total: running sum of the wait times
+	"""
+	COLUMNS = ['prep_times', 'added_times', 'start_times', 'end_times', 'delivered_times', 'wait_times']
+
+	def __init__(self, columns=True):
+		"""
+		:param columns: keep a row for each order, e.g. for the report, or else only the aggregates
+		"""
+		self.columns = columns
+		self.count = 0
+		self.ids = []
+		self.names = []
+		self.prep_times = array('d')
+		self.added_times = array('d')
+		self.start_times = array('d')
+		self.end_times = array('d')
+		self.delivered_times = array('d')
+		self.wait_times = array('d')
+		self.wait_time_total = 0.0
+
+	def __len__(self):
+		return self.count
+
+	def append(self, order):
+		"""
+		:param order: delivered Order
+		"""
+		self.count += 1
+		self.wait_time_total += order.wait_time
+		if not self.columns:
+			return
+		self.ids.append(order.id)
+		self.names.append(order.name)
+		self.prep_times.append(order.prep_time)
+		self.added_times.append(order.added_time)
+		self.start_times.append(order.start_time)
+		self.end_times.append(order.end_time)
+		self.delivered_times.append(order.delivered_time)
+		self.wait_times.append(order.wait_time)
+
+	def avg_wait_time(self):
+		"""
+		:return: average wait time, 0 if nothing was delivered
+		"""
+		return self.wait_time_total / self.count if self.count else 0.0
+
+	def to_numpy(self):
+		"""
+		:return: dictionary of numpy arrays for each of the float columns (needs numpy)
+		"""
+		import numpy
+		return {column: numpy.frombuffer(getattr(self, column), dtype=numpy.float64) for column in self.COLUMNS}
+
+
+class CourierResults:
+	"""
+	Columnar store of the couriers that picked up their order, timestamps are kept in float arrays.  Without columns
+	only the count and the wait time total are kept.
+
+	Attributes:
+		ids: list of courier IDs
+		order_ids: list of picked up order IDs
+		arrival_times, delivery_times, wait_times: float arrays, empty without columns
+		count: number of couriers
+		wait_time_total: running sum of the wait times
+	"""
+	COLUMNS = ['arrival_times', 'delivery_times', 'wait_times']
+
+	def __init__(self, columns=True):
+		"""
+		:param columns: keep a row for each courier, e.g. for the report, or else only the aggregates
+		"""
+		self.columns = columns
+		self.count = 0
+		self.ids = []
+		self.order_ids = []
+		self.arrival_times = array('d')
+		self.delivery_times = array('d')
+		self.wait_times = array('d')
+		self.wait_time_total = 0.0
+
+	def __len__(self):
+		return self.count
+
+	def append(self, courier):
+		"""
+		:param courier: Courier that picked up the order
+		"""
+		self.count += 1
+		self.wait_time_total += courier.wait_time
+		if not self.columns:
+			return
+		self.ids.append(courier.id)
+		self.order_ids.append(courier.order_id)
+		self.arrival_times.append(courier.arrival_time)
+		self.delivery_times.append(courier.delivery_time)
+		self.wait_times.append(courier.wait_time)
+
+	def avg_wait_time(self):
+		"""
+		:return: average wait time, 0 if nothing was delivered
+		"""
+		return self.wait_time_total / self.count if self.count else 0.0
+
+	def to_numpy(self):
+		"""
+		:return: dictionary of numpy arrays for each of the float columns (needs numpy)
+		"""
+		import numpy
+		return {column: numpy.frombuffer(getattr(self, column), dtype=numpy.float64) for column in self.COLUMNS}
@@ -0,0 +1,366 @@
+from collections import deque, OrderedDict
+from utils import log_event
+from defaults import BATCH_INTERVAL, COURIER_CAPACITY, PICKUP_WINDOW
+
+
+class Strategy:
+	"""
+	Base class of the dispatch strategies: decide which courier picks up which order.
+	Delivery calls the strategy when a courier is dispatched, when a courier arrives and when an order is ready.
+	"""
+	def __init__(self, env, delivery):
+		"""
+		:param env: simpy simulation environment
+		:param delivery: the Delivery using the strategy
+		"""
+		self.env = env
+		self.delivery = delivery
+
+	@classmethod
+	def options(cls, config):
+		"""
+		:param config: configuration object for simulation
+		:return: dictionary of keyword arguments of the strategy taken from the configuration
+		"""
+		return {}
+
+	def snapshot(self):
+		"""
+		:return: dictionary with the state of the strategy for a checkpoint
+		"""
+		return {}
+
+	def summary(self):
+		"""
+		:return: dictionary with the metrics of the strategy added to the results of the simulation
+		"""
+		return {}
+
+	def restore(self, state):
+		"""
+		Restore the state of a checkpoint into a new strategy, before running its environment
+		:param state: dictionary from `snapshot`
+		"""
+
+	def on_courier_dispatched(self, courier, order):
+		"""
+		:param courier: courier dispatched for an order, before it travels to the kitchen
+		:param order: the order the courier was dispatched for
+		"""
+
+	def on_courier_arrived(self, courier):
+		"""
+		:param courier: the courier that arrived to the kitchen
+		"""
+		raise NotImplementedError
+
+	def on_order_ready(self, order):
+		"""
+		:param order: the order ready for delivery
+		"""
+		raise NotImplementedError
+
+
+class FifoStrategy(Strategy):
+	"""
+	The first courier that arrives picks up the first order that is ready
+
+	Attributes:
+		couriers: queue of arrived couriers
+	"""
+	def __init__(self, env, delivery):
+		super().__init__(env, delivery)
+		self.couriers = deque()
+
+	def __match(self):
+		kitchen = self.delivery.kitchen
+		while len(self.couriers) > 0 and kitchen.has_orders_for_delivery():
+			courier = self.couriers.popleft()
+			order = kitchen.pickup_first_order_for_delivery()
+			self.delivery.pickup_order(courier, order)
+
+	def snapshot(self):
+		return {'couriers': list(self.couriers)}
+
+	def restore(self, state):
+		self.couriers.extend(state['couriers'])
+
+	def on_courier_arrived(self, courier):
+		self.couriers.append(courier)
+		self.__match()
+
+	def on_order_ready(self, order):
+		self.__match()
+
+
+class MatchedStrategy(Strategy):
+	"""
+	Each courier is assigned to the order it was dispatched for
+
+	Attributes:
+		couriers: dictionary of arrived couriers waiting for their order where key is the order ID
+	"""
+	def __init__(self, env, delivery):
+		super().__init__(env, delivery)
+		self.couriers = {}
+
+	def _pickup(self, courier, order):
+		self.delivery.kitchen.pickup_order_for_delivery(order)
+		self.delivery.pickup_order(courier, order)
+
+	def snapshot(self):
+		return {'couriers': dict(self.couriers)}
+
+	def restore(self, state):
+		self.couriers.update(state['couriers'])
+
+	def on_courier_dispatched(self, courier, order):
+		courier.order_id = order.id
+
+	def on_courier_arrived(self, courier):
+		order = self.delivery.kitchen.orders_for_delivery.get(courier.order_id)
+		if order is None:
+			self.couriers[courier.order_id] = courier
+		else:
+			self._pickup(courier, order)
+
+	def on_order_ready(self, order):
+		courier = self.couriers.pop(order.id, None)
+		if courier is not None:
+			self._pickup(courier, order)
+
+
+class BatchedStrategy(MatchedStrategy):
+	"""
+	Every `interval` seconds assign the pending orders to the unassigned couriers (en route or arrived) solving the
+	assignment problem that minimizes the sum of order and courier wait times, |predicted ready - predicted arrival|.
+	Once assigned, a courier picks up its order as in the 'matched' strategy.
+	Needs numpy.
+
+	Attributes:
+		orders: dictionary of the orders without courier where key is the order ID
+		unassigned: dictionary of the couriers without order where key is the courier ID
+		interval: seconds between assignments
+		next_assignment: time of the next assignment, None while waiting for orders and couriers
+	"""
+	def __init__(self, env, delivery, interval=BATCH_INTERVAL):
+		super().__init__(env, delivery)
+		import numpy
+		from utils.assignment import linear_sum_assignment
+		self.__numpy = numpy
+		self.__linear_sum_assignment = linear_sum_assignment
+		self.orders = {}
+		self.unassigned = {}
+		self.interval = interval
+		self.next_assignment = None
+		self.__pending = None
+		env.process(self.run())
+
+	@classmethod
+	def options(cls, config):
+		return {'interval': config.get('batch_interval', BATCH_INTERVAL)}
+
+	def snapshot(self):
+		state = super().snapshot()
+		state.update({
+			'orders': dict(self.orders),
+			'unassigned': dict(self.unassigned),
+			'next_assignment': self.next_assignment
+		})
+		return state
+
+	def restore(self, state):
+		super().restore(state)
+		self.orders.update(state['orders'])
+		self.unassigned.update(state['unassigned'])
+		self.next_assignment = state['next_assignment']
+
+	def on_courier_dispatched(self, courier, order):
+		self.orders[order.id] = order
+		self.unassigned[courier.id] = courier
+		if self.__pending is not None and not self.__pending.triggered:
+			self.__pending.succeed()
+
+	def on_courier_arrived(self, courier):
+		if courier.order_id is not None:
+			super().on_courier_arrived(courier)
+
+	@staticmethod
+	def predicted_ready_time(order, now):
+		"""
+		:return: time the order is ready, the queue time of the orders not started yet is not known
+		"""
+		if order.end_time is not None:
+			return order.end_time
+		if order.start_time is not None:
+			return order.start_time + order.prep_time
+		return now + order.prep_time
+
+	@staticmethod
+	def predicted_arrival_time(courier):
+		"""
+		:return: time the courier arrives to the kitchen
+		"""
+		if courier.arrival_time is not None:
+			return courier.arrival_time
+		return courier.dispatch_time + courier.arrival_delay
+
+	def assign(self):
+		"""
+		Assign the pending orders to the unassigned couriers
+		"""
+		numpy = self.__numpy
+		now = self.env.now
+		orders = list(self.orders.values())
+		couriers = list(self.unassigned.values())
+		ready = numpy.fromiter((self.predicted_ready_time(o, now) for o in orders), numpy.float64, len(orders))
+		arrival = numpy.fromiter((self.predicted_arrival_time(c) for c in couriers), numpy.float64, len(couriers))
+		rows, cols = self.__linear_sum_assignment(numpy.abs(ready[:, None] - arrival[None, :]))
+		for row, col in zip(rows, cols):
+			order = orders[row]
+			courier = couriers[col]
+			del self.orders[order.id]
+			del self.unassigned[courier.id]
+			courier.order_id = order.id
+			log_event('COURIER ASSIGNED', courier.id, 'ORDER ASSIGNED', order.id)
+			if courier.arrival_time is not None:
+				super().on_courier_arrived(courier)
+
+	def run(self):
+		while True:
+			if self.next_assignment is None:
+				if len(self.orders) == 0 or len(self.unassigned) == 0:
+					# Sleep until a new courier is dispatched
+					self.__pending = self.env.event()
+					yield self.__pending
+				self.next_assignment = self.env.now + self.interval
+			yield self.env.timeout(self.next_assignment - self.env.now)
+			self.next_assignment = None
+			self.assign()
+
+
+class MultiOrderStrategy(MatchedStrategy):
+	"""
+	A courier picks up its order and then up to `capacity` orders of the same kitchen in one trip: the ready orders
+	whose couriers did not arrive yet, oldest first, and the ones ready in the next `window` seconds.  The couriers of
+	the orders taken by another courier are recalled when they arrive.
+
+	Attributes:
+		capacity: max orders of a trip
+		window: max seconds a courier waits for more orders after picking up its own
+		batches: ordered dictionary of the couriers waiting for more orders, in the order they started waiting, where
+			key is the courier ID and value (courier, orders, deadline)
+		taken: set of the IDs of the orders taken by a courier other than their own
+		trips: number of couriers that left the kitchen
+		hold_time: seconds the orders of the trips waited in the courier for the trip to leave
+	"""
+	def __init__(self, env, delivery, capacity=COURIER_CAPACITY, window=PICKUP_WINDOW):
+		super().__init__(env, delivery)
+		self.capacity = capacity
+		self.window = window
+		self.batches = OrderedDict()
+		self.taken = set()
+		self.trips = 0
+		self.hold_time = 0.0
+
+	@classmethod
+	def options(cls, config):
+		return {
+			'capacity': config.get('courier_capacity', COURIER_CAPACITY),
+			'window': config.get('pickup_window', PICKUP_WINDOW)
+		}
+
+	def snapshot(self):
+		state = super().snapshot()
+		state.update({
+			'batches': list(self.batches.values()),
+			'taken': set(self.taken),
+			'trips': self.trips,
+			'hold_time': self.hold_time
+		})
+		return state
+
+	def restore(self, state):
+		super().restore(state)
+		for courier, orders, deadline in state['batches']:
+			self.batches[courier.id] = (courier, orders, deadline)
+			self.env.process(self.__close(courier.id, deadline))
+		self.taken.update(state['taken'])
+		self.trips = state['trips']
+		self.hold_time = state['hold_time']
+
+	def summary(self):
+		orders = self.delivery.orders_picked_up
+		return {
+			'trips': self.trips,
+			'orders_per_trip': orders / self.trips if self.trips else 0.0,
+			'couriers_recalled': self.delivery.couriers_recalled,
+			'avg_hold_time': self.hold_time / orders if orders else 0.0
+		}
+
+	def on_courier_arrived(self, courier):
+		if courier.order_id in self.taken:
+			self.taken.remove(courier.order_id)
+			self.delivery.recall_courier(courier)
+		else:
+			super().on_courier_arrived(courier)
+
+	def on_order_ready(self, order):
+		kitchen = self.delivery.kitchen
+		if order.id not in kitchen.orders_for_delivery:
+			# Taken by a courier before it was notified
+			return
+		if order.id in self.couriers or len(self.batches) == 0:
+			super().on_order_ready(order)
+			return
+		courier_id = next(iter(self.batches))
+		courier, orders, _ = self.batches[courier_id]
+		self.__take(courier, orders, order)
+		if len(orders) >= self.capacity:
+			del self.batches[courier_id]
+			self.__leave(courier, orders)
+
+	def _pickup(self, courier, order):
+		self.delivery.kitchen.pickup_order_for_delivery(order)
+		orders = [order]
+		# Ready orders of the kitchen in ready order, except the ones whose courier is waiting to be notified
+		extra = []
+		for ready in self.delivery.kitchen.orders_for_delivery.values():
+			if len(orders) + len(extra) >= self.capacity:
+				break
+			if ready.id not in self.couriers:
+				extra.append(ready)
+		for ready in extra:
+			self.__take(courier, orders, ready)
+		if len(orders) >= self.capacity or self.window <= 0:
+			self.__leave(courier, orders)
+		else:
+			deadline = self.env.now + self.window
+			self.batches[courier.id] = (courier, orders, deadline)
+			self.env.process(self.__close(courier.id, deadline))
+
+	def __take(self, courier, orders, order):
+		self.delivery.kitchen.pickup_order_for_delivery(order)
+		self.taken.add(order.id)
+		orders.append(order)
+		log_event('ORDER BATCHED', order.id, order.name, 'COURIER:', courier.id)
+
+	def __close(self, courier_id, deadline):
+		yield self.env.timeout(deadline - self.env.now)
+		batch = self.batches.pop(courier_id, None)
+		if batch is not None:
+			self.__leave(batch[0], batch[1])
+
+	def __leave(self, courier, orders):
+		now = self.env.now
+		self.trips += 1
+		self.hold_time += sum(now - order.delivered_time for order in orders)
+		self.delivery.pickup_orders(courier, orders)
+
+
+STRATEGIES = {
+	'fifo': FifoStrategy,
+	'matched': MatchedStrategy,
+	'batched': BatchedStrategy,
+	'multi': MultiOrderStrategy
+}
@@ -0,0 +1,100 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation import run_simulation
+from sweep import seeded_configs
+from utils import log_close, read_orders
+from utils.stats import RunningStats, P2Quantile, confidence_interval
+
+
+REPLICATION_METRICS = ['order_wait_time', 'courier_wait_time']
+REPLICATION_QUANTILES = [0.5, 0.95, 0.99]
+
+
+class WaitTimeStats:
+	"""
+	Aggregated statistics of a wait time metric over replications, with constant memory
+
+	Attributes:
+		samples: running stats of every wait time of every replication
+		replication_means: running stats of the mean wait time of each replication, used for the confidence interval
+		quantiles: dictionary where key is the quantile and value the P2Quantile estimator over every wait time
+	"""
+	def __init__(self):
+		self.samples = RunningStats()
+		self.replication_means = RunningStats()
+		self.quantiles = {p: P2Quantile(p) for p in REPLICATION_QUANTILES}
+
+	def add_replication(self, wait_times):
+		"""
+		:param wait_times: iterable of wait times of one replication
+		"""
+		replication = RunningStats()
+		for wait_time in wait_times:
+			replication.add(wait_time)
+			for quantile in self.quantiles.values():
+				quantile.add(wait_time)
+		self.samples.merge(replication)
+		self.replication_means.add(replication.mean)
+
+	def summary(self, confidence=0.95):
+		"""
+		:param confidence: confidence level for the interval of the mean
+		:return: dictionary with 'mean', 'ci_low', 'ci_high' and 'p50', 'p95', 'p99'
+		"""
+		low, high = confidence_interval(self.replication_means, confidence)
+		summary = {'mean': self.replication_means.mean, 'ci_low': low, 'ci_high': high}
+		for p, quantile in self.quantiles.items():
+			summary['p{0:g}'.format(p * 100)] = quantile.value()
+		return summary
+
+
+def replication_configs(base_config, replications, strategies, seed=0):
+	"""
+	Build the configurations of the replications, each replication gets its own seed shared by all the strategies
+	:param base_config: configuration object for simulation
+	:param replications: number of replications for each strategy
+	:param strategies: list of strategies
+	:param seed: seed of the first replication
+	:return: list of configuration objects
+	"""
+	configs = []
+	for idx in range(replications):
+		configs.extend(seeded_configs(base_config, {}, strategies, seed + idx))
+	return configs
+
+
+def run_replication(filename, config):
+	"""
+	Run one replication
+	:param filename: orders file
+	:param config: configuration object for simulation
+	:return: dictionary with the strategy, seed and the wait times arrays of the replication
+	"""
+	env, kitchen, delivery = run_simulation(read_orders(filename), dict(config, keep_results=True))
+	log_close()
+	return {
+		'strategy': config['strategy'],
+		'seed': config['seed'],
+		'order_wait_time': kitchen.orders_delivered.wait_times,
+		'courier_wait_time': delivery.couriers_done.wait_times
+	}
+
+
+def run_replications(filename, configs, workers=None):
+	"""
+	Run the replications in parallel and stream the aggregated statistics as they complete
+	:param filename: orders file, streamed by each replication
+	:param configs: list of configuration objects
+	:param workers: number of worker processes, defaults to the number of CPUs
+	:return: generator of (result, stats) for each completed replication, where stats is a dictionary
+		where key is the strategy and value a dictionary of WaitTimeStats for each of REPLICATION_METRICS
+	"""
+	stats = {}
+	for config in configs:
+		stats.setdefault(config['strategy'], {metric: WaitTimeStats() for metric in REPLICATION_METRICS})
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		futures = [executor.submit(run_replication, filename, config) for config in configs]
+		for future in as_completed(futures):
+			result = future.result()
+			for metric in REPLICATION_METRICS:
+				stats[result['strategy']][metric].add_replication(result.pop(metric))
+			yield result, stats
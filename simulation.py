@@ -1,125 +1,497 @@
+import sys
 import simpy
-from utils import log_init, log_obj, log_close
-from models import Kitchen, Delivery
+from time import monotonic
+from copy import deepcopy
+from itertools import islice
+from math import ceil
+from utils import log_init, log_obj, log_stdout, log_flush, log_close, log_filename
+from utils.ingest import trace_time
+from utils.intake import LiveIntake
+from utils.metrics import LiveMetrics
+from utils.profiler import StepProfiler
+from utils.checkpoint import save_checkpoint
+from utils.cache import ResultCache, cache_key, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES
+from utils.distributions import courier_arrival_distribution
+from utils.report import ORDER_COLUMNS, COURIER_COLUMNS, report_rows, render_text, write_report
+from models import Kitchen, Delivery, Order, STRATEGIES
+from models.kitchen import KITCHEN_POLICY
+from defaults import SIMULATION_MODE, SIMULATION_FACTOR
+from utils.log import LOG_SINKS
 
 
-def process_orders(env, orders, kitchen, orders_per_second, delivery):
+# Metrics of every simulation, the strategies add their own, see `simulation_metrics`
+SIMULATION_METRICS = ['orders', 'simulation_time', 'avg_order_wait_time', 'avg_courier_wait_time']
+
+
+def process_orders(env, orders, kitchen, orders_per_second, delivery, count=0, delay=0):
 	"""
 	Process `orders_per_second` orders per second
 	:param env: simpy simulation environment
-	:param orders: list of orders
+	:param orders: iterable of order dictionaries, consumed as they are processed
 	:param kitchen: Kitchen object
 	:param orders_per_second: number of order to process per second
 	:param delivery: Deliver object
+	:param count: number of orders already processed, when resuming from a checkpoint
+	:param delay: seconds until the next second of orders, when resuming from a checkpoint
 
-	After processing all orders wait for them to be finished and stop loops
+	After processing all orders let the Delivery know how many orders it has to wait for
 	"""
-	for idx, order in enumerate(orders, 1):
-		kitchen.create_order(order)
+	if delay:
+		yield env.timeout(delay)
+	for count, order in enumerate(orders, count + 1):
+		order = Order.from_dict(order)
+		# The courier is dispatched first so the kitchen knows its arrival time when scheduling the order
 		delivery.dispatch_new_courier(order)
-		if idx % orders_per_second == 0:
+		kitchen.create_order(order)
+		if count % orders_per_second == 0:
 			yield env.timeout(1)
-	env.process(wait_orders(env, kitchen, delivery))
+	delivery.expect_orders(count)
 
 
-def wait_orders(env, kitchen, delivery):
+def replay_orders(env, orders, kitchen, delivery, compression=1, count=0):
 	"""
-	Wait for all the orders to be processed	and stop Kitchen and Delivery loops
+	Process each order at its 'arrivalTime', relative to the first order of the trace
 	:param env: simpy simulation environment
+	:param orders: iterable of order dictionaries sorted by 'arrivalTime', e.g. a generator from `read_traces`
 	:param kitchen: Kitchen object
-	:param delivery: Delivery object
+	:param delivery: Deliver object
+	:param compression: the time between arrivals is divided by it, e.g. 2 replays a peak hour in 30 minutes.
+		The couriers take the delay observed in the trace, 'courierArrivalTime' - 'arrivalTime', not compressed
+	:param count: number of orders already processed, when resuming from a checkpoint
+
+	After processing all orders let the Delivery know how many orders it has to wait for
+	"""
+	start = None
+	last = None
+	for idx, order in enumerate(orders):
+		arrival_time = trace_time(order['arrivalTime'])
+		if start is None:
+			start = arrival_time
+		if last is not None and arrival_time < last:
+			raise ValueError('Orders are not sorted by arrivalTime: {0}'.format(order['id']))
+		last = arrival_time
+		if idx < count:
+			continue
+		delay = (arrival_time - start) / compression - env.now
+		if delay > 0:
+			yield env.timeout(delay)
+		courier_delay = None
+		if order.get('courierArrivalTime') is not None:
+			courier_delay = max(0, trace_time(order['courierArrivalTime']) - arrival_time)
+		order = Order.from_dict(order)
+		delivery.dispatch_new_courier(order, courier_delay)
+		kitchen.create_order(order)
+		count = idx + 1
+	delivery.expect_orders(count)
+
+
+def realtime_now(env):
+	"""
+	:param env: simpy RealtimeEnvironment
+	:return: simulated time of the wall clock, ahead of `env.now` while the simulation waits for its next event
 	"""
-	while (
-			len(kitchen.orders) > 0 or
-			len(kitchen.orders_processing) > 0 or
-			len(kitchen.orders_for_delivery) > 0
-	):
-		yield env.timeout(0.1)
-	kitchen.end_loop = True
-	delivery.end_loop = True
+	return env.env_start + (monotonic() - env.real_start) / env.factor
 
 
-def simulate_orders(orders, config):
+def receive_orders(env, intake, kitchen, delivery):
 	"""
-	Simulate the fulfillment of delivery orders for a kitchen.
-	:param orders: list of order for proccesing
+	Process the orders of a live feed at the simulated time they are received: between two events of the simulation
+	the process waits on the intake until the wall clock time of the next event, so an order is processed as soon as it
+	is received and an idle simulation sleeps instead of polling
+	:param env: simpy RealtimeEnvironment
+	:param intake: LiveIntake receiving the orders, closed at the end of the feed
+	:param kitchen: Kitchen object
+	:param delivery: Deliver object
+
+	After the end of the feed let the Delivery know how many orders it has to wait for
+	"""
+	count = 0
+	try:
+		while True:
+			next_time = env.peek()
+			timeout = None
+			if next_time != float('inf'):
+				timeout = max(next_time - realtime_now(env), 0) * env.factor
+			orders, ended = intake.poll(timeout)
+			# Simulated time the orders were received at, the events due before are processed first
+			yield env.timeout(min(max(realtime_now(env), env.now), next_time) - env.now)
+			for order in orders:
+				order = Order.from_dict(order)
+				delivery.dispatch_new_courier(order)
+				kitchen.create_order(order)
+			count += len(orders)
+			if ended:
+				break
+	finally:
+		intake.close()
+	delivery.expect_orders(count)
+
+
+def create_environment(config, initial_time=0):
+	"""
+	Create the simpy environment for the simulation mode
 	:param config: configuration object for simulation
-			attributes:
-				'orders_per_second': int
-				'cooks_in_kitchen': int
-				'strategy': 'fifo' | 'matched'
-				'courier_arrival_time_min': int
-				'courier_arrival_time_max': int
-				'courier_arrival_dist_fnc': function for generating the time couriers take to arrive
-				'print_info': bool: print orders and couriers details of the simulation
+	:param initial_time: simulation time to start at, e.g. the time of a checkpoint
+	:return: RealtimeEnvironment for 'realtime' mode, Environment running as fast as possible for 'virtual' mode
 	"""
-	log_init(config)
-	env = simpy.rt.RealtimeEnvironment(initial_time=0, factor=1, strict=True)
-	kitchen = Kitchen(env, config['cooks_in_kitchen'])
+	mode = config.get('mode', SIMULATION_MODE)
+	if mode == 'realtime':
+		return simpy.rt.RealtimeEnvironment(
+			initial_time=initial_time,
+			factor=config.get('factor', SIMULATION_FACTOR),
+			strict=True
+		)
+	elif mode == 'virtual':
+		return simpy.Environment(initial_time=initial_time)
+	raise ValueError('Unknown simulation mode: {0}'.format(mode))
+
+
+def keep_simulation_results(config):
+	"""
+	:param config: configuration object for simulation
+	:return: True to keep a row for each delivered order and courier: for the tables printed with 'print_info' or
+		written in a 'report_format', or with 'keep_results'.  Otherwise only their count and wait time totals are
+		kept and the memory of a simulation does not grow with its orders.
+	"""
+	sinks = config.get('log_sinks', LOG_SINKS)
+	if config.get('keep_results'):
+		return True
+	if config.get('print_info') and 'stdout' in sinks:
+		return True
+	return config.get('report_format', 'text') != 'text' and 'file' in sinks
+
+
+def setup_simulation(orders, config, checkpoint=None):
+	"""
+	Create the environment, kitchen and delivery of a simulation and start its processes, the events log is opened
+	:param orders: iterable of orders for proccesing, e.g. a generator from `read_orders`
+	:param config: configuration object for simulation, see `simulate_orders`
+	:param checkpoint: state of a simulation to resume from, see `simulation_checkpoint`, the orders already read
+		are skipped
+	:return: (env, kitchen, delivery) ready to run until `delivery.all_done`
+	"""
+	if config.get('live_intake') and (config.get('mode', SIMULATION_MODE) != 'realtime' or checkpoint is not None):
+		raise ValueError("A live intake needs the 'realtime' mode and can not be resumed from a checkpoint")
+	env = create_environment(config, checkpoint['time'] if checkpoint else 0)
+	log_init(config, env)
+	arrival_dist_fnc = courier_arrival_distribution(config, config.get('seed'))
+	keep_results = keep_simulation_results(config)
+	kitchen = Kitchen(
+		env,
+		config['cooks_in_kitchen'],
+		config.get('kitchen_policy', KITCHEN_POLICY),
+		config.get('kitchen_preemptive', False),
+		keep_results
+	)
 	delivery = Delivery(
 		env,
 		kitchen,
 		config['strategy'],
 		config['courier_arrival_time_min'],
 		config['courier_arrival_time_max'],
-		config['courier_arrival_dist_fnc']
+		arrival_dist_fnc,
+		strategy_options=STRATEGIES[config['strategy']].options(config),
+		keep_results=keep_results
 	)
-	env.process(process_orders(env, orders, kitchen, config['orders_per_second'], delivery))
-	env.run()
-	if config['print_info']:
-		print_simulation_info(kitchen, delivery, config)
-	print_simulation_result(kitchen, delivery)
-	log_obj({
+	if config.get('metrics_interval'):
+		metrics = LiveMetrics(
+			env,
+			kitchen,
+			delivery,
+			config['metrics_interval'],
+			log_filename('.metrics.csv'),
+			config.get('metrics_port'),
+			{'strategy': config['strategy']}
+		)
+		if metrics.port is not None:
+			log_stdout('METRICS', 'http://127.0.0.1:{0}/metrics'.format(metrics.port))
+	if checkpoint is None:
+		if config.get('live_intake'):
+			intake = LiveIntake(config['live_intake'])
+			# Printed at every log level, the clients need the address, e.g. the port chosen for port 0
+			sys.stderr.write('INTAKE {0}\n'.format(intake.address))
+			env.process(receive_orders(env, intake, kitchen, delivery))
+		elif config.get('trace'):
+			env.process(replay_orders(env, orders, kitchen, delivery, config.get('trace_compression', 1)))
+		else:
+			env.process(process_orders(env, orders, kitchen, config['orders_per_second'], delivery))
+	else:
+		restore_simulation(env, orders, kitchen, delivery, config, checkpoint)
+	return env, kitchen, delivery
+
+
+def simulation_checkpoint(time, kitchen, delivery, config):
+	"""
+	State of a simulation, taken when all the events before `time` were processed and none after it
+	:param time: simulation time of the checkpoint
+	:param kitchen: Kitchen of the simulation
+	:param delivery: Delivery of the simulation
+	:param config: configuration object for simulation
+	:return: dictionary with the time, the configuration, the number of orders read and the kitchen and delivery state
+	"""
+	config = dict(config)
+	config.pop('courier_arrival_dist_fnc', None)
+	return {
+		'time': time,
+		'config': config,
+		'orders_read': kitchen.orders_received,
+		'kitchen': kitchen.snapshot(time),
+		'delivery': delivery.snapshot()
+	}
+
+
+def restore_simulation(env, orders, kitchen, delivery, config, checkpoint):
+	"""
+	Restore the state of a checkpoint into a new simulation and start the processes to continue it
+	:param env: simpy simulation environment starting at the time of the checkpoint
+	:param orders: iterable of all the orders of the simulation, the ones read before the checkpoint are skipped
+	:param kitchen: new Kitchen
+	:param delivery: new Delivery
+	:param config: configuration object for simulation, a seed different from the checkpoint one forks a new random
+		stream for the couriers arrival
+	:param checkpoint: dictionary from `simulation_checkpoint`, not modified: it can be resumed many times
+	"""
+	checkpoint = deepcopy(checkpoint)
+	kitchen.restore(checkpoint['kitchen'])
+	delivery.restore(checkpoint['delivery'], config.get('seed') == checkpoint['config'].get('seed'))
+	if checkpoint['delivery']['orders_expected'] is None and config.get('trace'):
+		env.process(replay_orders(
+			env,
+			orders,
+			kitchen,
+			delivery,
+			config.get('trace_compression', 1),
+			checkpoint['orders_read']
+		))
+	elif checkpoint['delivery']['orders_expected'] is None:
+		# Orders are received every second, the next ones at the first second after the checkpoint
+		env.process(process_orders(
+			env,
+			islice(orders, checkpoint['orders_read'], None),
+			kitchen,
+			config['orders_per_second'],
+			delivery,
+			checkpoint['orders_read'],
+			ceil(checkpoint['time']) - checkpoint['time']
+		))
+
+
+def run_simulation(orders, config):
+	"""
+	Run the simulation until all the orders are delivered, the events log is left open
+	:param orders: iterable of orders for proccesing, e.g. a generator from `read_orders`
+	:param config: configuration object for simulation, see `simulate_orders`
+	:return: (env, kitchen, delivery) at the end of the simulation
+	"""
+	env, kitchen, delivery = setup_simulation(orders, config)
+	env.run(until=delivery.all_done)
+	return env, kitchen, delivery
+
+
+def run_until_done(env, kitchen, delivery, config):
+	"""
+	Run the simulation until all the orders are delivered, writing a checkpoint to 'checkpoint_file' every
+	'checkpoint_interval' simulated seconds if set, or only until the first checkpoint with 'checkpoint_stop'
+	:param env: simpy simulation environment
+	:param kitchen: Kitchen of the simulation
+	:param delivery: Delivery of the simulation
+	:param config: configuration object for simulation
+	"""
+	interval = config.get('checkpoint_interval')
+	if not interval:
+		env.run(until=delivery.all_done)
+		return
+	checkpoint_time = (env.now // interval + 1) * interval
+	all_done = delivery.all_done
+	while not all_done.processed:
+		next_time = env.peek()
+		if checkpoint_time <= next_time < float('inf'):
+			save_checkpoint(config['checkpoint_file'], simulation_checkpoint(checkpoint_time, kitchen, delivery, config))
+			if config.get('checkpoint_stop'):
+				return
+			checkpoint_time = (next_time // interval + 1) * interval
+		env.step()
+
+
+def simulation_metrics(env, kitchen, delivery):
+	"""
+	:return: metrics of a finished simulation, with the metrics of the strategy, e.g. the trips of 'multi'
+	"""
+	metrics = {
+		'orders': len(kitchen.orders_delivered),
+		'simulation_time': env.now,
 		'avg_order_wait_time': kitchen.avg_wait_time(),
 		'avg_courier_wait_time': delivery.avg_wait_time()
-	})
+	}
+	metrics.update(delivery.strategy.summary())
+	return metrics
+
+
+def result_cache(config, checkpoint=None):
+	"""
+	:param config: configuration object for simulation
+	:param checkpoint: state of a simulation to resume from
+	:return: (ResultCache, key) of the metrics of the simulation, (None, None) if they are not cached: without
+		'cache_dir', not reproducible (see `utils.cache.cache_key`), resumed or checkpointed, or with outputs of the
+		orders and couriers of the simulation (tables, reports, live metrics or profile)
+	"""
+	if not config.get('cache_dir') or checkpoint is not None or config.get('checkpoint_interval'):
+		return None, None
+	if config.get('print_info') or config.get('report_format', 'text') != 'text':
+		return None, None
+	if config.get('metrics_interval') or config.get('profile'):
+		return None, None
+	key = cache_key(config)
+	if key is None:
+		return None, None
+	cache = ResultCache(
+		config['cache_dir'],
+		config.get('cache_max_entries', CACHE_MAX_ENTRIES),
+		config.get('cache_max_bytes', CACHE_MAX_BYTES)
+	)
+	return cache, key
+
+
+def simulate_orders(orders, config, checkpoint=None):
+	"""
+	Simulate the fulfillment of delivery orders for a kitchen.
+	:param orders: iterable of orders for proccesing, e.g. a generator from `read_orders`
+	:param config: configuration object for simulation
+			attributes:
+				'orders_per_second': int
+				'trace': bool: receive the orders at their 'arrivalTime' instead of 'orders_per_second', with the
+					courier delays of their 'courierArrivalTime' if present, see `replay_orders`
+				'trace_compression': float: the time between the arrivals of a trace is divided by it
+				'live_intake': address to receive the orders from a live feed instead of `orders` in 'realtime' mode,
+					'PORT', 'HOST:PORT' or 'unix:PATH', see utils.intake and `receive_orders`, None to disable it
+				'cooks_in_kitchen': int
+				'strategy': 'fifo' | 'matched' | 'batched', see models.strategy
+				'batch_interval': float: seconds between assignments of the 'batched' strategy
+				'courier_capacity': int: max orders of a courier trip of the 'multi' strategy
+				'pickup_window': float: max seconds a courier of the 'multi' strategy waits for more orders
+				'kitchen_policy': 'fifo' | 'spt' | 'earliest_courier' | 'priority': scheduling of the cooks, see models.kitchen
+				'kitchen_preemptive': bool: orders preempt the cooks of orders with a larger key
+				'courier_arrival_time_min': int
+				'courier_arrival_time_max': int
+				'courier_arrival_dist_fnc': function for generating the time couriers take to arrive,
+					None for 'courier_arrival_dist'
+				'courier_arrival_dist': 'uniform' | 'lognormal:mu,sigma' | 'empirical:filename': distribution of the
+					couriers arrival pre-sampled with numpy from a stream seeded with 'seed', see utils.distributions,
+					None for `uniform` of a random.Random seeded with 'seed'
+				'print_info': bool: print orders and couriers details of the simulation
+				'keep_results': bool: keep the rows of the delivered orders and couriers even if they are not
+					reported, see `keep_simulation_results`
+				'report_sort': 'pickup' | 'wait': order of the rows of the orders and couriers tables, see utils.report
+				'report_offset': int: number of rows of the tables to skip
+				'report_limit': int: number of rows of the tables, None for all, e.g. the top N with 'wait'
+				'report_format': 'text' | 'csv' | 'json': 'csv' and 'json' also write the tables next to the events log
+				'mode': 'realtime' | 'virtual': run paced by the wall clock or as fast as possible
+				'factor': float: real seconds per simulated second for 'realtime' mode
+				'seed': int: seed for the random generator of the simulation
+				'log_sinks': list of outputs for events and results: 'stdout', 'file' or 'none'
+				'log_level': verbosity of the events log, see utils.log
+				'metrics_interval': float: simulated seconds between samples of the live metrics, None to disable them,
+					the time series is written to a CSV file next to the events log, see utils.metrics
+				'metrics_port': int: port of the local Prometheus endpoint of the live metrics, None to disable it
+				'profile': bool: profile the processes of the simulation, see utils.profiler, the report is printed
+					and written in cProfile (.prof) and folded stacks (.folded) formats next to the events log
+				'checkpoint_interval': float: simulated seconds between checkpoints, None to disable them
+				'checkpoint_file': file overwritten with the last checkpoint, see utils.checkpoint
+				'checkpoint_stop': bool: stop the simulation after the first checkpoint, e.g. a warm-up to fork from
+				'orders_digest': hash of the content of the orders, see utils.cache.files_digest, None if unknown
+				'cache_dir': directory of the cache of the metrics of seeded simulations, see `result_cache`, None to
+					disable it.  Cached metrics are returned without simulating, no events are logged.
+				'cache_bypass': bool: simulate even if the metrics are cached, and refresh them
+				'cache_max_entries': int: max number of cached metrics, the least recently used are evicted
+				'cache_max_bytes': int: max size of the cache
+	:param checkpoint: state of a simulation to resume from, see `simulation_checkpoint`, None to start from the
+		beginning.  The orders must be the same ones of the checkpointed simulation.
+	:return: metrics of the simulation
+	"""
+	cache, key = result_cache(config, checkpoint)
+	if cache is not None and not config.get('cache_bypass'):
+		metrics = cache.get(key)
+		if metrics is not None:
+			if 'stdout' in config.get('log_sinks', LOG_SINKS):
+				print_metrics(metrics, 'RESULTS (CACHED)')
+			return metrics
+	env, kitchen, delivery = setup_simulation(orders, config, checkpoint)
+	profiler = StepProfiler(env) if config.get('profile') else None
+	try:
+		run_until_done(env, kitchen, delivery, config)
+	finally:
+		# Also when a strict realtime simulation falls behind, to find the slow processes
+		if profiler is not None:
+			report_profile(profiler, config)
+	if delivery.metrics is not None:
+		delivery.metrics.close()
+	log_flush()
+	if 'stdout' in config.get('log_sinks', LOG_SINKS):
+		if config['print_info']:
+			print_simulation_info(kitchen, delivery, config)
+		print_simulation_result(kitchen, delivery)
+	if config.get('report_format', 'text') != 'text' and log_filename(''):
+		write_simulation_report(kitchen, delivery, config)
+	metrics = simulation_metrics(env, kitchen, delivery)
+	log_obj(metrics)
 	log_close()
+	if cache is not None:
+		cache.put(key, metrics)
+	return metrics
 
 
-def print_orders(orders, title):
-	print('-' * 120)
-	print('- ' + title)
-	print('{0:>37}{1:>25}{2:>5}{3:>10}{4:>10}{5:>10}{6:>10}{7:>10}'.format(
-		'ID',
-		'Name',
-		'Time',
-		'Added',
-		'Started',
-		'Finished',
-		'Delivered',
-		'Wait'
-	))
-	for order in orders:
-		print('{0:>37}{1:>25}{2:>5}{3:>10}{4:>10}{5:>10}{6:>10}{7:>10.4f}s'.format(
-			order.get('id', 'N/A'),
-			order.get('name', 'N/A'),
-			str(order.get('prepTime', 'N/A')) + 's',
-			order.get('added_time', 0).strftime('%H:%M:%S'),
-			order.get('start_time', 0).strftime('%H:%M:%S'),
-			order.get('end_time', 0).strftime('%H:%M:%S'),
-			order.get('delivered_time', 0).strftime('%H:%M:%S'),
-			order.get('wait_time')
-		))
+def report_profile(profiler, config):
+	"""
+	:param profiler: StepProfiler of the simulation
+	:param config: configuration object for simulation
+	"""
+	log_flush()
+	if log_filename('.prof'):
+		profiler.dump_pstats(log_filename('.prof'))
+		profiler.dump_folded(log_filename('.folded'))
+	if 'stdout' in config.get('log_sinks', LOG_SINKS):
+		profiler.print_report()
 
 
-def print_couriers(couriers, title):
-	print('-' * 120)
-	print('- ' + title)
-	print('{0:>37}{1:>37}{2:>10}{3:>10}{4:>10}'.format(
-		'ID',
-		'Order ID',
-		'Arrival',
-		'Delivery',
-		'Wait'
-	))
-	for courier in couriers:
-		print('{0:>37}{1:>37}{2:>10}{3:>10}{4:>10.4f}s'.format(
-			courier.get('id', 'N/A'),
-			courier.get('order', {}).get('id', 'N/A'),
-			courier.get('arrival_time', 0).strftime('%H:%M:%S'),
-			courier.get('delivery_time', 0).strftime('%H:%M:%S'),
-			courier.get('wait_time')
-		))
+def report_title(title, results, rows, config):
+	"""
+	:return: title of a table, with the view when it does not show all the rows in pickup order
+	"""
+	sort = config.get('report_sort', 'pickup')
+	if len(rows) == len(results) and sort == 'pickup':
+		return title
+	return '{0} ({1} OF {2}{3})'.format(title, len(rows), len(results), ', LONGEST WAIT FIRST' if sort == 'wait' else '')
+
+
+def simulation_report(kitchen, delivery, config):
+	"""
+	:param kitchen: Kitchen of a finished simulation
+	:param delivery: Delivery of a finished simulation
+	:param config: configuration object for simulation
+	:return: list of (title, results, columns, rows) of the orders and couriers tables of the report view
+	"""
+	tables = []
+	for title, results, columns in [
+		('ORDERS', kitchen.orders_delivered, ORDER_COLUMNS),
+		('COURIERS', delivery.couriers_done, COURIER_COLUMNS)
+	]:
+		rows = report_rows(
+			results,
+			config.get('report_sort', 'pickup'),
+			config.get('report_offset', 0),
+			config.get('report_limit')
+		)
+		tables.append((title, results, columns, rows))
+	return tables
+
+
+def write_simulation_report(kitchen, delivery, config):
+	"""
+	Write the orders and couriers tables next to the events log in the 'report_format' of the configuration
+	"""
+	report_format = config['report_format']
+	for title, results, columns, rows in simulation_report(kitchen, delivery, config):
+		write_report(log_filename('.{0}.{1}'.format(title.lower(), report_format)), results, columns, rows, report_format)
 
 
 def print_simulation_info(kitchen, delivery, config):
@@ -128,10 +500,33 @@ def print_simulation_info(kitchen, delivery, config):
 	print('- STRATEGY: ' + config['strategy'].upper())
 	print('- ORDERS PER SECOND: ' + str(config['orders_per_second']))
 	print('- COOKS IN KITCHEN: ' + str(config['cooks_in_kitchen']))
+	print('- KITCHEN POLICY: ' + config.get('kitchen_policy', KITCHEN_POLICY).upper() + (
+		' (PREEMPTIVE)' if config.get('kitchen_preemptive') else ''
+	))
+	print('- MODE: ' + config.get('mode', SIMULATION_MODE).upper())
 	print('- COURIER ARRIVAL MIN TIME: ' + str(config['courier_arrival_time_min']))
 	print('- COURIER ARRIVAL MAX TIME: ' + str(config['courier_arrival_time_max']))
-	print_orders(kitchen.orders_delivered, 'ORDERS')
-	print_couriers(delivery.couriers_done, 'COURIERS')
+	# Rendered in one write, a print per row is slower than the simulation for large runs
+	print('\n'.join(
+		render_text(results, columns, report_title(title, results, rows, config), rows)
+		for title, results, columns, rows in simulation_report(kitchen, delivery, config)
+	))
+
+
+def print_metrics(metrics, title):
+	"""
+	Print the results of `print_simulation_result` from the metrics of a simulation, e.g. cached ones
+	:param metrics: metrics from `simulation_metrics`
+	:param title: title of the results
+	"""
+	print('=' * 120)
+	print('=== {0} '.format(title) + '=' * (115 - len(title)))
+	print('AVG ORDER WAIT TIME: {0:.4f}s'.format(metrics['avg_order_wait_time']))
+	print('AVG COURIER WAIT TIME: {0:.4f}s'.format(metrics['avg_courier_wait_time']))
+	for name, value in metrics.items():
+		if name not in SIMULATION_METRICS:
+			print('{0}: {1:g}'.format(name.replace('_', ' ').upper(), value))
+	print('=' * 120)
 
 
 def print_simulation_result(kitchen, delivery):
@@ -139,4 +534,6 @@ def print_simulation_result(kitchen, delivery):
 	print('=== RESULTS ========' + '='*100)
 	print('AVG ORDER WAIT TIME: {0:.4f}s'.format(kitchen.avg_wait_time()))
 	print('AVG COURIER WAIT TIME: {0:.4f}s'.format(delivery.avg_wait_time()))
+	for name, value in delivery.strategy.summary().items():
+		print('{0}: {1:g}'.format(name.replace('_', ' ').upper(), value))
 	print('=' * 120)
\ No newline at end of file
@@ -0,0 +1,149 @@
+import csv
+from itertools import product
+from time import perf_counter
+from concurrent.futures import ProcessPoolExecutor
+from simulation import simulate_orders
+from utils import read_orders
+from utils.checkpoint import load_checkpoint
+
+
+SWEEP_PARAMETERS = [
+	'orders_per_second',
+	'cooks_in_kitchen',
+	'courier_arrival_time_min',
+	'courier_arrival_time_max'
+]
+
+SWEEP_COLUMNS = ['strategy'] + SWEEP_PARAMETERS + [
+	'seed',
+	'orders',
+	'simulation_time',
+	'wall_time',
+	'avg_order_wait_time',
+	'avg_courier_wait_time'
+]
+
+def parse_range(value):
+	"""
+	Parse a parameter range
+	:param value: comma separated values and/or 'start:stop[:step]' inclusive ranges, e.g. '1,2,4' or '1:9:2'
+	:return: list of int values
+	"""
+	values = []
+	for part in value.split(','):
+		if ':' in part:
+			bounds = [int(b) for b in part.split(':')]
+			start, stop, step = (bounds + [1])[:3]
+			values.extend(range(start, stop + 1, step))
+		else:
+			values.append(int(part))
+	return values
+
+
+def seeded_configs(base_config, params, strategies, seed):
+	"""
+	Build the configurations of one point of a sweep or one replication: a simulation for each strategy, all of them
+	with the same seed, in virtual time and without outputs
+	:param base_config: configuration object for simulation used for the parameters not in `params`
+	:param params: dictionary with the parameters of the point
+	:param strategies: list of strategies to simulate
+	:param seed: seed of the simulations
+	:return: list of configuration objects
+	"""
+	configs = []
+	for strategy in strategies:
+		config = dict(base_config, **params)
+		config.update({
+			'strategy': strategy,
+			'seed': seed,
+			'mode': 'virtual',
+			'courier_arrival_dist_fnc': None,
+			'print_info': False,
+			'log_sinks': ()
+		})
+		configs.append(config)
+	return configs
+
+
+def sweep_configs(grid, strategies, base_config, seed=0):
+	"""
+	Build the configurations for every combination of the parameters grid
+	:param grid: dictionary where key is one of SWEEP_PARAMETERS and value the list of values to simulate
+	:param strategies: list of strategies to simulate for each combination
+	:param base_config: configuration object for simulation used for the parameters not in the grid
+	:param seed: base seed, each combination gets its own seed derived from it, shared by all the strategies
+	:return: list of configuration objects
+	"""
+	configs = []
+	for idx, values in enumerate(product(*[grid[p] for p in SWEEP_PARAMETERS])):
+		params = dict(zip(SWEEP_PARAMETERS, values))
+		if params['courier_arrival_time_min'] > params['courier_arrival_time_max']:
+			continue
+		configs.extend(seeded_configs(base_config, params, strategies, seed + idx))
+	return configs
+
+
+def checkpoint_base_config(checkpoint):
+	"""
+	Configuration to fork the simulations of a sweep from a shared warm-up checkpoint
+	:param checkpoint: dictionary with the state of a simulation, see `simulation.simulation_checkpoint`
+	:return: configuration object of the checkpoint without its outputs, the strategy and cooks of the kitchen can not
+		change after the checkpoint
+	"""
+	return dict(
+		checkpoint['config'],
+		metrics_interval=None,
+		metrics_port=None,
+		profile=False,
+		checkpoint_interval=None,
+		checkpoint_stop=False
+	)
+
+
+def run_config(filename, config, checkpoint=None):
+	"""
+	Run one simulation of the sweep
+	:param filename: orders file
+	:param config: configuration object for simulation
+	:param checkpoint: checkpoint file to resume the simulation from, None to simulate from the start
+	:return: row of results with the parameters and metrics of the simulation
+	"""
+	start = perf_counter()
+	state = load_checkpoint(checkpoint) if checkpoint else None
+	metrics = simulate_orders(read_orders(filename), config, state)
+	row = {column: config.get(column) for column in ['strategy', 'seed'] + SWEEP_PARAMETERS}
+	row.update(metrics)
+	row['wall_time'] = perf_counter() - start
+	return row
+
+
+def run_sweep(filename, configs, workers=None, checkpoint=None):
+	"""
+	Run the simulations of the sweep in parallel over a process pool
+	:param filename: orders file, streamed by each simulation
+	:param configs: list of configuration objects
+	:param workers: number of worker processes, defaults to the number of CPUs
+	:param checkpoint: checkpoint file all the simulations resume from, None to simulate them from the start
+	:return: list of rows of results in the same order as `configs`
+	"""
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		return list(executor.map(run_config, [filename] * len(configs), configs, [checkpoint] * len(configs)))
+
+
+def write_rows(rows, filename):
+	"""
+	Write the results of the sweep as a CSV table, or as Parquet when the filename ends with '.parquet' (needs pyarrow)
+	:param rows: list of rows of results
+	:param filename: output file
+	"""
+	if filename.endswith('.parquet'):
+		import pyarrow
+		import pyarrow.parquet
+		table = pyarrow.table({column: [row[column] for row in rows] for column in SWEEP_COLUMNS})
+		pyarrow.parquet.write_table(table, filename)
+		return
+	with open(filename, 'w', newline='') as f:
+		writer = csv.DictWriter(f, fieldnames=SWEEP_COLUMNS)
+		writer.writeheader()
+		for row in rows:
+			writer.writerow({column: row[column] for column in SWEEP_COLUMNS})
@@ -0,0 +1,49 @@
+import sys
+import simpy
+from itertools import permutations
+from random import Random
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.append('.')
+from utils.assignment import linear_sum_assignment
+from models import Kitchen, Delivery, Order
+
+
+class TestAssignment(TestCase):
+	def test_linear_sum_assignment(self):
+		rng = Random(0)
+		for rows, cols in [(1, 1), (3, 3), (4, 4), (2, 4), (4, 2), (5, 5)]:
+			for _ in range(10):
+				cost = [[rng.randint(0, 9) for _ in range(cols)] for _ in range(rows)]
+				assigned_rows, assigned_cols = linear_sum_assignment(cost)
+				self.assertEqual(len(assigned_rows), min(rows, cols))
+				self.assertEqual(list(assigned_rows), sorted(set(assigned_rows)))
+				self.assertEqual(len(set(assigned_cols)), len(assigned_cols))
+				total = sum(cost[r][c] for r, c in zip(assigned_rows, assigned_cols))
+				if rows <= cols:
+					best = min(sum(cost[r][p[r]] for r in range(rows)) for p in permutations(range(cols), rows))
+				else:
+					best = min(sum(cost[p[c]][c] for c in range(cols)) for p in permutations(range(rows), cols))
+				self.assertEqual(total, best)
+
+	@patch('builtins.print')
+	def test_batched_strategy(self, mock_print):
+		# The courier dispatched first arrives last, the batch assigns it to the order that takes longer
+		delays = iter([10, 2])
+		def dist_fnc(x, y): return next(delays)
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 2)
+		delivery = Delivery(env, kitchen, 'batched', arrival_dist_fnc=dist_fnc, strategy_options={'interval': 1})
+		for order in [Order('1', 'test', 2), Order('2', 'test', 10)]:
+			kitchen.create_order(order)
+			delivery.dispatch_new_courier(order)
+		delivery.expect_orders(2)
+		env.run(until=delivery.all_done)
+		self.assertEqual(env.now, 10)
+		self.assertEqual(list(kitchen.orders_delivered.wait_times), [0, 0])
+		self.assertEqual(list(delivery.couriers_done.wait_times), [0, 0])
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import tempfile
+from random import Random
+from unittest import TestCase, main
+
+sys.path.append('.')
+from configs import base_config
+from benchmarks.engine import parse_distribution, generate_orders, bench_simulation
+from utils import read_orders
+
+
+class TestBenchmark(TestCase):
+	def test_parse_distribution(self):
+		rng = Random(0)
+		self.assertEqual(parse_distribution('constant:5')(rng), 5)
+		for _ in range(100):
+			self.assertTrue(2 <= parse_distribution('uniform:2,10')(rng) <= 10)
+			self.assertTrue(parse_distribution('exponential:6')(rng) >= 0)
+		with self.assertRaises(ValueError):
+			parse_distribution('triangular:1,2')
+
+	def test_bench_simulation(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'orders.ndjson')
+			generate_orders(filename, 50, 'constant:4')
+			orders = list(read_orders(filename))
+			self.assertEqual(len(orders), 50)
+			self.assertEqual(orders[0]['prepTime'], 4)
+			result = bench_simulation(filename, base_config(cooks_in_kitchen=4, strategy='matched'))
+		self.assertEqual(result['orders'], 50)
+		self.assertGreater(result['events'], 50)
+		self.assertGreater(result['events_per_second'], 0)
+		self.assertGreater(result['peak_rss_mb'], 0)
+		for phase in ['ingest_time', 'simulate_time', 'report_time']:
+			self.assertGreaterEqual(result[phase], 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,81 @@
+import sys
+import os
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.append('.')
+from configs import base_config
+from simulation import simulate_orders
+from utils import read_orders
+from utils.cache import ResultCache, cache_key, files_digest
+
+
+def cache_config(cache_dir, strategy='matched'):
+	return base_config(
+		strategy=strategy,
+		orders_digest=files_digest(['test/dispatch_orders.json']),
+		cache_dir=cache_dir
+	)
+
+
+class TestCache(TestCase):
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def test_key(self):
+		config = cache_config(self.tmp_dir.name)
+		key = cache_key(config)
+		# Outputs do not change the metrics
+		self.assertEqual(cache_key(dict(config, log_sinks=('stdout', 'file'), mode='realtime', cache_bypass=True)), key)
+		for changes in [{'seed': 2}, {'strategy': 'fifo'}, {'orders_digest': files_digest(['test/orders_test.json'])}]:
+			self.assertNotEqual(cache_key(dict(config, **changes)), key)
+		for changes in [{'seed': None}, {'orders_digest': None}, {'courier_arrival_dist_fnc': lambda x, y: 3}]:
+			self.assertIsNone(cache_key(dict(config, **changes)))
+		# The content of an empirical distribution file is part of the key
+		filename = os.path.join(self.tmp_dir.name, 'delays.txt')
+		with open(filename, 'w') as f:
+			f.write('3\n4\n')
+		empirical = dict(config, courier_arrival_dist='empirical:' + filename)
+		empirical_key = cache_key(empirical)
+		with open(filename, 'w') as f:
+			f.write('3\n5\n')
+		self.assertNotEqual(cache_key(empirical), empirical_key)
+
+	def test_eviction(self):
+		cache = ResultCache(self.tmp_dir.name, max_entries=2)
+		cache.put('a', {'orders': 1})
+		cache.put('b', {'orders': 2})
+		os.utime(os.path.join(self.tmp_dir.name, 'a.result.json'), ns=(0, 0))
+		os.utime(os.path.join(self.tmp_dir.name, 'b.result.json'), ns=(1, 1))
+		# 'a' is used last, 'b' is the least recently used
+		self.assertEqual(cache.get('a'), {'orders': 1})
+		cache.put('c', {'orders': 3})
+		self.assertIsNone(cache.get('b'))
+		self.assertEqual(cache.get('c'), {'orders': 3})
+		cache = ResultCache(self.tmp_dir.name, max_bytes=0)
+		cache.evict()
+		self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+	@patch('builtins.print')
+	def test_simulate(self, mock_print):
+		config = cache_config(self.tmp_dir.name)
+		expected = simulate_orders(read_orders('test/dispatch_orders.json'), config)
+		self.assertEqual(expected['orders'], 132)
+		# Cached metrics are returned without reading the orders
+		self.assertEqual(simulate_orders([], config), expected)
+		self.assertEqual(simulate_orders([], dict(config, log_sinks=('stdout',))), expected)
+		self.assertIn('RESULTS (CACHED)', mock_print.call_args_list[1][0][0])
+		# A different seed, the orders tables or the bypass simulate
+		self.assertEqual(simulate_orders([], dict(config, seed=2))['orders'], 0)
+		self.assertEqual(simulate_orders([], dict(config, print_info=True))['orders'], 0)
+		self.assertEqual(simulate_orders([], dict(config, cache_bypass=True))['orders'], 0)
+		# The bypass refreshes the cached metrics
+		self.assertEqual(simulate_orders([], config)['orders'], 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,104 @@
+import sys
+import os
+import tempfile
+from unittest import TestCase, main
+from click.testing import CliRunner
+
+sys.path.append('.')
+from configs import base_config
+from cli import cli
+from simulation import simulate_orders
+from utils import read_orders
+from utils.checkpoint import load_checkpoint
+
+ORDERS = 'test/dispatch_orders.json'
+
+
+def checkpoint_config(strategy, filename, interval):
+	return base_config(
+		strategy=strategy,
+		kitchen_policy='earliest_courier',
+		checkpoint_interval=interval,
+		checkpoint_file=filename,
+		checkpoint_stop=True
+	)
+
+
+class TestCheckpoint(TestCase):
+	def test_resume(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'simulation.checkpoint')
+			for strategy in ['fifo', 'matched', 'batched']:
+				config = checkpoint_config(strategy, filename, None)
+				expected = simulate_orders(read_orders(ORDERS), config)
+				# While receiving orders, after all the orders were received and at a fraction of a second
+				for interval in [10, 33.5, 80]:
+					config = checkpoint_config(strategy, filename, interval)
+					simulate_orders(read_orders(ORDERS), config)
+					checkpoint = load_checkpoint(filename)
+					self.assertEqual(checkpoint['time'], interval)
+					resumed = simulate_orders(read_orders(ORDERS), dict(config, checkpoint_interval=None), checkpoint)
+					self.assertEqual(resumed['orders'], expected['orders'])
+					self.assertEqual(resumed['simulation_time'], expected['simulation_time'])
+					self.assertAlmostEqual(resumed['avg_order_wait_time'], expected['avg_order_wait_time'])
+					self.assertAlmostEqual(resumed['avg_courier_wait_time'], expected['avg_courier_wait_time'])
+
+	def test_resume_multi(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'simulation.checkpoint')
+			# Orders wait for the couriers: couriers leave with many orders and the others are recalled
+			config = dict(checkpoint_config('multi', filename, None), cooks_in_kitchen=30, courier_arrival_time_max=60)
+			config['pickup_window'] = 10
+			expected = simulate_orders(read_orders(ORDERS), config)
+			self.assertGreater(expected['couriers_recalled'], 0)
+			for interval in [10, 33.5, 80]:
+				config['checkpoint_interval'] = interval
+				simulate_orders(read_orders(ORDERS), config)
+				resumed = simulate_orders(
+					read_orders(ORDERS), dict(config, checkpoint_interval=None), load_checkpoint(filename)
+				)
+				self.assertEqual(resumed['orders'], expected['orders'])
+				self.assertEqual(resumed['trips'], expected['trips'])
+				self.assertEqual(resumed['couriers_recalled'], expected['couriers_recalled'])
+				self.assertAlmostEqual(resumed['simulation_time'], expected['simulation_time'])
+				self.assertAlmostEqual(resumed['avg_order_wait_time'], expected['avg_order_wait_time'])
+				self.assertAlmostEqual(resumed['avg_hold_time'], expected['avg_hold_time'])
+
+	def test_fork(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'simulation.checkpoint')
+			config = checkpoint_config('matched', filename, 20)
+			warmup = simulate_orders(read_orders(ORDERS), config)
+			checkpoint = load_checkpoint(filename)
+			self.assertLess(warmup['orders'], 132)
+			self.assertGreater(len(checkpoint['kitchen']['orders_processing']), 0)
+			config['checkpoint_interval'] = None
+			forks = [simulate_orders(read_orders(ORDERS), dict(config, seed=seed), checkpoint) for seed in [1, 2, 2]]
+		for fork in forks:
+			self.assertEqual(fork['orders'], 132)
+		# A different seed forks a new random stream, the same seed continues the checkpoint one
+		self.assertNotEqual(forks[0]['avg_courier_wait_time'], forks[1]['avg_courier_wait_time'])
+		self.assertEqual(forks[1], forks[2])
+
+	def test_preemptive(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			config = checkpoint_config('fifo', os.path.join(tmp_dir, 'simulation.checkpoint'), 10)
+			config['kitchen_preemptive'] = True
+			with self.assertRaises(ValueError):
+				simulate_orders(read_orders(ORDERS), config)
+
+
+	def test_cli_without_file_sink(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			log_dir = os.path.join(tmp_dir, 'logs')
+			result = CliRunner().invoke(cli, [
+				'run', '-m', 'virtual', '-l', 'none', '-s', '1', '--strategies', 'fifo', '--checkpoint_interval', '50',
+				'--log_dir', log_dir, ORDERS
+			])
+			self.assertEqual(result.exit_code, 0, result.output)
+			self.assertEqual(os.listdir(log_dir), ['fifo.checkpoint'])
+			self.assertGreater(load_checkpoint(os.path.join(log_dir, 'fifo.checkpoint'))['time'], 0)
+
+
+if __name__ == "__main__":
+	main()
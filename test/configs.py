@@ -0,0 +1,20 @@
+def base_config(**overrides):
+	"""
+	Configuration of the test simulations: seeded, in virtual time and without outputs
+	:param overrides: keys changed by the test
+	:return: configuration object for simulation, see `simulation.simulate_orders`
+	"""
+	config = {
+		'orders_per_second': 2,
+		'cooks_in_kitchen': 3,
+		'strategy': 'fifo',
+		'courier_arrival_time_min': 3,
+		'courier_arrival_time_max': 15,
+		'courier_arrival_dist_fnc': None,
+		'print_info': False,
+		'mode': 'virtual',
+		'seed': 1,
+		'log_sinks': ()
+	}
+	config.update(overrides)
+	return config
@@ -1,10 +1,10 @@
 import sys
+import simpy
 from unittest import TestCase, main
 from unittest.mock import patch, Mock
-from datetime import datetime
 
 sys.path.append('.')
-from models import Kitchen, Delivery
+from models import Kitchen, Delivery, Order, FifoStrategy, MatchedStrategy, MultiOrderStrategy
 
 
 mock_simpy_env = Mock()
@@ -12,6 +12,7 @@ mock_simpy_env.timeout = Mock()
 mock_simpy_env.process = Mock()
 mock_simpy_env.active_process = Mock(return_value=1)
 mock_simpy_env.schedule = Mock(return_value=1)
+mock_simpy_env.now = 0
 
 
 class TestSimulation(TestCase):
@@ -20,63 +21,113 @@ class TestSimulation(TestCase):
 	@patch('builtins.print')
 	def test_delivery(self, mock_print):
 		mock_kitchen = Mock()
-		orders = [
-			{'id': '1', 'name': 'test', 'prepTime': 1, 'delivered_time': datetime.now(), 'wait_time': datetime.now()},
-			{'id': '2', 'name': 'test', 'prepTime': 1, 'delivered_time': datetime.now(), 'wait_time': datetime.now()},
-			{'id': '3', 'name': 'test', 'prepTime': 1, 'delivered_time': datetime.now(), 'wait_time': datetime.now()}
-		]
+		orders = [Order('1', 'test', 1), Order('2', 'test', 1), Order('3', 'test', 1)]
+		for order in orders:
+			order.delivered_time = 1.0
+			order.wait_time = 0.5
 		mock_kitchen.pickup_first_order_for_delivery = Mock(return_value=orders[0])
 		mock_kitchen.has_orders_for_delivery = Mock(return_value=True)
-		mock_kitchen.orders_for_delivery = orders
+		mock_kitchen.orders_for_delivery = {}
 		def dist_fnc(x, y): return 1
 		delivery = Delivery(mock_simpy_env, mock_kitchen, arrival_dist_fnc=dist_fnc)
 
 		# Empty delivery system
-		self.assertEqual(len(delivery.couriers_fifo), 0)
-		self.assertEqual(len(delivery.couriers_matched.keys()), 0)
+		self.assertIsInstance(delivery.strategy, FifoStrategy)
+		self.assertEqual(len(delivery.strategy.couriers), 0)
 		self.assertEqual(len(delivery.couriers_done), 0)
 
 		# Dispatching a courier: test env call
 		delivery.dispatch_new_courier(orders[0])
 		mock_simpy_env.process.assert_called()
 
-		# Dispatching a courier: test courier added to list
+		# Dispatching a courier: test courier signaled as arrived
 		for _ in delivery._Delivery__dispatch_new_courier(orders[0]): pass
 		mock_print.assert_called()
 		mock_print.reset_mock()
-		# Check courier in FIFO list
-		self.assertEqual(len(delivery.couriers_fifo), 1)
-		courier = delivery.couriers_fifo[0]
-		self.assertEqual(courier['arrival_delay'], 1)
-		self.assertIn('arrival_time', courier)
-		# Check courier in MATCHED list
-		self.assertEqual(len(delivery.couriers_matched.keys()), 1)
-		self.assertEqual(delivery.couriers_matched[orders[0]['id']], courier)
+		courier = delivery.courier_arrived.items[0]
+		self.assertEqual(courier.arrival_delay, 1)
+		self.assertIsNone(courier.order_id)
+		self.assertIsNotNone(courier.arrival_time)
 
 		# Pickup an order for FIFO
-		delivery.end_loop = True
-		for _ in delivery.run(): pass
-		self.assertEqual(len(delivery.couriers_fifo), 0)
+		delivery.on_courier_arrived(courier)
+		self.assertEqual(len(delivery.strategy.couriers), 0)
 		self.assertEqual(len(delivery.couriers_done), 1)
 		mock_kitchen.pickup_first_order_for_delivery.assert_called_once()
-		self.assertIn('delivery_time', courier)
-		self.assertIn('wait_time', courier)
-		self.assertIn('order', courier)
+		self.assertIsNotNone(courier.delivery_time)
+		self.assertIsNotNone(courier.wait_time)
+		self.assertIsNotNone(courier.order_id)
 		mock_print.assert_called()
 		mock_print.reset_mock()
 
 		# Pickup an order for MATCHED
-		delivery._Delivery__strategy = 'matched'
-		for _ in delivery.run(): pass
-		self.assertEqual(len(delivery.couriers_matched.keys()), 0)
-		self.assertEqual(len(delivery.couriers_done), 2)
-		mock_kitchen.pickup_first_order_for_delivery.assert_called_once()
-		self.assertIn('delivery_time', courier)
-		self.assertIn('wait_time', courier)
-		self.assertIn('order', courier)
+		delivery = Delivery(mock_simpy_env, mock_kitchen, 'matched', arrival_dist_fnc=dist_fnc)
+		self.assertIsInstance(delivery.strategy, MatchedStrategy)
+		for _ in delivery._Delivery__dispatch_new_courier(orders[1]): pass
+		courier = delivery.courier_arrived.items[0]
+		self.assertEqual(courier.order_id, orders[1].id)
+		# The order is not ready, the courier waits for it
+		delivery.on_courier_arrived(courier)
+		self.assertEqual(len(delivery.strategy.couriers), 1)
+		mock_kitchen.orders_for_delivery[orders[1].id] = orders[1]
+		delivery.on_order_ready(orders[1])
+		self.assertEqual(len(delivery.strategy.couriers), 0)
+		self.assertEqual(len(delivery.couriers_done), 1)
+		mock_kitchen.pickup_order_for_delivery.assert_called_once_with(orders[1])
+		self.assertIsNotNone(courier.delivery_time)
+		self.assertIsNotNone(courier.wait_time)
 		mock_print.assert_called()
 		mock_print.reset_mock()
 
+	@patch('builtins.print')
+	def test_delivery_events(self, mock_print):
+		def dist_fnc(x, y): return 3
+		for strategy in ['fifo', 'matched', 'batched']:
+			env = simpy.Environment()
+			kitchen = Kitchen(env, 2)
+			delivery = Delivery(env, kitchen, strategy, arrival_dist_fnc=dist_fnc, strategy_options=(
+				{'interval': 1} if strategy == 'batched' else None
+			))
+			for order in [Order('1', 'test', 1), Order('2', 'test', 2)]:
+				kitchen.create_order(order)
+				delivery.dispatch_new_courier(order)
+			delivery.expect_orders(2)
+			env.run(until=delivery.all_done)
+
+			# Pickups happen exactly when the couriers arrive, without polling latency
+			self.assertEqual(env.now, 3)
+			self.assertEqual(len(kitchen.orders_delivered), 2)
+			self.assertEqual(sorted(kitchen.orders_delivered.wait_times), [1, 2])
+			self.assertEqual(list(delivery.couriers_done.wait_times), [0, 0])
+
+	@patch('builtins.print')
+	def test_multi_order(self, mock_print):
+		delays = iter([2, 10, 10, 10, 20])
+		def dist_fnc(x, y): return next(delays)
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 10)
+		delivery = Delivery(env, kitchen, 'multi', arrival_dist_fnc=dist_fnc, strategy_options={
+			'capacity': 3, 'window': 3
+		})
+		self.assertIsInstance(delivery.strategy, MultiOrderStrategy)
+		orders = [Order(str(idx), 'test', 1) for idx in range(1, 5)] + [Order('5', 'test', 12)]
+		for order in orders:
+			kitchen.create_order(order)
+			delivery.dispatch_new_courier(order)
+		delivery.expect_orders(5)
+		env.run(until=delivery.all_done)
+
+		# The first courier takes the ready orders up to its capacity and leaves,
+		# the courier of order 4 waits the window and takes order 5 ready meanwhile
+		self.assertEqual(env.now, 13)
+		self.assertEqual(list(delivery.couriers_done.ids), ['courier-1', 'courier-4'])
+		self.assertEqual(list(delivery.couriers_done.order_ids), ['1', '4'])
+		self.assertEqual(list(delivery.couriers_done.wait_times), [0, 3])
+		self.assertEqual(list(kitchen.orders_delivered.delivered_times), [2, 2, 2, 10, 12])
+		self.assertEqual(delivery.strategy.summary(), {
+			'trips': 2, 'orders_per_trip': 2.5, 'couriers_recalled': 2, 'avg_hold_time': 0.8
+		})
+
 
 if __name__ == "__main__":
 	main()
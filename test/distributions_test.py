@@ -0,0 +1,106 @@
+import sys
+import os
+import simpy
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+from click.testing import CliRunner
+
+sys.path.append('.')
+from configs import base_config
+from cli import cli
+from models import Kitchen, Delivery, Order
+from simulation import simulate_orders
+from utils import read_orders
+from utils.checkpoint import load_checkpoint
+from utils.distributions import DelaySampler, parse_courier_distribution, courier_arrival_distribution
+
+ORDERS = 'test/dispatch_orders.json'
+
+
+class TestDistributions(TestCase):
+	def test_seeded_stream(self):
+		delays = [DelaySampler('uniform', 7, batch_size=16)(3, 15) for _ in range(3)]
+		sampler = DelaySampler('uniform', 7, batch_size=16)
+		other = DelaySampler('uniform', 7, batch_size=5)
+		first = [sampler(3, 15) for _ in range(40)]
+		# The batch size does not change the stream
+		self.assertEqual(first, [other(3, 15) for _ in range(40)])
+		self.assertEqual(delays, [first[0]] * 3)
+		self.assertTrue(all(3 <= delay <= 15 for delay in first))
+		self.assertNotEqual(first, [DelaySampler('uniform', 8)(3, 15) for _ in range(40)])
+
+	def test_state(self):
+		sampler = DelaySampler('lognormal:1,0.5', 3, batch_size=8)
+		for _ in range(5):
+			sampler()
+		state = sampler.getstate()
+		expected = [sampler() for _ in range(20)]
+		restored = DelaySampler('lognormal:1,0.5', 99, batch_size=8)
+		restored.setstate(state)
+		self.assertEqual([restored() for _ in range(20)], expected)
+		self.assertTrue(all(delay > 0 for delay in expected))
+
+	def test_empirical(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'delays.txt')
+			with open(filename, 'w') as f:
+				f.write('2\n4.5\n8\n')
+			sampler = DelaySampler('empirical:' + filename, 1)
+			self.assertEqual(set(sampler(3, 15) for _ in range(100)), {2, 4.5, 8})
+		self.assertEqual(parse_courier_distribution('lognormal:1,0.5'), ('lognormal', [1.0, 0.5]))
+		with self.assertRaises(ValueError):
+			parse_courier_distribution('normal:1,2')
+
+	def test_parameters(self):
+		self.assertEqual(parse_courier_distribution('uniform'), ('uniform', []))
+		# Missing and extra parameters
+		for dist in ['lognormal', 'lognormal:1', 'lognormal:1,2,3', 'uniform:1,2']:
+			with self.assertRaises(ValueError):
+				parse_courier_distribution(dist)
+		result = CliRunner().invoke(cli, ['run', '-m', 'virtual', '--courier_dist', 'lognormal:1', ORDERS])
+		self.assertEqual(result.exit_code, 2)
+		self.assertIn('takes 2 parameters: mu,sigma, got 1', result.output)
+
+	def test_default(self):
+		def dist_fnc(x, y): return 3
+		self.assertIs(courier_arrival_distribution({'courier_arrival_dist_fnc': dist_fnc}, 1), dist_fnc)
+		self.assertIsInstance(courier_arrival_distribution({'courier_arrival_dist': 'uniform'}, 1), DelaySampler)
+		# The legacy stream keeps the results of the seeded simulations
+		self.assertEqual(courier_arrival_distribution({}, 1)(3, 15), courier_arrival_distribution({}, 1)(3, 15))
+
+	@patch('builtins.print')
+	def test_courier_ids(self, mock_print):
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 1)
+		delivery = Delivery(env, kitchen, 'matched', arrival_dist_fnc=DelaySampler('uniform', 0))
+		for order in [Order('1', 'test', 2), Order('2', 'test', 2)]:
+			kitchen.create_order(order)
+			delivery.dispatch_new_courier(order)
+		delivery.expect_orders(2)
+		env.run(until=delivery.all_done)
+		self.assertEqual(sorted(delivery.couriers_done.ids), ['courier-1', 'courier-2'])
+
+	def test_resume(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'simulation.checkpoint')
+			config = base_config(
+				strategy='matched',
+				courier_arrival_dist='lognormal:2,0.4',
+				checkpoint_interval=None,
+				checkpoint_file=filename,
+				checkpoint_stop=True
+			)
+			expected = simulate_orders(read_orders(ORDERS), config)
+			self.assertEqual(expected, simulate_orders(read_orders(ORDERS), config))
+			config['checkpoint_interval'] = 30
+			simulate_orders(read_orders(ORDERS), config)
+			config['checkpoint_interval'] = None
+			resumed = simulate_orders(read_orders(ORDERS), config, load_checkpoint(filename))
+			self.assertEqual(resumed['orders'], expected['orders'])
+			self.assertAlmostEqual(resumed['avg_order_wait_time'], expected['avg_order_wait_time'])
+			self.assertAlmostEqual(resumed['avg_courier_wait_time'], expected['avg_courier_wait_time'])
+
+
+if __name__ == "__main__":
+	main()
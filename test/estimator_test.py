@@ -0,0 +1,63 @@
+import sys
+from unittest import TestCase, main
+
+sys.path.append('.')
+from configs import base_config
+from simulation import simulate_orders
+from estimator import estimate_orders, estimate_wait_times
+from utils import read_orders
+
+ORDERS = 'test/dispatch_orders.json'
+
+
+def estimator_config(strategy, cooks_in_kitchen, orders_per_second):
+	return base_config(
+		orders_per_second=orders_per_second,
+		cooks_in_kitchen=cooks_in_kitchen,
+		strategy=strategy,
+		courier_arrival_dist='uniform'
+	)
+
+
+class TestEstimator(TestCase):
+	def test_exact(self):
+		for strategy in ['fifo', 'matched']:
+			for orders_per_second in [1, 4]:
+				config = estimator_config(strategy, 1, orders_per_second)
+				expected = simulate_orders(read_orders(ORDERS), config)
+				estimate = estimate_orders(read_orders(ORDERS), config)
+				self.assertTrue(estimate['exact'])
+				self.assertEqual(estimate['orders'], expected['orders'])
+				self.assertAlmostEqual(estimate['simulation_time'], expected['simulation_time'])
+				self.assertAlmostEqual(estimate['avg_order_wait_time'], expected['avg_order_wait_time'])
+				self.assertAlmostEqual(estimate['avg_courier_wait_time'], expected['avg_courier_wait_time'])
+
+	def test_approximation(self):
+		for strategy in ['fifo', 'matched']:
+			for cooks_in_kitchen in [2, 3, 5]:
+				config = estimator_config(strategy, cooks_in_kitchen, 2)
+				expected = simulate_orders(read_orders(ORDERS), config)
+				estimate = estimate_orders(read_orders(ORDERS), config)
+				self.assertFalse(estimate['exact'])
+				self.assertAlmostEqual(
+					estimate['simulation_time'],
+					expected['simulation_time'],
+					delta=0.02 * expected['simulation_time']
+				)
+				self.assertAlmostEqual(estimate['avg_order_wait_time'], expected['avg_order_wait_time'], delta=0.05)
+				self.assertAlmostEqual(
+					estimate['avg_courier_wait_time'],
+					expected['avg_courier_wait_time'],
+					delta=0.02 * expected['avg_courier_wait_time']
+				)
+
+	def test_unsupported(self):
+		with self.assertRaises(ValueError):
+			estimate_wait_times([1, 2], estimator_config('batched', 1, 2))
+		with self.assertRaises(ValueError):
+			estimate_wait_times([1, 2], dict(estimator_config('fifo', 1, 2), kitchen_policy='spt'))
+		self.assertEqual(estimate_wait_times([], estimator_config('fifo', 1, 2))['orders'], 0)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+from unittest import TestCase, main
+
+sys.path.append('.')
+from utils.eventlog import BinaryEventWriter, EventLogReader
+
+
+class TestEventLog(TestCase):
+	def setUp(self):
+		fd, self.filename = tempfile.mkstemp(suffix='.events.bin')
+		os.close(fd)
+		with open(self.filename, 'wb') as f:
+			writer = BinaryEventWriter(f)
+			writer.write([
+				writer.encode_obj({'strategy': 'matched', 'seed': 1}),
+				writer.encode_event(0, 'ORDER RECEIVED', '1', ('Banana Split',)),
+				writer.encode_event(0, 'ORDER RECEIVED', '2', ('McFlury',)),
+				writer.encode_event(0.5, 'COURIER DISPATCHED', 'c1', ('DELAY', 3.5, 'ORDER ASSIGNED', '2')),
+				writer.encode_event(4, 'ORDER PICKED UP', '2', ('McFlury', 'COURIER:', 'c1')),
+				writer.encode_obj({'orders': 2})
+			])
+
+	def tearDown(self):
+		os.remove(self.filename)
+
+	def test_read_events(self):
+		with EventLogReader(self.filename) as reader:
+			self.assertEqual(reader.config, {'strategy': 'matched', 'seed': 1})
+			self.assertEqual(list(reader.objects())[1], {'orders': 2})
+			events = list(reader.events())
+			self.assertEqual(len(events), 4)
+			self.assertEqual(events[2].event, 'COURIER DISPATCHED')
+			self.assertEqual(events[2].time, 0.5)
+			self.assertEqual(events[2].args, ['DELAY', 3.5, 'ORDER ASSIGNED', '2'])
+
+	def test_filter_events(self):
+		with EventLogReader(self.filename) as reader:
+			received = list(reader.events(['ORDER RECEIVED']))
+			self.assertEqual([event.id for event in received], ['1', '2'])
+			order = list(reader.events(order_id='2'))
+			self.assertEqual([event.event for event in order], ['ORDER RECEIVED', 'COURIER DISPATCHED', 'ORDER PICKED UP'])
+			self.assertEqual(list(reader.events(['ORDER PICKED UP'], '1')), [])
+
+	def test_not_binary_log(self):
+		with open(self.filename, 'w') as f:
+			f.write('00:00:00|ORDER RECEIVED|1|Banana Split\n')
+		with self.assertRaises(ValueError):
+			EventLogReader(self.filename)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,49 @@
+import io
+import os
+import sys
+import json
+import tempfile
+from unittest import TestCase, main
+
+sys.path.append('.')
+from utils.ingest import read_json_array, read_ndjson, read_orders, CHUNK_SIZE
+
+
+class TestIngest(TestCase):
+	def setUp(self):
+		with open('test/dispatch_orders.json') as f:
+			self.orders = json.load(f)
+
+	def test_json_array(self):
+		# Items split across chunks are parsed the same way
+		for chunk_size in [1, 7, 100, 1 << 16]:
+			with open('test/dispatch_orders.json') as f:
+				self.assertEqual(list(read_json_array(f, chunk_size)), self.orders)
+		self.assertEqual(list(read_json_array(io.StringIO(' [ ] '))), [])
+		with self.assertRaises(ValueError):
+			list(read_json_array(io.StringIO('[{"id": "1"}, {"id"')))
+		with self.assertRaises(ValueError):
+			list(read_json_array(io.StringIO('{"id": "1"}')))
+
+	def test_ndjson(self):
+		text = '\n'.join(json.dumps(o) for o in self.orders[:3]) + '\n\n'
+		self.assertEqual(list(read_ndjson(io.StringIO(text))), self.orders[:3])
+
+	def test_read_orders(self):
+		orders = read_orders('test/dispatch_orders.json')
+		self.assertEqual(next(orders), self.orders[0])
+		self.assertEqual(list(orders), self.orders[1:])
+		with tempfile.TemporaryDirectory() as tmp:
+			filename = os.path.join(tmp, 'orders.ndjson')
+			with open(filename, 'w') as f:
+				f.write('\n'.join(json.dumps(o) for o in self.orders))
+			self.assertEqual(list(read_orders(filename)), self.orders)
+			# Leading blanks longer than a chunk, before an array and before newline delimited JSON
+			for text in [json.dumps(self.orders, indent=4), '\n'.join(json.dumps(o) for o in self.orders)]:
+				with open(filename, 'w') as f:
+					f.write(' \n' * CHUNK_SIZE + text)
+				self.assertEqual(list(read_orders(filename)), self.orders)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,153 @@
+import io
+import sys
+import os
+import socket
+import tempfile
+import simpy
+from threading import Thread, Timer
+from time import monotonic
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.append('.')
+from configs import base_config
+from simulation import simulate_orders, receive_orders
+from utils import read_orders
+from utils.intake import LiveIntake, parse_intake_address, validate_order, feed_orders
+
+
+def live_config(address, mode='realtime'):
+	return base_config(
+		cooks_in_kitchen=30,
+		strategy='matched',
+		mode=mode,
+		factor=0.05,
+		live_intake=address
+	)
+
+
+class ReceivedOrders:
+	"""
+	Kitchen and Delivery of `receive_orders` recording the simulated time each order is received at
+	"""
+	def __init__(self, env):
+		self.env = env
+		self.times = {}
+		self.expected = None
+
+	def dispatch_new_courier(self, order):
+		pass
+
+	def create_order(self, order):
+		self.times[order.id] = self.env.now
+
+	def expect_orders(self, count):
+		self.expected = count
+
+
+class TestIntake(TestCase):
+	def test_address(self):
+		self.assertEqual(parse_intake_address(9000), ('tcp', '127.0.0.1', 9000))
+		self.assertEqual(parse_intake_address('0.0.0.0:9000'), ('tcp', '0.0.0.0', 9000))
+		self.assertEqual(parse_intake_address('unix:/tmp/intake.sock'), ('unix', '/tmp/intake.sock'))
+		for address in ['localhost', '127.0.0.1:70000', 'unix:']:
+			with self.assertRaises(ValueError):
+				parse_intake_address(address)
+
+	def test_validate_order(self):
+		self.assertIsNone(validate_order({'id': '1', 'name': 'a', 'prepTime': 1.5}))
+		self.assertEqual(validate_order([]), 'expected a JSON object')
+		self.assertEqual(validate_order({'id': '1', 'prepTime': 1}), 'missing name')
+		for order_id in [1, None, '', ['1']]:
+			self.assertEqual(validate_order({'id': order_id, 'name': 'a', 'prepTime': 1}), 'invalid id')
+		for name in [2, None, '']:
+			self.assertEqual(validate_order({'id': '1', 'name': name, 'prepTime': 1}), 'invalid name')
+		for prep_time in ['1', -1, True, None]:
+			self.assertEqual(validate_order({'id': '1', 'name': 'a', 'prepTime': prep_time}), 'invalid prepTime')
+
+	@patch('asyncio.log.logger.error')
+	@patch('sys.stderr', new_callable=io.StringIO)
+	def test_intake(self, mock_stderr, mock_error):
+		intake = LiveIntake('127.0.0.1:0')
+		client = socket.socket()
+		try:
+			with self.assertRaises(OSError):
+				LiveIntake(intake.address)
+			orders = [
+				{'id': '1', 'name': 'a', 'prepTime': 1},
+				{'id': '2', 'name': 'b'},
+				{'id': '3', 'name': 'c', 'prepTime': 2},
+				{'id': 5, 'name': 'e', 'prepTime': 1},
+				{'id': None, 'name': 'f', 'prepTime': 1}
+			]
+			result = feed_orders(intake.address, orders, connections=2, end=False)
+			self.assertEqual(result, {'sent': 5, 'accepted': 2, 'rejected': 3})
+			received, ended = intake.poll()
+			self.assertEqual(sorted(order['id'] for order in received), ['1', '3'])
+			self.assertFalse(ended)
+			feed_orders(intake.address, [{'id': '4', 'name': 'd', 'prepTime': 1}])
+			self.assertEqual(feed_orders(intake.address, orders[:1], end=False)['rejected'], 1)
+			self.assertEqual(intake.poll(), ([{'id': '4', 'name': 'd', 'prepTime': 1}], True))
+			self.assertEqual(intake.poll(), ([], False))
+			# A connection left open is closed with the intake
+			client.connect(parse_intake_address(intake.address)[1:])
+			client.sendall(b'END\n')
+			self.assertEqual(client.recv(64), b'OK END\n')
+		finally:
+			intake.close()
+		self.assertEqual(client.recv(64), b'')
+		client.close()
+		with socket.socket() as s:
+			self.assertNotEqual(s.connect_ex(parse_intake_address(intake.address)[1:]), 0)
+		# Errors of the event loop, e.g. the traceback of a cancelled connection, are logged to stderr
+		self.assertEqual(mock_stderr.getvalue(), '')
+		mock_error.assert_not_called()
+
+	def test_receive_time(self):
+		env = simpy.rt.RealtimeEnvironment(factor=0.1, strict=True)
+		intake = LiveIntake('127.0.0.1:0')
+		received = ReceivedOrders(env)
+
+		def tick():
+			while True:
+				yield env.timeout(10)
+		env.process(tick())
+		sent = {}
+
+		def send(order_id, end):
+			sent[order_id] = env.env_start + (monotonic() - env.real_start) / env.factor
+			feed_orders(intake.address, [{'id': order_id, 'name': order_id, 'prepTime': 1}], end=end)
+		# Both orders arrive between two ticks of the simulation, 1 simulated second after the other
+		Timer(0.3, send, ('1', False)).start()
+		Timer(0.4, send, ('2', True)).start()
+		env.run(until=env.process(receive_orders(env, intake, received, received)))
+		self.assertEqual(received.expected, 2)
+		for order_id in ['1', '2']:
+			self.assertGreaterEqual(received.times[order_id], sent[order_id])
+			self.assertLess(received.times[order_id], sent[order_id] + 0.5)
+		self.assertLess(env.now, 10)
+
+	@patch('asyncio.log.logger.error')
+	@patch('sys.stderr', new_callable=io.StringIO)
+	@patch('builtins.print')
+	def test_live_simulation(self, mock_print, mock_stderr, mock_error):
+		orders = list(read_orders('test/dispatch_orders.json'))
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			address = 'unix:' + os.path.join(tmp_dir, 'intake.sock')
+			results = {}
+			# The load generator retries until the simulation listens
+			feeder = Thread(target=lambda: results.update(feed_orders(address, orders, rate=400, connections=4)))
+			feeder.start()
+			metrics = simulate_orders([], live_config(address))
+			feeder.join()
+			self.assertFalse(os.path.exists(address[5:]))
+		self.assertEqual(results, {'sent': 132, 'accepted': 132, 'rejected': 0})
+		self.assertEqual(metrics['orders'], 132)
+		self.assertEqual(mock_stderr.getvalue(), 'INTAKE {0}\n'.format(address))
+		mock_error.assert_not_called()
+		with self.assertRaises(ValueError):
+			simulate_orders([], live_config(address, 'virtual'))
+
+
+if __name__ == "__main__":
+	main()
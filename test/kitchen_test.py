@@ -1,9 +1,10 @@
 import sys
+import simpy
 from unittest import TestCase, main
 from unittest.mock import patch, Mock
 
 sys.path.append('.')
-from models import Kitchen
+from models import Kitchen, Order
 
 
 mock_simpy_env = Mock()
@@ -11,6 +12,7 @@ mock_simpy_env.timeout = Mock()
 mock_simpy_env.process = Mock()
 mock_simpy_env.active_process = Mock(return_value=1)
 mock_simpy_env.schedule = Mock(return_value=1)
+mock_simpy_env.now = 0
 
 
 class TestSimulation(TestCase):
@@ -18,9 +20,9 @@ class TestSimulation(TestCase):
 	def test_kitchen(self, mock_print):
 		kitchen = Kitchen(mock_simpy_env, 1)
 		kitchen.run = lambda x: 1
-		order = {'id': '1', 'name': 'test', 'prepTime': 1}
-		order2 = {'id': '1', 'name': 'test', 'prepTime': 1}
-		order3 = {'id': '1', 'name': 'test', 'prepTime': 1}
+		order = Order('1', 'test', 1)
+		order2 = Order('2', 'test', 1)
+		order3 = Order('3', 'test', 1)
 
 		# Empty kitchen
 		self.assertEqual(len(kitchen.orders), 0)
@@ -36,7 +38,7 @@ class TestSimulation(TestCase):
 		self.assertEqual(len(kitchen.orders_for_delivery), 0)
 		self.assertEqual(len(kitchen.orders_delivered), 0)
 		self.assertEqual(kitchen.has_orders_for_delivery(), False)
-		self.assertIn('added_time', order)
+		self.assertIsNotNone(order.added_time)
 		mock_print.assert_called_once()
 		mock_print.reset_mock()
 
@@ -46,7 +48,7 @@ class TestSimulation(TestCase):
 		self.assertEqual(len(kitchen.orders_for_delivery), 1)
 		self.assertEqual(len(kitchen.orders_delivered), 0)
 		self.assertEqual(kitchen.has_orders_for_delivery(), True)
-		self.assertIn('end_time', order)
+		self.assertIsNotNone(order.end_time)
 		mock_print.assert_called_once()
 		mock_print.reset_mock()
 
@@ -56,15 +58,15 @@ class TestSimulation(TestCase):
 		self.assertEqual(len(kitchen.orders_for_delivery), 0)
 		self.assertEqual(len(kitchen.orders_delivered), 1)
 		self.assertEqual(kitchen.has_orders_for_delivery(), False)
-		self.assertIn('delivered_time', delivered_order)
-		self.assertIn('wait_time', delivered_order)
+		self.assertIsNotNone(delivered_order.delivered_time)
+		self.assertIsNotNone(delivered_order.wait_time)
 		mock_print.assert_not_called()
 		mock_print.reset_mock()
 
 		kitchen.create_order(order2)
 		kitchen.create_order(order3)
 		for _ in kitchen.process_order(order2, None): pass
-		for _ in kitchen.process_order(order2, None): pass
+		for _ in kitchen.process_order(order3, None): pass
 		mock_print.reset_mock()
 		delivered_order = kitchen.pickup_order_for_delivery(order2)
 		self.assertEqual(len(kitchen.orders), 3)
@@ -72,10 +74,59 @@ class TestSimulation(TestCase):
 		self.assertEqual(len(kitchen.orders_for_delivery), 1)
 		self.assertEqual(len(kitchen.orders_delivered), 2)
 		self.assertEqual(kitchen.has_orders_for_delivery(), True)
-		self.assertIn('delivered_time', delivered_order)
-		self.assertIn('wait_time', delivered_order)
+		self.assertIsNotNone(delivered_order.delivered_time)
+		self.assertIsNotNone(delivered_order.wait_time)
 		mock_print.assert_not_called()
 
+	@patch('builtins.print')
+	def test_policies(self, mock_print):
+		expected = {
+			'fifo': {'1': 5, '2': 6, '3': 9},
+			'spt': {'2': 1, '3': 4, '1': 9},
+			# Courier of order 3 arrives first, order 1 has no courier
+			'earliest_courier': {'3': 3, '2': 4, '1': 9},
+			'priority': {'2': 1, '1': 6, '3': 9}
+		}
+		for policy, end_times in expected.items():
+			env = simpy.Environment()
+			kitchen = Kitchen(env, 1, policy)
+			orders = [Order('1', 'test', 5, 1), Order('2', 'test', 1, 0), Order('3', 'test', 3, 2)]
+			orders[1].courier_eta = 8
+			orders[2].courier_eta = 4
+			for order in orders:
+				kitchen.create_order(order)
+			env.run()
+			self.assertEqual({order.id: order.end_time for order in orders}, end_times, policy)
+
+	@patch('builtins.print')
+	def test_preemptive(self, mock_print):
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 1, 'priority', preemptive=True)
+		low = Order('1', 'test', 5, 1)
+		high = Order('2', 'test', 2, 0)
+		kitchen.create_order(low)
+
+		def urgent_order():
+			yield env.timeout(1)
+			kitchen.create_order(high)
+		env.process(urgent_order())
+		env.run()
+		# The urgent order preempts the cook, the first order resumes for its remaining 4 seconds
+		self.assertEqual((high.start_time, high.end_time), (1, 3))
+		self.assertEqual((low.start_time, low.end_time), (0, 7))
+		self.assertEqual(len(kitchen.orders_for_delivery), 2)
+
+		# Orders received at the same time: the second one takes the cook before the first one starts
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 1, 'priority', preemptive=True)
+		low = Order('1', 'test', 5, 1)
+		high = Order('2', 'test', 2, 0)
+		kitchen.create_order(low)
+		kitchen.create_order(high)
+		env.run()
+		self.assertEqual((high.start_time, high.end_time), (0, 2))
+		self.assertEqual((low.start_time, low.end_time), (2, 7))
+
 
 if __name__ == "__main__":
 	main()
@@ -0,0 +1,78 @@
+import io
+import sys
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch, Mock
+
+sys.path.append('.')
+from utils import log
+from utils.log import log_init, log_event, log_stdout, log_flush, log_close, LOG_LEVEL_EVENTS
+
+
+class TestLog(TestCase):
+	def config(self, **kwargs):
+		config = {'strategy': 'fifo', 'mode': 'virtual', 'courier_arrival_dist_fnc': None}
+		config.update(kwargs)
+		return config
+
+	@patch('sys.stdout', new_callable=io.StringIO)
+	def test_async_stdout(self, mock_stdout):
+		env = Mock()
+		env.now = 3661.5
+		log_init(self.config(log_sinks=('stdout',)), env)
+		self.assertIsNotNone(log.log_thread)
+		self.assertIsNone(log.log_file)
+		for idx in range(10):
+			log_event('ORDER RECEIVED', str(idx), 'test')
+		log_stdout('DETAILS')
+		log_flush()
+		lines = mock_stdout.getvalue().splitlines()
+		self.assertEqual(len(lines), 11)
+		self.assertEqual(lines[0].split(), ['01:01:01', 'ORDER', 'RECEIVED', '0', 'test'])
+		self.assertEqual(lines[9].split()[3], '9')
+		self.assertEqual(lines[10], 'DETAILS')
+		log_close()
+		self.assertIsNone(log.log_thread)
+
+	@patch('sys.stdout', new_callable=io.StringIO)
+	def test_log_level(self, mock_stdout):
+		env = Mock()
+		env.now = 0
+		log_init(self.config(log_sinks=('stdout',), log_level=LOG_LEVEL_EVENTS), env)
+		log_event('ORDER RECEIVED', '1', 'test')
+		log_stdout('DETAILS')
+		log_close()
+		self.assertEqual(len(mock_stdout.getvalue().splitlines()), 1)
+
+	@patch('builtins.print')
+	def test_no_sinks(self, mock_print):
+		log_init(self.config(log_sinks=('none',)), Mock())
+		self.assertIsNone(log.log_thread)
+		log_event('ORDER RECEIVED', '1', 'test')
+		log_stdout('DETAILS')
+		log_flush()
+		log_close()
+		mock_print.assert_not_called()
+
+	def test_writer_error(self):
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			env = Mock()
+			env.now = 0
+			log_init(self.config(log_sinks=('file',), log_dir=tmp_dir), env)
+			# The text events log only takes string ids
+			log_event('ORDER RECEIVED', 1, 'test')
+			with self.assertRaises(TypeError):
+				log_flush()
+			self.assertIsNone(log.log_thread)
+			self.assertIsNone(log.log_file)
+
+			log_init(self.config(log_sinks=('file',), log_dir=tmp_dir), env)
+			log_event('ORDER RECEIVED', None, 'test')
+			log_event('ORDER RECEIVED', '2', 'test')
+			with self.assertRaises(TypeError):
+				log_close()
+			self.assertIsNone(log.log_error)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,75 @@
+import sys
+import csv
+import os
+import simpy
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+from urllib.request import urlopen
+
+sys.path.append('.')
+from models import Kitchen, Delivery, Order
+from utils.metrics import Histogram, LiveMetrics, SERIES_COLUMNS
+
+
+class TestMetrics(TestCase):
+	def test_histogram(self):
+		histogram = Histogram([1, 5])
+		self.assertEqual(histogram.mean(), 0.0)
+		for x in [0.5, 1, 3, 10]:
+			histogram.add(x)
+		self.assertEqual(histogram.count, 4)
+		self.assertEqual(histogram.mean(), 3.625)
+		self.assertEqual(histogram.cumulative_counts(), [(1, 2), (5, 3), ('+Inf', 4)])
+
+	@patch('builtins.print')
+	def test_live_metrics(self, mock_print):
+		def dist_fnc(x, y): return 3
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'metrics.csv')
+			env = simpy.Environment()
+			kitchen = Kitchen(env, 1)
+			delivery = Delivery(env, kitchen, 'matched', arrival_dist_fnc=dist_fnc)
+			metrics = LiveMetrics(env, kitchen, delivery, 1, filename, labels={'strategy': 'matched'})
+			for order in [Order('1', 'test', 2), Order('2', 'test', 2)]:
+				kitchen.create_order(order)
+				delivery.dispatch_new_courier(order)
+			delivery.expect_orders(2)
+			env.run(until=delivery.all_done)
+			metrics.close()
+			with open(filename) as f:
+				rows = list(csv.DictReader(f))
+
+		self.assertEqual(list(rows[0]), SERIES_COLUMNS)
+		self.assertEqual([float(row['time']) for row in rows], [0, 1, 2, 3, 4, 4])
+		# 1 cook: the second order waits in the queue until the first is prepared
+		self.assertEqual(int(rows[1]['orders_queued']), 1)
+		self.assertEqual(int(rows[1]['cooks_busy']), 1)
+		self.assertEqual(int(rows[-1]['orders_delivered']), 2)
+		self.assertEqual(int(rows[-1]['couriers_waiting']), 0)
+		self.assertEqual(float(rows[-1]['cook_utilization']), 1.0)
+		self.assertEqual(float(rows[-1]['avg_order_wait_time']), 0.5)
+		self.assertEqual(float(rows[-1]['avg_courier_wait_time']), 0.5)
+
+		text = metrics.prometheus()
+		self.assertIn('# TYPE delivery_simulation_orders_delivered_total counter', text)
+		self.assertIn('delivery_simulation_orders_delivered_total{strategy="matched"} 2', text)
+		self.assertIn('delivery_simulation_courier_wait_seconds_bucket{strategy="matched",le="+Inf"} 2', text)
+		self.assertIn('delivery_simulation_order_wait_seconds_count{strategy="matched"} 2', text)
+
+	@patch('builtins.print')
+	def test_endpoint(self, mock_print):
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 1)
+		delivery = Delivery(env, kitchen, 'fifo')
+		metrics = LiveMetrics(env, kitchen, delivery, 1, port=0)
+		try:
+			with urlopen('http://127.0.0.1:{0}/metrics'.format(metrics.port), timeout=5) as response:
+				self.assertEqual(response.status, 200)
+				self.assertIn('delivery_simulation_orders_received_total 0', response.read().decode())
+		finally:
+			metrics.close()
+
+
+if __name__ == "__main__":
+	main()
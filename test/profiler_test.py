@@ -0,0 +1,65 @@
+import sys
+import os
+import pstats
+import simpy
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.append('.')
+from models import Kitchen, Delivery, Order
+from utils.profiler import StepProfiler
+
+
+def setup(env):
+	kitchen = Kitchen(env, 1)
+	delivery = Delivery(env, kitchen, 'matched', arrival_dist_fnc=lambda x, y: 1)
+	for order in [Order('1', 'test', 1), Order('2', 'test', 2)]:
+		kitchen.create_order(order)
+		delivery.dispatch_new_courier(order)
+	delivery.expect_orders(2)
+	return delivery
+
+
+class TestProfiler(TestCase):
+	@patch('builtins.print')
+	def test_profiler(self, mock_print):
+		env = simpy.Environment()
+		delivery = setup(env)
+		profiler = StepProfiler(env)
+		env.run(until=delivery.all_done)
+
+		names = {name: events for (_, _, name), (events, _) in profiler.stats.items()}
+		self.assertGreater(names['Kitchen.process_order'], 0)
+		self.assertGreater(names['Delivery.__dispatch_new_courier'], 0)
+		# The AnyOf of the courier and order matching resumes Delivery.run, at least once for each order
+		self.assertGreaterEqual(names['Delivery.run'], 2)
+		self.assertNotIn('Condition._build_value', names)
+		self.assertEqual(sum(names.values()), profiler.events)
+		self.assertEqual(len(profiler.slowest), 10)
+		self.assertEqual(profiler.lag.count, 0)
+
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'profile')
+			profiler.dump_pstats(filename + '.prof')
+			stats = pstats.Stats(filename + '.prof')
+			self.assertEqual(stats.total_calls, profiler.events)
+			profiler.dump_folded(filename + '.folded')
+			with open(filename + '.folded') as f:
+				lines = f.read().splitlines()
+		self.assertEqual(len(lines), len(profiler.stats))
+		self.assertIn('env.step;Kitchen.process_order', [line.rsplit(' ', 1)[0] for line in lines])
+
+	@patch('builtins.print')
+	def test_realtime_lag(self, mock_print):
+		env = simpy.rt.RealtimeEnvironment(factor=0.01, strict=True)
+		delivery = setup(env)
+		profiler = StepProfiler(env)
+		env.run(until=delivery.all_done)
+		self.assertEqual(profiler.lag.count, profiler.events)
+		self.assertLess(profiler.max_lag, 0.01)
+		profiler.print_report()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,33 @@
+import sys
+from unittest import TestCase, main
+
+sys.path.append('.')
+from replication import replication_configs, run_replications, REPLICATION_METRICS
+
+
+class TestReplication(TestCase):
+	def test_replications(self):
+		configs = replication_configs({
+			'orders_per_second': 2,
+			'cooks_in_kitchen': 1,
+			'courier_arrival_time_min': 3,
+			'courier_arrival_time_max': 15
+		}, 3, ['fifo', 'matched'], seed=5)
+		self.assertEqual(len(configs), 6)
+		self.assertEqual([c['seed'] for c in configs], [5, 5, 6, 6, 7, 7])
+
+		results = list(run_replications('test/orders_test.json', configs, workers=1))
+		self.assertEqual(len(results), 6)
+		_, stats = results[-1]
+		for strategy in ['fifo', 'matched']:
+			for metric in REPLICATION_METRICS:
+				self.assertEqual(stats[strategy][metric].replication_means.count, 3)
+				self.assertEqual(stats[strategy][metric].samples.count, 15)
+				summary = stats[strategy][metric].summary()
+				self.assertLessEqual(summary['ci_low'], summary['mean'])
+				self.assertLessEqual(summary['mean'], summary['ci_high'])
+				self.assertLessEqual(summary['p50'], summary['p99'])
+
+
+if __name__ == "__main__":
+	main()
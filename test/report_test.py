@@ -0,0 +1,66 @@
+import sys
+import io
+import csv
+import json
+from unittest import TestCase, main
+
+sys.path.append('.')
+from models import Courier, CourierResults
+from utils.report import COURIER_COLUMNS, report_rows, render_text, write_csv, write_json
+
+
+def courier_results(wait_times):
+	couriers = CourierResults()
+	for idx, wait_time in enumerate(wait_times, 1):
+		courier = Courier('courier-{0}'.format(idx), 3, 'order-{0}'.format(idx))
+		courier.arrival_time = idx
+		courier.delivery_time = idx + wait_time
+		courier.wait_time = wait_time
+		couriers.append(courier)
+	return couriers
+
+
+class TestReport(TestCase):
+	def test_rows(self):
+		couriers = courier_results([1, 5, 0, 5, 2])
+		self.assertEqual(list(report_rows(couriers)), [0, 1, 2, 3, 4])
+		self.assertEqual(list(report_rows(couriers, offset=1, limit=2)), [1, 2])
+		self.assertEqual(list(report_rows(couriers, offset=4, limit=2)), [4])
+		self.assertEqual(list(report_rows(couriers, offset=6)), [])
+		# Top N and the full sort agree, ties in pickup order
+		self.assertEqual(report_rows(couriers, 'wait'), [1, 3, 4, 0, 2])
+		self.assertEqual(report_rows(couriers, 'wait', limit=3), [1, 3, 4])
+		self.assertEqual(report_rows(couriers, 'wait', offset=1, limit=2), [3, 4])
+		with self.assertRaises(ValueError):
+			report_rows(couriers, 'name')
+
+	def test_render(self):
+		couriers = courier_results([1, 5.5])
+		lines = render_text(couriers, COURIER_COLUMNS, 'COURIERS', report_rows(couriers, 'wait', limit=1)).split('\n')
+		self.assertEqual(lines[1], '- COURIERS')
+		self.assertEqual(len(lines), 4)
+		self.assertTrue(lines[3].startswith('{0:>37}{1:>37}'.format('courier-2', 'order-2')))
+		self.assertTrue(lines[3].endswith('    5.5000s'))
+
+	def test_csv_json(self):
+		couriers = courier_results([1, 5.5, 2])
+		rows = report_rows(couriers, 'wait')
+		f = io.StringIO(newline='')
+		write_csv(f, couriers, COURIER_COLUMNS, rows)
+		f.seek(0)
+		records = list(csv.DictReader(f))
+		self.assertEqual([record['id'] for record in records], ['courier-2', 'courier-3', 'courier-1'])
+		self.assertEqual(float(records[0]['wait_time']), 5.5)
+		f = io.StringIO()
+		write_json(f, couriers, COURIER_COLUMNS, rows)
+		records = json.loads(f.getvalue())
+		self.assertEqual(records[0], {
+			'id': 'courier-2', 'order_id': 'order-2', 'arrival_time': 2, 'delivery_time': 7.5, 'wait_time': 5.5
+		})
+		f = io.StringIO()
+		write_json(f, couriers, COURIER_COLUMNS, [])
+		self.assertEqual(json.loads(f.getvalue()), [])
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,65 @@
+import sys
+from unittest import TestCase, main
+
+sys.path.append('.')
+from configs import base_config
+from models import Order, Courier, OrderResults, CourierResults
+from simulation import keep_simulation_results
+
+
+class TestResults(TestCase):
+	def test_order_results(self):
+		results = OrderResults()
+		self.assertEqual(len(results), 0)
+		self.assertEqual(results.avg_wait_time(), 0.0)
+		for idx, wait_time in enumerate([1.0, 3.0]):
+			order = Order.from_dict({'id': str(idx), 'name': 'test', 'prepTime': 2})
+			order.added_time, order.start_time, order.end_time = 0.0, 1.0, 3.0
+			order.delivered_time = order.end_time + wait_time
+			order.wait_time = wait_time
+			results.append(order)
+		self.assertEqual(len(results), 2)
+		self.assertEqual(results.ids, ['0', '1'])
+		self.assertEqual(list(results.delivered_times), [4.0, 6.0])
+		self.assertEqual(results.avg_wait_time(), 2.0)
+
+	def test_courier_results(self):
+		results = CourierResults()
+		self.assertEqual(results.avg_wait_time(), 0.0)
+		courier = Courier('c1', 5.0, '1')
+		courier.arrival_time, courier.delivery_time, courier.wait_time = 5.0, 7.0, 2.0
+		results.append(courier)
+		self.assertEqual(results.order_ids, ['1'])
+		self.assertEqual(results.avg_wait_time(), 2.0)
+		try:
+			import numpy
+		except ImportError:
+			return
+		columns = results.to_numpy()
+		self.assertEqual(columns['wait_times'].dtype, numpy.float64)
+		self.assertEqual(columns['wait_times'].tolist(), [2.0])
+
+	def test_aggregates_only(self):
+		orders, couriers = OrderResults(columns=False), CourierResults(columns=False)
+		for idx, wait_time in enumerate([1.0, 3.0]):
+			order = Order.from_dict({'id': str(idx), 'name': 'test', 'prepTime': 2})
+			order.wait_time = wait_time
+			orders.append(order)
+			courier = Courier('c' + str(idx), 5.0, str(idx))
+			courier.wait_time = wait_time * 2
+			couriers.append(courier)
+		self.assertEqual((len(orders), orders.avg_wait_time()), (2, 2.0))
+		self.assertEqual((len(couriers), couriers.avg_wait_time()), (2, 4.0))
+		self.assertEqual((orders.ids, list(orders.wait_times), couriers.ids), ([], [], []))
+
+	def test_keep_simulation_results(self):
+		self.assertFalse(keep_simulation_results(base_config()))
+		self.assertFalse(keep_simulation_results(base_config(print_info=True)))
+		self.assertTrue(keep_simulation_results(base_config(print_info=True, log_sinks=('stdout',))))
+		self.assertFalse(keep_simulation_results(base_config(report_format='csv', log_sinks=('stdout',))))
+		self.assertTrue(keep_simulation_results(base_config(report_format='csv', log_sinks=('file',))))
+		self.assertTrue(keep_simulation_results(base_config(keep_results=True)))
+
+
+if __name__ == "__main__":
+	main()
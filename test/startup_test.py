@@ -0,0 +1,39 @@
+import sys
+import os
+import json
+import tempfile
+from unittest import TestCase, main
+from click.testing import CliRunner
+
+sys.path.append('.')
+from cli import cli
+from benchmarks.startup import imported_modules, measure_startup
+from utils import read_orders
+
+
+class TestStartup(TestCase):
+	def test_lazy_imports(self):
+		self.assertEqual(imported_modules(), [])
+		self.assertEqual(len(measure_startup(['--help'], 1)), 1)
+
+	def test_replay(self):
+		orders = list(read_orders('test/dispatch_orders.json'))[:10]
+		with tempfile.TemporaryDirectory() as tmp_dir:
+			filename = os.path.join(tmp_dir, 'trace.ndjson')
+			with open(filename, 'w') as f:
+				f.write('\n'.join(json.dumps(dict(order, arrivalTime=idx * 2)) for idx, order in enumerate(orders)))
+			log_dir = os.path.join(tmp_dir, 'logs')
+			result = CliRunner().invoke(cli, [
+				'replay', '-m', 'virtual', '-l', 'file', '--log_dir', log_dir, '--strategies', 'matched', filename
+			])
+			self.assertEqual(result.exit_code, 0, result.output)
+			logs = os.listdir(log_dir)
+			self.assertEqual(len(logs), 1)
+			with open(os.path.join(log_dir, logs[0])) as f:
+				self.assertIn("'trace': True", f.readline())
+		result = CliRunner().invoke(cli, ['bench', 'unknown'])
+		self.assertEqual(result.exit_code, 2)
+
+
+if __name__ == "__main__":
+	main()
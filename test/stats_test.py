@@ -0,0 +1,68 @@
+import sys
+import statistics
+from random import Random
+from unittest import TestCase, main
+
+sys.path.append('.')
+from utils.stats import RunningStats, P2Quantile, t_quantile, confidence_interval
+
+
+class TestStats(TestCase):
+	def setUp(self):
+		rng = Random(1)
+		self.samples = [rng.expovariate(1) for _ in range(20000)]
+
+	def test_running_stats(self):
+		stats = RunningStats()
+		self.assertEqual(stats.variance(), 0.0)
+		for x in self.samples:
+			stats.add(x)
+		self.assertEqual(stats.count, len(self.samples))
+		self.assertAlmostEqual(stats.mean, statistics.mean(self.samples))
+		self.assertAlmostEqual(stats.variance(), statistics.variance(self.samples))
+
+		# Merging partial stats gives the same result
+		first, second = RunningStats(), RunningStats()
+		for x in self.samples[:500]:
+			first.add(x)
+		for x in self.samples[500:]:
+			second.add(x)
+		first.merge(second)
+		self.assertEqual(first.count, stats.count)
+		self.assertAlmostEqual(first.mean, stats.mean)
+		self.assertAlmostEqual(first.variance(), stats.variance())
+
+	def test_p2_quantile(self):
+		ordered = sorted(self.samples)
+		for p in [0.5, 0.95, 0.99]:
+			quantile = P2Quantile(p)
+			for x in self.samples:
+				quantile.add(x)
+			exact = ordered[int(p * len(ordered))]
+			self.assertAlmostEqual(quantile.value(), exact, delta=exact * 0.02)
+
+		# Exact with few observations
+		quantile = P2Quantile(0.5)
+		self.assertEqual(quantile.value(), 0.0)
+		for x in [3, 1, 2]:
+			quantile.add(x)
+		self.assertEqual(quantile.value(), 2)
+
+	def test_confidence_interval(self):
+		self.assertAlmostEqual(t_quantile(0.975, 1), 12.7062, places=3)
+		self.assertAlmostEqual(t_quantile(0.975, 2), 4.3027, places=3)
+		self.assertAlmostEqual(t_quantile(0.975, 5), 2.5706, places=2)
+		self.assertAlmostEqual(t_quantile(0.975, 30), 2.0423, places=3)
+
+		stats = RunningStats()
+		stats.add(1.0)
+		self.assertEqual(confidence_interval(stats), (1.0, 1.0))
+		for x in [2.0, 3.0, 4.0]:
+			stats.add(x)
+		low, high = confidence_interval(stats, 0.95)
+		self.assertAlmostEqual(stats.mean - low, high - stats.mean)
+		self.assertAlmostEqual(high - stats.mean, 3.1824 * stats.stdev() / 2, places=2)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import csv
+import tempfile
+from unittest import TestCase, main
+
+sys.path.append('.')
+from configs import base_config
+from sweep import parse_range, sweep_configs, run_sweep, write_rows, checkpoint_base_config, SWEEP_COLUMNS
+from simulation import simulate_orders
+from utils import read_orders
+from utils.checkpoint import load_checkpoint
+
+
+class TestSweep(TestCase):
+	def test_parse_range(self):
+		self.assertEqual(parse_range('2'), [2])
+		self.assertEqual(parse_range('1,2,4'), [1, 2, 4])
+		self.assertEqual(parse_range('1:3'), [1, 2, 3])
+		self.assertEqual(parse_range('1:9:4,20'), [1, 5, 9, 20])
+
+	def test_sweep(self):
+		grid = {
+			'orders_per_second': [1, 2],
+			'cooks_in_kitchen': [1],
+			'courier_arrival_time_min': [3, 20],
+			'courier_arrival_time_max': [15]
+		}
+		configs = sweep_configs(grid, ['fifo', 'matched'], {}, seed=10)
+		# min > max combinations are skipped
+		self.assertEqual(len(configs), 4)
+		self.assertEqual([c['seed'] for c in configs], [10, 10, 12, 12])
+		for config in configs:
+			self.assertEqual(config['mode'], 'virtual')
+			self.assertEqual(config['log_sinks'], ())
+
+		rows = run_sweep('test/orders_test.json', configs, workers=1)
+		self.assertEqual(len(rows), 4)
+		self.assertEqual([r['strategy'] for r in rows], ['fifo', 'matched', 'fifo', 'matched'])
+		for row in rows:
+			self.assertEqual(row['orders'], 5)
+		# Seeded runs are reproducible
+		self.assertEqual(run_sweep('test/orders_test.json', configs[:1], workers=1)[0]['avg_courier_wait_time'],
+						 rows[0]['avg_courier_wait_time'])
+
+		with tempfile.TemporaryDirectory() as tmp:
+			filename = os.path.join(tmp, 'sweep.csv')
+			write_rows(rows, filename)
+			with open(filename) as f:
+				table = list(csv.DictReader(f))
+			self.assertEqual(len(table), 4)
+			self.assertEqual(list(table[0].keys()), SWEEP_COLUMNS)
+
+	def test_sweep_checkpoint(self):
+		with tempfile.TemporaryDirectory() as tmp:
+			filename = os.path.join(tmp, 'warmup.checkpoint')
+			simulate_orders(read_orders('test/orders_test.json'), base_config(
+				orders_per_second=1,
+				cooks_in_kitchen=2,
+				strategy='matched',
+				seed=0,
+				checkpoint_interval=2,
+				checkpoint_file=filename,
+				checkpoint_stop=True
+			))
+			resumed_config = checkpoint_base_config(load_checkpoint(filename))
+			grid = {
+				'orders_per_second': [1, 2],
+				'cooks_in_kitchen': [resumed_config['cooks_in_kitchen']],
+				'courier_arrival_time_min': [3],
+				'courier_arrival_time_max': [15]
+			}
+			configs = sweep_configs(grid, [resumed_config['strategy']], resumed_config, seed=10)
+			rows = run_sweep('test/orders_test.json', configs, workers=1, checkpoint=filename)
+		self.assertEqual(len(rows), 2)
+		for row in rows:
+			self.assertEqual(row['orders'], 5)
+			self.assertEqual(row['cooks_in_kitchen'], 2)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,44 @@
+import sys
+from unittest import TestCase, main
+
+sys.path.append('.')
+from configs import base_config
+from topology import load_topology, run_topology, rebalance, OrderRouter
+
+
+class TestTopology(TestCase):
+	def setUp(self):
+		self.topology = load_topology('test/topology_test.json')
+		self.config = base_config(cooks_in_kitchen=1)
+
+	def test_router(self):
+		router = OrderRouter(self.topology)
+		order = {'id': 'a8cfcb76-7f24-4420-a5ba-d46dd77bdffd'}
+		self.assertEqual(router.region(0, order), router.region(7, order))
+		self.assertEqual(router.region(0, dict(order, kitchen='west-1')), 2)
+		self.assertEqual(router.region(0, dict(order, region='south')), 1)
+
+	def test_rebalance(self):
+		statuses = {
+			0: {'idle': 4, 'waiting': 0, 'done': False},
+			1: {'idle': 0, 'waiting': 3, 'done': False},
+			2: {'idle': 1, 'waiting': 0, 'done': True}
+		}
+		# Pending regions lend half of their idle couriers, done regions all of them
+		self.assertEqual(rebalance(statuses), {0: -2, 1: 3, 2: -1})
+		statuses[1]['waiting'] = 0
+		self.assertEqual(rebalance(statuses), {})
+
+	def test_run_topology(self):
+		metrics, kitchens = run_topology('test/dispatch_orders.json', self.topology, self.config, workers=1)
+		self.assertEqual(metrics['orders'], 132)
+		self.assertEqual(sum(k['orders'] for k in kitchens), 132)
+		self.assertEqual([k['kitchen'] for k in kitchens], ['north-1', 'north-2', 'south-1', 'west-1'])
+		self.assertEqual(metrics['simulation_time'], max(k['end_time'] for k in kitchens))
+		# Regions are seeded by their index, the partitioning across processes does not change the results
+		self.assertEqual(run_topology('test/dispatch_orders.json', self.topology, self.config, workers=2),
+						 (metrics, kitchens))
+
+
+if __name__ == "__main__":
+	main()
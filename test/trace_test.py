@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import simpy
+import tempfile
+from unittest import TestCase, main
+from unittest.mock import patch
+
+sys.path.append('.')
+from configs import base_config
+from models import Kitchen, Delivery
+from simulation import simulate_orders, replay_orders
+from utils import read_orders, read_traces
+from utils.checkpoint import load_checkpoint
+
+
+def write_orders(filename, orders):
+	with open(filename, 'w') as f:
+		f.write('\n'.join(json.dumps(order) for order in orders))
+
+
+def trace_config(strategy, compression=1):
+	return base_config(strategy=strategy, trace=True, trace_compression=compression)
+
+
+class TestTrace(TestCase):
+	def setUp(self):
+		self.tmp_dir = tempfile.TemporaryDirectory()
+		orders = list(read_orders('test/dispatch_orders.json'))
+		# Bursts of orders in two traces, the first one with ISO 8601 timestamps and courier observations
+		self.first = os.path.join(self.tmp_dir.name, 'first.ndjson')
+		self.second = os.path.join(self.tmp_dir.name, 'second.ndjson')
+		write_orders(self.first, [
+			dict(
+				order,
+				arrivalTime='2020-06-05T19:{0:02d}:{1:02d}+00:00'.format(idx // 6, idx % 6 * 10),
+				courierArrivalTime='2020-06-05T19:{0:02d}:{1:02d}+00:00'.format(idx // 6 + 1, idx % 6 * 10)
+			)
+			for idx, order in enumerate(orders[:60])
+		])
+		write_orders(self.second, [
+			dict(order, arrivalTime=1591385400 + idx // 3 * 7) for idx, order in enumerate(orders[60:])
+		])
+
+	def tearDown(self):
+		self.tmp_dir.cleanup()
+
+	def test_merge(self):
+		orders = list(read_traces([self.first, self.second]))
+		self.assertEqual(len(orders), 132)
+		arrival_times = [order['arrivalTime'] for order in orders]
+		self.assertEqual(arrival_times, sorted(arrival_times))
+		self.assertEqual(orders[0]['courierArrivalTime'] - orders[0]['arrivalTime'], 60)
+		unsorted = os.path.join(self.tmp_dir.name, 'unsorted.ndjson')
+		write_orders(unsorted, [
+			{'id': '1', 'name': 'a', 'prepTime': 1, 'arrivalTime': 5},
+			{'id': '2', 'name': 'b', 'prepTime': 1, 'arrivalTime': 4}
+		])
+		with self.assertRaises(ValueError):
+			list(read_traces([self.first, unsorted]))
+
+	@patch('builtins.print')
+	def test_replay(self, mock_print):
+		env = simpy.Environment()
+		kitchen = Kitchen(env, 10)
+		delivery = Delivery(env, kitchen, 'matched', arrival_dist_fnc=lambda x, y: 5)
+		orders = [
+			{'id': '1', 'name': 'a', 'prepTime': 1, 'arrivalTime': 100, 'courierArrivalTime': 102},
+			{'id': '2', 'name': 'b', 'prepTime': 1, 'arrivalTime': 100},
+			{'id': '3', 'name': 'c', 'prepTime': 1, 'arrivalTime': 130, 'courierArrivalTime': 160}
+		]
+		env.process(replay_orders(env, orders, kitchen, delivery, compression=3))
+		env.run(until=delivery.all_done)
+		self.assertEqual(list(kitchen.orders_delivered.added_times), [0, 0, 10])
+		# Courier delays are not compressed
+		self.assertEqual(sorted(delivery.couriers_done.arrival_times), [2, 5, 40])
+
+	def test_compression(self):
+		config = trace_config('fifo')
+		normal = simulate_orders(read_traces([self.first, self.second]), config)
+		compressed = simulate_orders(read_traces([self.first, self.second]), dict(config, trace_compression=4))
+		self.assertEqual(normal['orders'], compressed['orders'])
+		self.assertLess(compressed['simulation_time'], normal['simulation_time'])
+		self.assertGreater(compressed['avg_courier_wait_time'], normal['avg_courier_wait_time'])
+
+	def test_resume(self):
+		filename = os.path.join(self.tmp_dir.name, 'simulation.checkpoint')
+		for strategy in ['fifo', 'matched']:
+			config = trace_config(strategy, 2)
+			expected = simulate_orders(read_traces([self.first, self.second]), config)
+			config.update({'checkpoint_interval': 45, 'checkpoint_file': filename, 'checkpoint_stop': True})
+			simulate_orders(read_traces([self.first, self.second]), config)
+			config['checkpoint_interval'] = None
+			resumed = simulate_orders(read_traces([self.first, self.second]), config, load_checkpoint(filename))
+			self.assertEqual(resumed['orders'], expected['orders'])
+			self.assertAlmostEqual(resumed['simulation_time'], expected['simulation_time'])
+			self.assertAlmostEqual(resumed['avg_order_wait_time'], expected['avg_order_wait_time'])
+			self.assertAlmostEqual(resumed['avg_courier_wait_time'], expected['avg_courier_wait_time'])
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,448 @@
+import json
+import zlib
+import simpy
+from collections import deque
+from multiprocessing import Process, Pipe
+from models import Kitchen, Delivery, Order, STRATEGIES
+from models.kitchen import KITCHEN_POLICY
+from utils import read_orders, log_init, log_close
+from utils.distributions import courier_arrival_distribution
+
+
+# Topology file (JSON):
+#   'router': how orders are routed to regions, 'hash' of the order ID | 'round_robin' over the orders file
+#   'sync_interval': simulated seconds between the synchronization barriers where regions exchange idle couriers
+#   'regions': list of regions
+#     'name': region name
+#     'couriers': size of the courier pool shared by the kitchens of the region, omitted for an unlimited fleet
+#     'kitchen_router': how orders are routed to the kitchens of the region, see KITCHEN_ROUTERS
+#     'kitchens': list of kitchens, 'name' and optionally any of KITCHEN_PARAMETERS
+# Orders with a 'kitchen' or 'region' attribute are routed to that kitchen or region.
+REGION_ROUTERS = ['hash', 'round_robin']
+KITCHEN_ROUTERS = ['least_loaded', 'round_robin', 'hash']
+KITCHEN_PARAMETERS = [
+	'cooks_in_kitchen', 'strategy', 'courier_arrival_time_min', 'courier_arrival_time_max', 'batch_interval',
+	'kitchen_policy', 'kitchen_preemptive'
+]
+SYNC_INTERVAL = 60
+
+
+def load_topology(filename):
+	"""
+	:param filename: topology file
+	:return: topology object, see the topology file format
+	"""
+	with open(filename) as f:
+		topology = json.load(f)
+	if topology.get('router', 'hash') not in REGION_ROUTERS:
+		raise ValueError('Unknown region router: {0}'.format(topology['router']))
+	if not topology.get('regions'):
+		raise ValueError('The topology has no regions')
+	kitchens = set()
+	for region in topology['regions']:
+		if region.get('kitchen_router', 'least_loaded') not in KITCHEN_ROUTERS:
+			raise ValueError('Unknown kitchen router: {0}'.format(region['kitchen_router']))
+		if not region.get('kitchens'):
+			raise ValueError('Region {0} has no kitchens'.format(region['name']))
+		for kitchen in region['kitchens']:
+			if kitchen['name'] in kitchens:
+				raise ValueError('Duplicated kitchen: {0}'.format(kitchen['name']))
+			kitchens.add(kitchen['name'])
+	return topology
+
+
+def stable_hash(value):
+	"""
+	:return: hash of a string that is the same in every process, unlike `hash`
+	"""
+	return zlib.crc32(value.encode())
+
+
+class OrderRouter:
+	"""
+	Route orders to the regions of a topology, the route of an order only depends on the order and its position
+	so every worker process routes the orders file the same way
+	"""
+	def __init__(self, topology):
+		self.__router = topology.get('router', 'hash')
+		self.__num_regions = len(topology['regions'])
+		self.__regions = {}
+		self.__kitchens = {}
+		for idx, region in enumerate(topology['regions']):
+			self.__regions[region['name']] = idx
+			for kitchen in region['kitchens']:
+				self.__kitchens[kitchen['name']] = idx
+
+	def region(self, index, order):
+		"""
+		:param index: position of the order in the orders file
+		:param order: order dictionary
+		:return: index of the region of the order
+		"""
+		if 'kitchen' in order:
+			return self.__kitchens[order['kitchen']]
+		if 'region' in order:
+			return self.__regions[order['region']]
+		if self.__router == 'round_robin':
+			return index % self.__num_regions
+		return stable_hash(order['id']) % self.__num_regions
+
+
+class OrderFeed:
+	"""
+	Stream the orders file to the regions of a partition, the orders of the other regions are skipped.
+	Orders read ahead for a region are buffered until the region consumes them.
+	"""
+	def __init__(self, orders, router, region_indexes):
+		"""
+		:param orders: iterable of order dictionaries
+		:param router: OrderRouter
+		:param region_indexes: indexes of the regions of the partition
+		"""
+		self.__orders = enumerate(orders)
+		self.__router = router
+		self.__buffers = {idx: deque() for idx in region_indexes}
+
+	def next(self, region_index):
+		"""
+		:param region_index: index of the region
+		:return: (index, order) of the next order of the region, None when there are no more orders
+		"""
+		buffer = self.__buffers[region_index]
+		while len(buffer) == 0:
+			item = next(self.__orders, None)
+			if item is None:
+				return None
+			target = self.__buffers.get(self.__router.region(*item))
+			if target is not None:
+				target.append(item)
+		return buffer.popleft()
+
+
+class Region:
+	"""
+	Kitchens of a region sharing a courier pool, simulated in their own environment
+
+	Attributes:
+		name: region name
+		env: simpy simulation environment of the region
+		courier_pool: simpy Container with the idle couriers of the region, None for an unlimited fleet
+		kitchens: dictionary where key is the kitchen name and value the (Kitchen, Delivery) pair
+		all_done: event triggered when all the orders of the region were delivered
+		end_time: simulation time when all the orders of the region were delivered
+	"""
+	def __init__(self, region, config, feed, index, seed=None):
+		"""
+		:param region: region of the topology
+		:param config: configuration object for simulation, default for the parameters of the kitchens
+		:param feed: OrderFeed of the partition
+		:param index: index of the region in the topology
+		:param seed: seed for the random generator of the couriers arrival
+		"""
+		self.name = region['name']
+		self.env = simpy.Environment(initial_time=0)
+		couriers = region.get('couriers')
+		self.courier_pool = simpy.Container(self.env, init=couriers) if couriers is not None else None
+		arrival_dist_fnc = courier_arrival_distribution(config, seed)
+		self.kitchens = {}
+		for kitchen_config in region['kitchens']:
+			params = dict(config)
+			params.update({p: kitchen_config[p] for p in KITCHEN_PARAMETERS if p in kitchen_config})
+			kitchen = Kitchen(
+				self.env,
+				params['cooks_in_kitchen'],
+				params.get('kitchen_policy', KITCHEN_POLICY),
+				params.get('kitchen_preemptive', False)
+			)
+			delivery = Delivery(
+				self.env,
+				kitchen,
+				params['strategy'],
+				params['courier_arrival_time_min'],
+				params['courier_arrival_time_max'],
+				arrival_dist_fnc,
+				self.courier_pool,
+				STRATEGIES[params['strategy']].options(params),
+				'{0}-courier-'.format(kitchen_config['name'])
+			)
+			self.kitchens[kitchen_config['name']] = (kitchen, delivery)
+		self.__kitchen_names = list(self.kitchens)
+		self.__kitchen_router = region.get('kitchen_router', 'least_loaded')
+		self.__routed = 0
+		self.all_done = simpy.AllOf(self.env, [delivery.all_done for _, delivery in self.kitchens.values()])
+		self.all_done.callbacks.append(self.__on_all_done)
+		self.end_time = None
+		self.env.process(self.__process_orders(feed, index, config['orders_per_second']))
+
+	def __on_all_done(self, event):
+		self.end_time = self.env.now
+
+	def route(self, order):
+		"""
+		:param order: order dictionary
+		:return: name of the kitchen of the region for the order
+		"""
+		if 'kitchen' in order:
+			return order['kitchen']
+		if self.__kitchen_router == 'round_robin':
+			name = self.__kitchen_names[self.__routed % len(self.__kitchen_names)]
+			self.__routed += 1
+			return name
+		if self.__kitchen_router == 'hash':
+			return self.__kitchen_names[stable_hash(order['id']) % len(self.__kitchen_names)]
+		return min(
+			self.__kitchen_names,
+			key=lambda name: len(self.kitchens[name][0].orders) + len(self.kitchens[name][0].orders_processing)
+		)
+
+	def __process_orders(self, feed, index, orders_per_second):
+		"""
+		Receive the orders of the region at the time they are sent in the orders file, see `process_orders`
+		"""
+		counts = {name: 0 for name in self.kitchens}
+		while True:
+			item = feed.next(index)
+			if item is None:
+				break
+			position, order = item
+			delay = position // orders_per_second - self.env.now
+			if delay > 0:
+				yield self.env.timeout(delay)
+			name = self.route(order)
+			kitchen, delivery = self.kitchens[name]
+			order = Order.from_dict(order)
+			delivery.dispatch_new_courier(order)
+			kitchen.create_order(order)
+			counts[name] += 1
+		for name, (kitchen, delivery) in self.kitchens.items():
+			delivery.expect_orders(counts[name])
+
+	def transfer(self, couriers):
+		"""
+		:param couriers: number of idle couriers to add to the pool, negative to remove them
+		"""
+		if couriers > 0:
+			self.courier_pool.put(couriers)
+		elif couriers < 0:
+			self.courier_pool.get(-couriers)
+
+	def status(self):
+		"""
+		:return: dictionary with the idle couriers, the dispatches waiting for a courier,
+			if all the orders were delivered and if the region has no more events
+		"""
+		return {
+			'idle': self.courier_pool.level if self.courier_pool is not None else 0,
+			'waiting': len(self.courier_pool.get_queue) if self.courier_pool is not None else 0,
+			'done': self.all_done.processed,
+			'stalled': self.env.peek() == simpy.core.Infinity
+		}
+
+	def results(self):
+		"""
+		:return: list of dictionaries with the metrics of each kitchen
+		"""
+		results = []
+		for name, (kitchen, delivery) in self.kitchens.items():
+			results.append({
+				'region': self.name,
+				'kitchen': name,
+				'orders': len(kitchen.orders_delivered),
+				'couriers': len(delivery.couriers_done),
+				'end_time': self.end_time,
+				'order_wait_time_total': sum(kitchen.orders_delivered.wait_times),
+				'courier_wait_time_total': sum(delivery.couriers_done.wait_times)
+			})
+		return results
+
+
+class Partition:
+	"""
+	Regions of a topology simulated by the same process
+	"""
+	def __init__(self, filename, topology, config, region_indexes):
+		"""
+		:param filename: orders file, streamed by each partition
+		:param topology: topology object
+		:param config: configuration object for simulation
+		:param region_indexes: indexes of the regions of the partition
+		"""
+		# Regions have their own environment and clock, the events log is disabled
+		log_init(dict(config, log_sinks=()))
+		feed = OrderFeed(read_orders(filename), OrderRouter(topology), region_indexes)
+		seed = config.get('seed')
+		self.regions = {
+			idx: Region(topology['regions'][idx], config, feed, idx, None if seed is None else seed + idx)
+			for idx in region_indexes
+		}
+
+	def advance(self, until, transfers):
+		"""
+		Apply the courier transfers of the last barrier and run the regions until the next barrier
+		:param until: simulation time of the next barrier
+		:param transfers: dictionary where key is the region index and value the couriers to add or remove
+		:return: dictionary where key is the region index and value its status at the barrier
+		"""
+		for idx, couriers in transfers.items():
+			self.regions[idx].transfer(couriers)
+		for region in self.regions.values():
+			region.env.run(until=until)
+		return {idx: region.status() for idx, region in self.regions.items()}
+
+	def results(self):
+		"""
+		:return: list of the metrics of each kitchen of the partition
+		"""
+		log_close()
+		return [result for region in self.regions.values() for result in region.results()]
+
+
+def partition_worker(connection, *args):
+	"""
+	Worker process: run the commands of the coordinator on its Partition until the results are requested
+	:param connection: pipe to the coordinator
+	:param args: arguments of the Partition
+	"""
+	try:
+		partition = Partition(*args)
+		while True:
+			command, command_args = connection.recv()
+			connection.send(getattr(partition, command)(*command_args))
+			if command == 'results':
+				return
+	except Exception as e:
+		connection.send(e)
+
+
+class PartitionProcess:
+	"""
+	Partition simulated by a worker process
+	"""
+	def __init__(self, *args):
+		self.__connection, child_connection = Pipe()
+		self.process = Process(target=partition_worker, args=(child_connection,) + args, daemon=True)
+		self.process.start()
+
+	def send(self, command, *args):
+		self.__connection.send((command, args))
+
+	def recv(self):
+		result = self.__connection.recv()
+		if isinstance(result, Exception):
+			self.process.join()
+			raise result
+		return result
+
+	def close(self):
+		self.process.join()
+
+
+class LocalPartition:
+	"""
+	Partition simulated by the coordinator process, same interface as PartitionProcess
+	"""
+	def __init__(self, *args):
+		self.__partition = Partition(*args)
+		self.__result = None
+
+	def send(self, command, *args):
+		self.__result = getattr(self.__partition, command)(*args)
+
+	def recv(self):
+		return self.__result
+
+	def close(self):
+		pass
+
+
+def rebalance(statuses):
+	"""
+	Move idle couriers to the regions with dispatches waiting for a courier.
+	Regions with pending orders lend half of their idle couriers, regions that are done lend all of them.
+	:param statuses: dictionary where key is the region index and value its status
+	:return: dictionary where key is the region index and value the couriers to add, negative to remove
+	"""
+	lenders = deque([
+		[idx, status['idle'] if status['done'] else status['idle'] // 2]
+		for idx, status in sorted(statuses.items())
+		if status['waiting'] == 0 and status['idle'] > 0
+	])
+	transfers = {}
+	for idx, status in sorted(statuses.items()):
+		needed = status['waiting']
+		while needed > 0 and lenders:
+			lender = lenders[0]
+			moved = min(needed, lender[1])
+			if moved > 0:
+				transfers[lender[0]] = transfers.get(lender[0], 0) - moved
+				transfers[idx] = transfers.get(idx, 0) + moved
+				lender[1] -= moved
+				needed -= moved
+			if lender[1] == 0:
+				lenders.popleft()
+	return transfers
+
+
+def run_topology(filename, topology, config, workers=1):
+	"""
+	Simulate the regions of a topology in parallel, synchronized every 'sync_interval' simulated seconds.
+	Between barriers regions are independent, at each barrier idle couriers are exchanged between regions.
+	Each region has its own environment and seeded random generator, so the results do not depend on the workers.
+	:param filename: orders file
+	:param topology: topology object, see `load_topology`
+	:param config: configuration object for simulation, default for the parameters of the kitchens
+	:param workers: number of worker processes, 1 simulates all the regions in this process
+	:return: (metrics, kitchens) where metrics are the metrics of the whole topology and kitchens the list of
+		metrics of each kitchen
+	"""
+	num_regions = len(topology['regions'])
+	workers = max(1, min(workers or 1, num_regions))
+	sync_interval = topology.get('sync_interval', SYNC_INTERVAL)
+	partition_class = LocalPartition if workers == 1 else PartitionProcess
+	partitions = [
+		partition_class(filename, topology, config, list(range(num_regions))[idx::workers])
+		for idx in range(workers)
+	]
+	until = 0
+	barriers = 0
+	transferred = 0
+	transfers = {}
+	while True:
+		until += sync_interval
+		barriers += 1
+		for idx, partition in enumerate(partitions):
+			partition.send('advance', until, {r: c for r, c in transfers.items() if r % workers == idx})
+		statuses = {}
+		for partition in partitions:
+			statuses.update(partition.recv())
+		if all(status['done'] for status in statuses.values()):
+			break
+		transfers = rebalance(statuses)
+		transferred += sum(c for c in transfers.values() if c > 0)
+		if not transfers and all(status['stalled'] for status in statuses.values() if not status['done']):
+			raise RuntimeError('Simulation stalled at {0}: no idle couriers left'.format(until))
+	for partition in partitions:
+		partition.send('results')
+	kitchens = [result for partition in partitions for result in partition.recv()]
+	region_indexes = {region['name']: idx for idx, region in enumerate(topology['regions'])}
+	kitchens.sort(key=lambda kitchen: region_indexes[kitchen['region']])
+	for partition in partitions:
+		partition.close()
+	orders = sum(k['orders'] for k in kitchens)
+	couriers = sum(k['couriers'] for k in kitchens)
+	total_order_wait = sum(k['order_wait_time_total'] for k in kitchens)
+	total_courier_wait = sum(k['courier_wait_time_total'] for k in kitchens)
+	for kitchen in kitchens:
+		# Couriers carrying many orders wait once for all of them
+		for metric, count in [('order_wait_time', 'orders'), ('courier_wait_time', 'couriers')]:
+			total = kitchen.pop(metric + '_total')
+			kitchen['avg_' + metric] = total / kitchen[count] if kitchen[count] else None
+	metrics = {
+		'orders': orders,
+		'simulation_time': max(k['end_time'] for k in kitchens),
+		'avg_order_wait_time': total_order_wait / orders if orders else None,
+		'avg_courier_wait_time': total_courier_wait / couriers if couriers else None,
+		'barriers': barriers,
+		'couriers_transferred': transferred
+	}
+	return metrics, kitchens
@@ -1,2 +1,26 @@
-from .id import gen_id
-from .log import log_file, log_init, log_obj, log_event, log_stdout, log_close
\ No newline at end of file
+# The re-exports are imported on first use, so importing a module of the package, e.g. the log levels of `utils.log`
+# for the CLI options, does not import the others
+_EXPORTS = {
+	'log_init': 'log',
+	'log_obj': 'log',
+	'log_event': 'log',
+	'log_stdout': 'log',
+	'log_flush': 'log',
+	'log_close': 'log',
+	'log_filename': 'log',
+	'format_time': 'log',
+	'read_orders': 'ingest',
+	'read_traces': 'ingest',
+	'EventLogReader': 'eventlog'
+}
+
+
+def __getattr__(name):
+	if name not in _EXPORTS:
+		raise AttributeError('module {0!r} has no attribute {1!r}'.format(__name__, name))
+	from importlib import import_module
+	return getattr(import_module('.' + _EXPORTS[name], __name__), name)
+
+
+def __dir__():
+	return sorted(list(globals()) + list(_EXPORTS))
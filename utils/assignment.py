@@ -0,0 +1,53 @@
+import numpy
+
+
+def linear_sum_assignment(cost):
+	"""
+	Solve the assignment problem (Hungarian method with shortest augmenting paths and potentials, O(n^2 m)),
+	the scan of the columns for each augmenting step is vectorized
+	:param cost: (n, m) matrix where cost[i, j] is the cost of assigning row i to column j
+	:return: (rows, cols) arrays of the assigned pairs minimizing the total cost, sorted by row,
+		with min(n, m) pairs
+	"""
+	cost = numpy.asarray(cost, dtype=numpy.float64)
+	if cost.shape[0] > cost.shape[1]:
+		cols, rows = linear_sum_assignment(cost.T)
+		order = numpy.argsort(rows)
+		return rows[order], cols[order]
+	n, m = cost.shape
+	# Index 0 is a virtual column used as the root of the augmenting paths, rows and columns are 1-based
+	u = numpy.zeros(n + 1)
+	v = numpy.zeros(m + 1)
+	row_of = numpy.zeros(m + 1, dtype=numpy.int64)
+	way = numpy.zeros(m + 1, dtype=numpy.int64)
+	for i in range(1, n + 1):
+		row_of[0] = i
+		col = 0
+		min_reduced = numpy.full(m + 1, numpy.inf)
+		used = numpy.zeros(m + 1, dtype=bool)
+		while True:
+			used[col] = True
+			row = row_of[col]
+			free = ~used[1:]
+			reduced = cost[row - 1] - u[row] - v[1:]
+			better = free & (reduced < min_reduced[1:])
+			min_reduced[1:][better] = reduced[better]
+			way[1:][better] = col
+			candidates = numpy.where(free, min_reduced[1:], numpy.inf)
+			next_col = int(numpy.argmin(candidates)) + 1
+			delta = candidates[next_col - 1]
+			u[row_of[used]] += delta
+			v[used] -= delta
+			min_reduced[1:][free] -= delta
+			col = next_col
+			if row_of[col] == 0:
+				break
+		# Flip the augmenting path
+		while col:
+			prev_col = way[col]
+			row_of[col] = row_of[prev_col]
+			col = prev_col
+	cols = numpy.nonzero(row_of[1:])[0]
+	rows = row_of[1:][cols] - 1
+	order = numpy.argsort(rows)
+	return rows[order], cols[order]
@@ -0,0 +1,146 @@
+import os
+import json
+import hashlib
+
+
+CACHE_VERSION = 1
+CACHE_MAX_ENTRIES = 1000
+CACHE_MAX_BYTES = 64 << 20
+CACHE_EXTENSION = '.result.json'
+DIGEST_CHUNK_SIZE = 1 << 20
+# Configuration keys that change the outputs of a simulation but not its metrics
+CACHE_IGNORED_KEYS = [
+	'print_info',
+	'keep_results',
+	'mode',
+	'factor',
+	'log_sinks',
+	'log_level',
+	'log_format',
+	'log_dir',
+	'report_sort',
+	'report_offset',
+	'report_limit',
+	'report_format',
+	'metrics_interval',
+	'metrics_port',
+	'profile',
+	'checkpoint_interval',
+	'checkpoint_file',
+	'checkpoint_stop',
+	'courier_arrival_dist_fnc',
+	'cache_dir',
+	'cache_bypass',
+	'cache_max_entries',
+	'cache_max_bytes'
+]
+
+
+def files_digest(filenames):
+	"""
+	:param filenames: files, e.g. the orders files of a simulation, in the order they are read
+	:return: hex SHA-256 of the content of the files
+	"""
+	digest = hashlib.sha256()
+	for filename in filenames:
+		file_digest = hashlib.sha256()
+		with open(filename, 'rb') as f:
+			for chunk in iter(lambda: f.read(DIGEST_CHUNK_SIZE), b''):
+				file_digest.update(chunk)
+		digest.update(file_digest.digest())
+	return digest.hexdigest()
+
+
+def cache_key(config):
+	"""
+	Key of the metrics of a simulation: hash of the content of its orders, 'orders_digest', and of the configuration
+	keys that change the metrics, including the seed and the courier arrival distribution with the content of its
+	'empirical' file
+	:param config: configuration object for simulation
+	:return: hex key, None if the metrics are not reproducible: no seed, no 'orders_digest', a custom
+		'courier_arrival_dist_fnc' or orders from a live intake
+	"""
+	if config.get('seed') is None or not config.get('orders_digest'):
+		return None
+	if config.get('courier_arrival_dist_fnc') or config.get('live_intake'):
+		return None
+	key_config = {key: value for key, value in config.items() if key not in CACHE_IGNORED_KEYS}
+	dist = config.get('courier_arrival_dist')
+	if dist and dist.startswith('empirical:'):
+		key_config['courier_arrival_dist'] = 'empirical:' + files_digest([dist.partition(':')[2]])
+	key_config['version'] = CACHE_VERSION
+	return hashlib.sha256(json.dumps(key_config, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+	"""
+	On-disk cache of the metrics of simulations, a JSON file per key in a directory shared by the processes using it.
+	Least recently used entries are evicted when the cache has more than `max_entries` or `max_bytes`, the time of
+	the last use of an entry is the modification time of its file.
+	"""
+	def __init__(self, directory, max_entries=CACHE_MAX_ENTRIES, max_bytes=CACHE_MAX_BYTES):
+		"""
+		:param directory: directory of the cache, created if missing
+		:param max_entries: max number of entries
+		:param max_bytes: max total size of the entries
+		"""
+		self.directory = directory
+		self.max_entries = max_entries
+		self.max_bytes = max_bytes
+		os.makedirs(directory, exist_ok=True)
+
+	def __filename(self, key):
+		return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+	def get(self, key):
+		"""
+		:param key: key from `cache_key`
+		:return: metrics of the simulation, None if not cached
+		"""
+		filename = self.__filename(key)
+		try:
+			with open(filename) as f:
+				entry = json.load(f)
+			os.utime(filename)
+		except (OSError, ValueError):
+			return None
+		if entry.get('version') != CACHE_VERSION:
+			return None
+		return entry['metrics']
+
+	def put(self, key, metrics):
+		"""
+		Write the metrics of a simulation atomically and evict the least recently used entries over the limits
+		:param key: key from `cache_key`
+		:param metrics: metrics of the simulation, see `simulation.simulation_metrics`
+		"""
+		filename = self.__filename(key)
+		tmp_filename = '{0}.{1}.tmp'.format(filename, os.getpid())
+		with open(tmp_filename, 'w') as f:
+			json.dump({'version': CACHE_VERSION, 'metrics': metrics}, f)
+		os.replace(tmp_filename, filename)
+		self.evict()
+
+	def evict(self):
+		"""
+		Remove the least recently used entries until the cache is within its limits
+		"""
+		entries = []
+		with os.scandir(self.directory) as it:
+			for entry in it:
+				if entry.name.endswith(CACHE_EXTENSION):
+					try:
+						stat = entry.stat()
+					except FileNotFoundError:
+						continue
+					entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+		entries.sort()
+		size = sum(entry_size for _, entry_size, _ in entries)
+		for idx, (_, entry_size, path) in enumerate(entries):
+			if len(entries) - idx <= self.max_entries and size <= self.max_bytes:
+				break
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+			size -= entry_size
@@ -0,0 +1,34 @@
+import os
+import pickle
+
+
+CHECKPOINT_VERSION = 1
+
+
+def save_checkpoint(filename, checkpoint):
+	"""
+	Write a checkpoint atomically: a crash while writing leaves the previous checkpoint
+	:param filename: checkpoint file
+	:param checkpoint: dictionary with the state of the simulation, see `simulation.simulation_checkpoint`
+	"""
+	# The directory may not exist yet, e.g. the log directory without the 'file' log sink
+	os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+	tmp_filename = filename + '.tmp'
+	with open(tmp_filename, 'wb') as f:
+		pickle.dump(dict(checkpoint, version=CHECKPOINT_VERSION), f, protocol=pickle.HIGHEST_PROTOCOL)
+		f.flush()
+		os.fsync(f.fileno())
+	os.replace(tmp_filename, filename)
+
+
+def load_checkpoint(filename):
+	"""
+	Read a checkpoint, checkpoints are pickles: only load trusted files
+	:param filename: checkpoint file
+	:return: dictionary with the state of the simulation
+	"""
+	with open(filename, 'rb') as f:
+		checkpoint = pickle.load(f)
+	if checkpoint.get('version') != CHECKPOINT_VERSION:
+		raise ValueError('Unsupported checkpoint version: {0}'.format(checkpoint.get('version')))
+	return checkpoint
@@ -0,0 +1,128 @@
+import json
+from inspect import signature
+from random import Random
+
+
+SAMPLE_BATCH_SIZE = 4096
+# Distributions of the couriers arrival delay: fnc(generator: numpy Generator, size, *params) returning a batch.
+# 'uniform' samples are scaled to the (min, max) of each call, the other distributions ignore them.
+COURIER_DISTRIBUTIONS = {
+	'uniform': lambda rng, size: rng.random(size),
+	'lognormal': lambda rng, size, mu, sigma: rng.lognormal(mu, sigma, size),
+	'empirical': lambda rng, size, values: rng.choice(values, size)
+}
+
+
+def read_delays(filename):
+	"""
+	Read historical delays for the 'empirical' distribution
+	:param filename: JSON array of numbers or text file with a number per line
+	:return: list of delays
+	"""
+	with open(filename) as f:
+		data = f.read()
+	if data.lstrip().startswith('['):
+		return [float(d) for d in json.loads(data)]
+	return [float(line) for line in data.split() if line]
+
+
+def parse_courier_distribution(value):
+	"""
+	Parse a couriers arrival distribution
+	:param value: 'uniform', 'lognormal:mu,sigma' or 'empirical:filename'
+	:return: (name, params)
+	"""
+	name, _, params = value.partition(':')
+	if name not in COURIER_DISTRIBUTIONS:
+		raise ValueError('Unknown courier arrival distribution: {0}'.format(name))
+	if name == 'empirical':
+		return name, [read_delays(params)]
+	params = [float(p) for p in params.split(',') if p]
+	# Parameters of the sampling function after (rng, size)
+	names = list(signature(COURIER_DISTRIBUTIONS[name]).parameters)[2:]
+	if len(params) != len(names):
+		raise ValueError('The {0} courier arrival distribution takes {1} parameters{2}, got {3}'.format(
+			name, len(names), ': ' + ','.join(names) if names else '', len(params)
+		))
+	return name, params
+
+
+class DelaySampler:
+	"""
+	Seeded stream of delays of a distribution, sampled with numpy in batches and called as `fnc(min, max)`, the
+	`arrival_dist_fnc` of Delivery.  The same seed gives the same delays.  Needs numpy.
+	"""
+	def __init__(self, dist, seed=None, batch_size=SAMPLE_BATCH_SIZE):
+		"""
+		:param dist: distribution, see `parse_courier_distribution`
+		:param seed: seed of the generator, None for a random one
+		:param batch_size: number of delays sampled at a time
+		"""
+		import numpy
+		name, params = parse_courier_distribution(dist)
+		self.__generator = numpy.random.Generator(numpy.random.PCG64(seed))
+		self.__dist = COURIER_DISTRIBUTIONS[name]
+		self.__params = [numpy.asarray(p) if isinstance(p, list) else p for p in params]
+		self.__scaled = name == 'uniform'
+		self.__batch_size = batch_size
+		self.__batch = []
+		self.__next = 0
+
+	def __call__(self, low=0, high=1):
+		"""
+		:param low: min delay of 'uniform'
+		:param high: max delay of 'uniform'
+		:return: next delay of the stream
+		"""
+		if self.__next == len(self.__batch):
+			self.__batch = self.__dist(self.__generator, self.__batch_size, *self.__params).tolist()
+			self.__next = 0
+		value = self.__batch[self.__next]
+		self.__next += 1
+		if self.__scaled:
+			return low + (high - low) * value
+		return value
+
+	def sample(self, size, low=0, high=1):
+		"""
+		:param size: number of delays
+		:param low: min delay of 'uniform'
+		:param high: max delay of 'uniform'
+		:return: numpy array with the next `size` delays of the stream, the same ones as `size` calls
+		"""
+		import numpy
+		batch = self.__batch[self.__next:self.__next + size]
+		self.__next += len(batch)
+		values = numpy.asarray(batch, dtype=numpy.float64)
+		if len(batch) < size:
+			values = numpy.concatenate([values, self.__dist(self.__generator, size - len(batch), *self.__params)])
+		if self.__scaled:
+			return low + (high - low) * values
+		return values
+
+	def getstate(self):
+		"""
+		:return: state of the stream, for checkpoints
+		"""
+		return self.__generator.bit_generator.state, self.__batch[self.__next:]
+
+	def setstate(self, state):
+		"""
+		:param state: state from `getstate`
+		"""
+		self.__generator.bit_generator.state, self.__batch = state
+		self.__next = 0
+
+
+def courier_arrival_distribution(config, seed):
+	"""
+	:param config: configuration object for simulation
+	:param seed: seed of the random stream
+	:return: fnc(min, max) of the couriers arrival delay: 'courier_arrival_dist_fnc' if set, a DelaySampler of
+		'courier_arrival_dist' if set, or the uniform of a random.Random
+	"""
+	if config.get('courier_arrival_dist_fnc'):
+		return config['courier_arrival_dist_fnc']
+	if config.get('courier_arrival_dist'):
+		return DelaySampler(config['courier_arrival_dist'], seed)
+	return Random(seed).uniform
@@ -0,0 +1,154 @@
+import json
+import mmap
+import struct
+from collections import namedtuple
+
+
+# Binary events log format
+#   file: MAGIC followed by records
+#   record: payload length (uint32) followed by the payload, the first byte of the payload is the record kind
+#     RECORD_TYPE: type ID (uint16) + event type name (utf-8), interns an event type before its first event
+#     RECORD_EVENT: simulation time (float64) + type ID (uint16) + ID length (uint16) + ID (utf-8) + args (JSON list)
+#     RECORD_OBJ: JSON object, the first one is the configuration of the simulation
+MAGIC = b'DOSEVT1\n'
+RECORD_TYPE = 0
+RECORD_EVENT = 1
+RECORD_OBJ = 2
+
+LENGTH = struct.Struct('<I')
+KIND = struct.Struct('<B')
+TYPE_HEADER = struct.Struct('<BH')
+EVENT_HEADER = struct.Struct('<BdHH')
+
+EventRecord = namedtuple('EventRecord', ['time', 'event', 'id', 'args'])
+
+
+class BinaryEventWriter:
+	"""
+	Encode events in the binary events log format, interning the event types
+	"""
+	def __init__(self, file):
+		"""
+		:param file: file opened in binary mode
+		"""
+		self.file = file
+		self.__types = {}
+		file.write(MAGIC)
+
+	@staticmethod
+	def __record(payload):
+		return LENGTH.pack(len(payload)) + payload
+
+	def encode_event(self, time, event, id, args):
+		"""
+		:return: bytes of the event record, preceded by the type record the first time the event type is used
+		"""
+		chunk = b''
+		type_id = self.__types.get(event)
+		if type_id is None:
+			type_id = self.__types[event] = len(self.__types)
+			chunk = self.__record(TYPE_HEADER.pack(RECORD_TYPE, type_id) + event.encode())
+		id = id.encode()
+		payload = EVENT_HEADER.pack(RECORD_EVENT, time, type_id, len(id)) + id + json.dumps(args).encode()
+		return chunk + self.__record(payload)
+
+	def encode_obj(self, obj):
+		"""
+		:return: bytes of the object record
+		"""
+		return self.__record(KIND.pack(RECORD_OBJ) + json.dumps(obj, default=str).encode())
+
+	def write(self, chunks):
+		self.file.write(b''.join(chunks))
+
+
+class EventLogReader:
+	"""
+	Reader of binary events logs, the file is memory mapped and records are decoded only when they match the filters
+	"""
+	def __init__(self, filename):
+		"""
+		:param filename: binary events log
+		"""
+		self.__file = open(filename, 'rb')
+		self.__map = mmap.mmap(self.__file.fileno(), 0, access=mmap.ACCESS_READ)
+		if self.__map[:len(MAGIC)] != MAGIC:
+			self.close()
+			raise ValueError('Not a binary events log: {0}'.format(filename))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+	def close(self):
+		self.__map.close()
+		self.__file.close()
+
+	def __records(self):
+		"""
+		:return: generator of (kind, start, end) of the payload of each record
+		"""
+		data = self.__map
+		pos = len(MAGIC)
+		size = len(data)
+		while pos + LENGTH.size <= size:
+			length, = LENGTH.unpack_from(data, pos)
+			start = pos + LENGTH.size
+			end = start + length
+			if end > size:
+				# Truncated record of a log that is still being written
+				return
+			yield data[start], start, end
+			pos = end
+
+	def objects(self):
+		"""
+		:return: generator of the objects logged, the configuration and the metrics of the simulation
+		"""
+		for kind, start, end in self.__records():
+			if kind == RECORD_OBJ:
+				yield json.loads(self.__map[start + 1:end])
+
+	@property
+	def config(self):
+		"""
+		:return: configuration of the simulation
+		"""
+		return next(self.objects(), None)
+
+	def events(self, event_types=None, order_id=None):
+		"""
+		:param event_types: list of event type names to include, None for all
+		:param order_id: only include the events of this order, as ID or as argument (e.g. 'ORDER ASSIGNED')
+		:return: generator of EventRecord
+		"""
+		data = self.__map
+		types = {}
+		wanted = set()
+		needle = json.dumps(order_id).encode() if order_id is not None else None
+		for kind, start, end in self.__records():
+			if kind == RECORD_TYPE:
+				_, type_id = TYPE_HEADER.unpack_from(data, start)
+				name = data[start + TYPE_HEADER.size:end].decode()
+				types[type_id] = name
+				if event_types is None or name in event_types:
+					wanted.add(type_id)
+			elif kind == RECORD_EVENT:
+				_, time, type_id, id_length = EVENT_HEADER.unpack_from(data, start)
+				if type_id not in wanted:
+					continue
+				id_start = start + EVENT_HEADER.size
+				args_start = id_start + id_length
+				if needle is not None and (
+						data[id_start:args_start] != needle[1:-1] and
+						data.find(needle, args_start, end) == -1
+				):
+					continue
+				yield EventRecord(
+					time,
+					types[type_id],
+					data[id_start:args_start].decode(),
+					json.loads(data[args_start:end])
+				)
@@ -1,5 +0,0 @@
-from uuid import uuid4
-
-
-def gen_id():
-	return str(uuid4())
\ No newline at end of file
@@ -0,0 +1,117 @@
+import json
+from datetime import datetime
+from heapq import merge
+from operator import itemgetter
+
+
+CHUNK_SIZE = 1 << 16
+
+
+def read_json_array(f, chunk_size=CHUNK_SIZE):
+	"""
+	Incrementally parse a JSON array of objects, keeping in memory only the current chunk
+	:param f: text file positioned at the opening '['
+	:param chunk_size: number of characters read at a time
+	:return: generator of the array items
+	"""
+	decoder = json.JSONDecoder()
+	buffer = f.read(chunk_size).lstrip()
+	if not buffer.startswith('['):
+		raise ValueError('Expected a JSON array')
+	pos = 1
+	eof = False
+	while True:
+		# Skip separators between items
+		while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+			pos += 1
+		if pos < len(buffer):
+			if buffer[pos] == ']':
+				return
+			try:
+				item, pos = decoder.raw_decode(buffer, pos)
+			except json.JSONDecodeError:
+				# The item continues in the next chunk
+				if eof:
+					raise
+			else:
+				yield item
+				continue
+		elif eof:
+			raise ValueError('Unexpected end of JSON array')
+		chunk = f.read(chunk_size)
+		eof = chunk == ''
+		buffer = buffer[pos:] + chunk
+		pos = 0
+
+
+def read_ndjson(f):
+	"""
+	Parse newline delimited JSON, one object per line
+	:param f: text file
+	:return: generator of the objects
+	"""
+	for line in f:
+		line = line.strip()
+		if line:
+			yield json.loads(line)
+
+
+def read_orders(filename):
+	"""
+	Stream the orders of a file, either a JSON array or newline delimited JSON
+	:param filename: orders file
+	:return: generator of orders
+	"""
+	with open(filename) as f:
+		# The format is given by the first non-blank character, the leading blanks can span many chunks
+		offset = f.tell()
+		chunk = f.read(CHUNK_SIZE)
+		while chunk and chunk.isspace():
+			offset = f.tell()
+			chunk = f.read(CHUNK_SIZE)
+		blanks = len(chunk) - len(chunk.lstrip())
+		f.seek(offset)
+		f.read(blanks)
+		if chunk[blanks:blanks + 1] == '[':
+			yield from read_json_array(f)
+		else:
+			yield from read_ndjson(f)
+
+
+def trace_time(value):
+	"""
+	:param value: timestamp of a trace, seconds or an ISO 8601 string, e.g. '2020-06-05T19:30:00'
+	:return: timestamp in seconds
+	"""
+	if isinstance(value, str):
+		return datetime.fromisoformat(value).timestamp()
+	return value
+
+
+def read_trace(filename):
+	"""
+	Stream the orders of a trace: orders with their 'arrivalTime' and optionally the 'courierArrivalTime' observed,
+	sorted by 'arrivalTime'
+	:param filename: orders file, see `read_orders`
+	:return: generator of orders with the timestamps in seconds
+	"""
+	last = None
+	for order in read_orders(filename):
+		if 'arrivalTime' not in order:
+			raise ValueError('Order {0} of {1} without arrivalTime'.format(order.get('id'), filename))
+		order['arrivalTime'] = trace_time(order['arrivalTime'])
+		if order.get('courierArrivalTime') is not None:
+			order['courierArrivalTime'] = trace_time(order['courierArrivalTime'])
+		if last is not None and order['arrivalTime'] < last:
+			raise ValueError('Orders of {0} are not sorted by arrivalTime: {1}'.format(filename, order['id']))
+		last = order['arrivalTime']
+		yield order
+
+
+def read_traces(filenames):
+	"""
+	Stream the orders of many traces merged by 'arrivalTime', reading one order of each file at a time
+	:param filenames: orders files, see `read_trace`
+	:return: generator of orders, orders with the same 'arrivalTime' in the order of the files
+	"""
+	return merge(*[read_trace(filename) for filename in filenames], key=itemgetter('arrivalTime'))
@@ -0,0 +1,271 @@
+import os
+import json
+import asyncio
+from numbers import Number
+from queue import SimpleQueue, Empty
+from threading import Thread, Event
+
+
+INTAKE_HOST = '127.0.0.1'
+# Line that ends the feed of orders, the simulation finishes once the orders received before it are delivered
+INTAKE_END = 'END'
+CONNECT_TIMEOUT = 5
+
+
+def parse_intake_address(value):
+	"""
+	Parse the address of a live intake
+	:param value: 'PORT', 'HOST:PORT' or 'unix:PATH'
+	:return: ('tcp', host, port) or ('unix', path)
+	"""
+	value = str(value)
+	if value.startswith('unix:'):
+		if not value[5:]:
+			raise ValueError('Missing the path of the unix socket: {0}'.format(value))
+		return 'unix', value[5:]
+	host, _, port = value.rpartition(':')
+	try:
+		port = int(port)
+	except ValueError:
+		raise ValueError('Invalid intake address: {0}'.format(value))
+	if not 0 <= port <= 65535:
+		raise ValueError('Invalid intake port: {0}'.format(port))
+	return 'tcp', host or INTAKE_HOST, port
+
+
+def validate_order(order):
+	"""
+	:param order: order received by the intake
+	:return: error message, None for a valid order
+	"""
+	if not isinstance(order, dict):
+		return 'expected a JSON object'
+	for key in ['id', 'name', 'prepTime']:
+		if key not in order:
+			return 'missing {0}'.format(key)
+	for key in ['id', 'name']:
+		if not isinstance(order[key], str) or not order[key]:
+			return 'invalid {0}'.format(key)
+	if not isinstance(order['prepTime'], Number) or isinstance(order['prepTime'], bool) or order['prepTime'] < 0:
+		return 'invalid prepTime'
+	return None
+
+
+class LiveIntake:
+	"""
+	Receive orders from a live feed while a realtime simulation runs: an asyncio server on a background thread reads
+	newline delimited JSON orders from TCP or unix socket connections and queues them for the simulation, that waits
+	for them with `poll`.  Each line is answered with 'OK ID' or 'ERROR MESSAGE', the INTAKE_END line ends
+	the feed.
+
+	Attributes:
+		address: address the intake listens on, with the port of 'HOST:0' resolved
+		orders_accepted: number of orders queued for the simulation
+		orders_rejected: number of invalid lines or orders received after the end of the feed
+	"""
+	def __init__(self, address):
+		"""
+		:param address: address to listen on, see `parse_intake_address`, port 0 for any free port
+		"""
+		self.__address = parse_intake_address(address)
+		self.address = None
+		self.orders_accepted = 0
+		self.orders_rejected = 0
+		self.__queue = SimpleQueue()
+		self.__ended = False
+		self.__loop = None
+		self.__stop = None
+		self.__error = None
+		self.__handlers = set()
+		self.__ready = Event()
+		self.__thread = Thread(target=asyncio.run, args=(self.__serve(),), daemon=True)
+		self.__thread.start()
+		self.__ready.wait()
+		if self.__error is not None:
+			self.__thread.join()
+			raise self.__error
+
+	async def __serve(self):
+		self.__loop = asyncio.get_running_loop()
+		self.__stop = asyncio.Event()
+		try:
+			if self.__address[0] == 'unix':
+				server = await asyncio.start_unix_server(self.__handle, self.__address[1])
+				self.address = 'unix:' + self.__address[1]
+			else:
+				server = await asyncio.start_server(self.__handle, self.__address[1], self.__address[2])
+				self.address = '{0}:{1}'.format(self.__address[1], server.sockets[0].getsockname()[1])
+		except OSError as e:
+			self.__error = e
+			self.__ready.set()
+			return
+		self.__ready.set()
+		async with server:
+			await self.__stop.wait()
+			# Connections still open, e.g. clients that did not send EOF, are closed with the intake
+			handlers = list(self.__handlers)
+			for handler in handlers:
+				handler.cancel()
+			await asyncio.gather(*handlers, return_exceptions=True)
+		if self.__address[0] == 'unix' and os.path.exists(self.__address[1]):
+			os.unlink(self.__address[1])
+
+	async def __handle(self, reader, writer):
+		handler = asyncio.current_task()
+		self.__handlers.add(handler)
+		try:
+			while True:
+				line = await reader.readline()
+				if not line:
+					break
+				line = line.strip()
+				if line:
+					writer.write(self.__receive(line).encode())
+					await writer.drain()
+		except (ConnectionError, asyncio.CancelledError):
+			pass
+		finally:
+			self.__handlers.discard(handler)
+			writer.close()
+
+	def __receive(self, line):
+		"""
+		:param line: line of a connection, without the line break
+		:return: reply to the line
+		"""
+		if line == INTAKE_END.encode():
+			if not self.__ended:
+				self.__ended = True
+				self.__queue.put(None)
+			return 'OK {0}\n'.format(INTAKE_END)
+		try:
+			order = json.loads(line)
+		except ValueError:
+			error = 'invalid JSON'
+		else:
+			error = validate_order(order)
+		if error is None and self.__ended:
+			error = 'the feed has ended'
+		if error is not None:
+			self.orders_rejected += 1
+			return 'ERROR {0}\n'.format(error)
+		self.orders_accepted += 1
+		self.__queue.put(order)
+		return 'OK {0}\n'.format(order['id'])
+
+	def poll(self, timeout=0):
+		"""
+		Take the orders received since the last poll, waiting up to `timeout` seconds if none was received
+		:param timeout: seconds to wait for an order or the end of the feed, 0 to return at once, None to wait for ever
+		:return: (list of order dictionaries in the order they were received, True once the feed has ended)
+		"""
+		orders = []
+		ended = False
+		block = timeout != 0
+		while True:
+			try:
+				order = self.__queue.get(block, timeout)
+			except Empty:
+				return orders, ended
+			block = False
+			if order is None:
+				ended = True
+			else:
+				orders.append(order)
+
+	def close(self):
+		"""
+		Stop listening, the orders not taken by `poll` are discarded
+		"""
+		if self.__thread.is_alive():
+			self.__loop.call_soon_threadsafe(self.__stop.set)
+			self.__thread.join()
+
+
+async def open_intake(address, timeout=CONNECT_TIMEOUT):
+	"""
+	Connect to a live intake, retrying until it listens
+	:param address: address of the intake, see `parse_intake_address`
+	:param timeout: seconds to keep retrying
+	:return: (StreamReader, StreamWriter)
+	"""
+	address = parse_intake_address(address)
+	deadline = asyncio.get_running_loop().time() + timeout
+	while True:
+		try:
+			if address[0] == 'unix':
+				return await asyncio.open_unix_connection(address[1])
+			return await asyncio.open_connection(address[1], address[2])
+		except (ConnectionRefusedError, FileNotFoundError):
+			if asyncio.get_running_loop().time() >= deadline:
+				raise
+			await asyncio.sleep(0.05)
+
+
+async def send_lines(address, lines, rate=None, timeout=CONNECT_TIMEOUT):
+	"""
+	Send lines to a live intake on one connection
+	:param address: address of the intake
+	:param lines: iterable of lines, without line breaks
+	:param rate: lines per second, None to send them as fast as possible
+	:param timeout: seconds to keep retrying the connection
+	:return: list of replies
+	"""
+	reader, writer = await open_intake(address, timeout)
+
+	async def read_replies():
+		replies = []
+		while True:
+			reply = await reader.readline()
+			if not reply:
+				return replies
+			replies.append(reply.decode().strip())
+
+	replies = asyncio.ensure_future(read_replies())
+	loop = asyncio.get_running_loop()
+	start = loop.time()
+	for idx, line in enumerate(lines):
+		if rate:
+			delay = start + idx / rate - loop.time()
+			if delay > 0:
+				await asyncio.sleep(delay)
+		writer.write(line.encode() + b'\n')
+		await writer.drain()
+	writer.write_eof()
+	try:
+		return await replies
+	finally:
+		writer.close()
+
+
+async def send_orders(address, orders, rate=None, connections=1, end=True, timeout=CONNECT_TIMEOUT):
+	"""
+	Load generator for a live intake: send the orders over concurrent connections, each one with an equal share of
+	the orders and of the rate
+	:param address: address of the intake, see `parse_intake_address`
+	:param orders: list of order dictionaries
+	:param rate: total orders per second, None to send them as fast as possible
+	:param connections: number of concurrent connections
+	:param end: end the feed after all the orders are answered
+	:param timeout: seconds to keep retrying the connections, e.g. while the simulation starts
+	:return: dictionary with the number of orders 'sent', 'accepted' and 'rejected'
+	"""
+	shares = [
+		[json.dumps(order) for order in orders[idx::connections]]
+		for idx in range(connections)
+	]
+	share_rate = rate / connections if rate else None
+	results = await asyncio.gather(*[send_lines(address, share, share_rate, timeout) for share in shares])
+	replies = [reply for result in results for reply in result]
+	if end:
+		await send_lines(address, [INTAKE_END], timeout=timeout)
+	accepted = sum(1 for reply in replies if reply.startswith('OK '))
+	return {'sent': len(orders), 'accepted': accepted, 'rejected': len(replies) - accepted}
+
+
+def feed_orders(address, orders, rate=None, connections=1, end=True, timeout=CONNECT_TIMEOUT):
+	"""
+	Run `send_orders` in a new event loop
+	:return: dictionary with the number of orders 'sent', 'accepted' and 'rejected'
+	"""
+	return asyncio.run(send_orders(address, list(orders), rate, connections, end, timeout))
@@ -1,41 +1,268 @@
-from datetime import datetime
+import os
+import sys
+from datetime import datetime, timedelta
 from copy import copy
+from queue import SimpleQueue
+from threading import Thread, Event
+from .eventlog import BinaryEventWriter
 
 
+LOG_SINKS = ('stdout', 'file')
+LOG_FORMAT = 'text'
+LOG_DIR = 'logs'
+# Verbosity levels: events (received, prepared, dispatched, arrived, picked up) and their wait time details
+LOG_LEVEL_NONE = 0
+LOG_LEVEL_EVENTS = 1
+LOG_LEVEL_DETAILS = 2
+LOG_LEVEL = LOG_LEVEL_DETAILS
+LOG_BUFFER_SIZE = 1 << 20
+LOG_BATCH_SIZE = 4096
+# Seconds between the checks that the writer thread is alive while waiting for it
+LOG_WAIT_INTERVAL = 0.5
+
+# Records queued for the writer thread
+LOG_RECORD_EVENT = 0
+LOG_RECORD_TEXT = 1
+LOG_RECORD_OBJ = 2
+LOG_RECORD_FLUSH = 3
+
 log_file = None
+log_basename = None
+log_writer_file = None
+log_env = None
+log_epoch = None
+log_sinks = LOG_SINKS
+log_level = LOG_LEVEL
+log_queue = None
+log_thread = None
+log_error = None
+log_time_cache = {}
 
 
-def log_init(_config):
-	global log_file
+def log_init(_config, env=None):
+	"""
+	Open the events log of a simulation and start the writer thread
+	:param _config: simulation configuration
+	:param env: simpy simulation environment, used as clock for the events timestamps
+
+	config attributes:
+		'log_sinks': list of outputs for the events: 'stdout', 'file' or 'none'
+		'log_level': LOG_LEVEL_NONE | LOG_LEVEL_EVENTS | LOG_LEVEL_DETAILS
+		'log_format': 'text' (pipe delimited lines) | 'binary' (see utils.eventlog)
+		'log_dir': directory of the events log and the files next to it, created if missing
+	"""
+	global log_file, log_basename, log_writer_file, log_env, log_epoch, log_sinks, log_level, log_queue, log_thread
+	global log_error
 	config = copy(_config)
-	del config['courier_arrival_dist_fnc']
-	filename = 'logs/' + config['strategy'] + '_' + datetime.now().strftime('%d-%m-%Y_%H:%M:%S') + '.events.log'
-	log_file = open(filename, 'w+')
+	config.pop('courier_arrival_dist_fnc', None)
+	log_sinks = tuple(sink for sink in config.get('log_sinks', LOG_SINKS) if sink != 'none')
+	log_level = config.get('log_level', LOG_LEVEL)
+	log_basename = None
+	if 'file' in log_sinks:
+		log_dir = config.get('log_dir', LOG_DIR)
+		os.makedirs(log_dir, exist_ok=True)
+		log_basename = os.path.join(log_dir, config['strategy'] + '_' + datetime.now().strftime('%d-%m-%Y_%H:%M:%S'))
+		if config.get('log_format', LOG_FORMAT) == 'binary':
+			log_file = open(log_basename + '.events.bin', 'wb', buffering=LOG_BUFFER_SIZE)
+			log_writer_file = BinaryEventWriter(log_file)
+		else:
+			log_file = open(log_basename + '.events.log', 'w+', buffering=LOG_BUFFER_SIZE)
+			log_writer_file = TextEventWriter(log_file)
+	log_env = env
+	if config.get('mode') == 'virtual':
+		# Virtual time is not related to the wall clock, timestamps are relative to the simulation start
+		log_epoch = datetime.combine(datetime.now().date(), datetime.min.time())
+	else:
+		log_epoch = datetime.now().replace(microsecond=0)
+	log_time_cache.clear()
+	log_error = None
+	if log_sinks:
+		log_queue = SimpleQueue()
+		log_thread = Thread(target=log_writer, args=(log_queue, log_sinks, log_writer_file), daemon=True)
+		log_thread.start()
 	log_obj(config)
 
 
+def log_filename(extension):
+	"""
+	:param extension: extension of the file, e.g. '.metrics.csv'
+	:return: name of a file next to the events log of the simulation, None if 'file' is not a log sink
+	"""
+	return log_basename + extension if log_basename else None
+
+
+def format_time(seconds):
+	"""
+	:param seconds: simulation time
+	:return: simulation time formatted as '%H:%M:%S' relative to the simulation start
+	"""
+	if log_epoch is None:
+		return datetime.now().strftime('%H:%M:%S')
+	second = int(seconds)
+	formatted = log_time_cache.get(second)
+	if formatted is None:
+		formatted = log_time_cache[second] = (log_epoch + timedelta(seconds=second)).strftime('%H:%M:%S')
+	return formatted
+
+
+def format_times(times):
+	"""
+	:param times: iterable of simulation times
+	:return: list of the times formatted as in `format_time`, each second is formatted once
+	"""
+	if log_epoch is None:
+		return [format_time(seconds) for seconds in times]
+	seconds = list(map(int, times))
+	for second in set(seconds).difference(log_time_cache):
+		format_time(second)
+	return list(map(log_time_cache.__getitem__, seconds))
+
+
+def format_event(now, event, id, args):
+	"""
+	:return: console line of an event
+	"""
+	return "{0:<10} {1:<20} {2:<38} {3}".format(now, event, id, ' '.join([str(a) for a in args]))
+
+
+class TextEventWriter:
+	"""
+	Encode events as pipe delimited lines
+	"""
+	def __init__(self, file):
+		"""
+		:param file: file opened in text mode
+		"""
+		self.file = file
+
+	def encode_event(self, time, event, id, args):
+		return '|'.join([format_time(time), event, id] + [str(a) for a in args]) + '\n'
+
+	def encode_obj(self, obj):
+		return str(obj) + '\n'
+
+	def write(self, chunks):
+		self.file.write(''.join(chunks))
+
+
+def log_writer(queue, sinks, writer):
+	"""
+	Writer thread: format the queued records and write them in batches until a None record is received.
+	The first error is kept in `log_error` for `log_flush` and `log_close` to raise, the records queued after it are
+	discarded but the flushes are still acknowledged, so the simulation never waits for a failed writer.
+	:param queue: queue of records
+	:param sinks: list of outputs
+	:param writer: TextEventWriter | BinaryEventWriter of the events log file, or None
+	"""
+	global log_error
+	to_stdout = 'stdout' in sinks
+	failed = False
+	while True:
+		records = [queue.get()]
+		while len(records) < LOG_BATCH_SIZE and not queue.empty():
+			records.append(queue.get())
+		stop = None in records
+		if stop:
+			records = records[:records.index(None)]
+		flushes = [record[1] for record in records if record[0] == LOG_RECORD_FLUSH]
+		if not failed:
+			try:
+				write_records(records, to_stdout, writer, bool(flushes))
+			except Exception as e:
+				log_error = e
+				failed = True
+		for flushed in flushes:
+			flushed.set()
+		if stop:
+			return
+
+
+def write_records(records, to_stdout, writer, flush):
+	"""
+	Format a batch of records and write it to the sinks
+	:param records: list of records, without the final None
+	:param to_stdout: write the events and texts to the console
+	:param writer: TextEventWriter | BinaryEventWriter of the events log file, or None
+	:param flush: flush the sinks after the batch
+	"""
+	console, chunks = [], []
+	for record in records:
+		kind = record[0]
+		if kind == LOG_RECORD_EVENT:
+			if to_stdout:
+				console.append(format_event(format_time(record[1]), record[2], record[3], record[4]))
+			if writer:
+				chunks.append(writer.encode_event(*record[1:]))
+		elif kind == LOG_RECORD_TEXT:
+			console.append(record[1])
+		elif kind == LOG_RECORD_OBJ:
+			chunks.append(writer.encode_obj(record[1]))
+	if to_stdout and console:
+		sys.stdout.write('\n'.join(console) + '\n')
+	if chunks:
+		writer.write(chunks)
+	if flush:
+		sys.stdout.flush()
+		if writer:
+			writer.file.flush()
+
+
 def log_obj(obj):
-	log_file.write(str(obj) + '\n')
+	if log_file:
+		log_queue.put((LOG_RECORD_OBJ, obj))
 
 
 def log_stdout(*args):
-	print(*args)
+	if log_level < LOG_LEVEL_DETAILS or 'stdout' not in log_sinks:
+		return
+	if log_queue is None:
+		print(*args)
+	else:
+		log_queue.put((LOG_RECORD_TEXT, ' '.join([str(a) for a in args])))
 
 
 def log_event(event, id, *args):
-	global log_file
-	msg = "{0:<10} {1:<20} {2:<38} {3}".format(
-		datetime.now().strftime('%H:%M:%S'),
-		event,
-		id,
-		' '.join([str(a) for a in args])
-	)
-	print(msg)
-	event = '|'.join([datetime.now().strftime('%H:%M:%S'), event, id] + [str(a) for a in args])
-	if log_file:
-		log_file.write(event + '\n')
+	if log_level < LOG_LEVEL_EVENTS or not log_sinks:
+		return
+	if log_queue is None:
+		# No simulation log initialized, print synchronously with the wall clock
+		print(format_event(datetime.now().strftime('%H:%M:%S'), event, id, args))
+	else:
+		log_queue.put((LOG_RECORD_EVENT, log_env.now if log_env is not None else 0, event, id, args))
+
+
+def log_flush():
+	"""
+	Wait until all the queued records are written, if the writer thread failed close the log and raise its error
+	"""
+	if log_queue is not None:
+		flushed = Event()
+		log_queue.put((LOG_RECORD_FLUSH, flushed))
+		while not flushed.wait(LOG_WAIT_INTERVAL):
+			if not log_thread.is_alive():
+				break
+		if log_error is not None:
+			log_close()
 
 
 def log_close():
-	global log_file
-	log_file.close()
+	"""
+	Write the queued records and close the log, then raise the error of the writer thread if it failed
+	"""
+	global log_file, log_writer_file, log_env, log_sinks, log_level, log_queue, log_thread, log_error
+	if log_queue is not None:
+		log_queue.put(None)
+		log_thread.join()
+	if log_file:
+		log_file.close()
+	error = log_error
+	log_file = None
+	log_writer_file = None
+	log_env = None
+	log_sinks = LOG_SINKS
+	log_level = LOG_LEVEL
+	log_queue = None
+	log_thread = None
+	log_error = None
+	if error is not None:
+		raise error
@@ -0,0 +1,254 @@
+import csv
+from bisect import bisect_left
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from threading import Thread
+from .stats import P2Quantile
+
+
+METRICS_QUANTILES = [0.5, 0.95, 0.99]
+WAIT_TIME_BUCKETS = [0.5, 1, 2, 5, 10, 30, 60, 120, 300]
+METRICS_PREFIX = 'delivery_simulation_'
+METRICS_HOST = '127.0.0.1'
+
+# Columns of the time series: gauges and counters sampled every interval
+SERIES_COLUMNS = [
+	'time',
+	'orders_received',
+	'orders_queued',
+	'orders_processing',
+	'orders_for_delivery',
+	'orders_delivered',
+	'couriers_dispatched',
+	'couriers_arrived',
+	'couriers_waiting',
+	'cooks_busy',
+	'cook_utilization',
+	'avg_order_wait_time',
+	'order_wait_p50',
+	'order_wait_p95',
+	'order_wait_p99',
+	'avg_courier_wait_time',
+	'courier_wait_p50',
+	'courier_wait_p95',
+	'courier_wait_p99'
+]
+# Prometheus type of the sampled values, the others are gauges
+COUNTERS = ['orders_received', 'orders_delivered', 'couriers_dispatched', 'couriers_arrived']
+
+
+class Histogram:
+	"""
+	Histogram of observations with fixed buckets, running sum and online quantiles
+
+	Attributes:
+		buckets: upper bounds of the buckets, the last bucket (+Inf) is implicit
+		counts: number of observations of each bucket, not cumulative
+		count: number of observations
+		sum: sum of the observations
+		quantiles: dictionary where key is the quantile and value its P2Quantile estimator
+	"""
+	def __init__(self, buckets=WAIT_TIME_BUCKETS, quantiles=METRICS_QUANTILES):
+		self.buckets = list(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.count = 0
+		self.sum = 0.0
+		self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+	def add(self, x):
+		"""
+		:param x: new observation
+		"""
+		self.counts[bisect_left(self.buckets, x)] += 1
+		self.count += 1
+		self.sum += x
+		for quantile in self.quantiles.values():
+			quantile.add(x)
+
+	def mean(self):
+		return self.sum / self.count if self.count else 0.0
+
+	def cumulative_counts(self):
+		"""
+		:return: list of (upper bound, number of observations lower or equal than the bound), the last bound is '+Inf'
+		"""
+		total = 0
+		cumulative = []
+		for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+			total += count
+			cumulative.append((bound, total))
+		return cumulative
+
+
+class LiveMetrics:
+	"""
+	Running metrics of a simulation: counters and queue depths read from the kitchen and delivery, and wait time
+	histograms updated on each pickup.  Every `interval` simulated seconds they are sampled into a time series.
+
+	Attributes:
+		order_wait: Histogram of the order wait times
+		courier_wait: Histogram of the courier wait times
+		last_sample: last row of the time series
+		port: port of the Prometheus endpoint, None if not served
+	"""
+	def __init__(self, env, kitchen, delivery, interval, filename=None, port=None, labels=None):
+		"""
+		:param env: simpy simulation environment
+		:param kitchen: Kitchen of the simulation
+		:param delivery: Delivery of the simulation, notifies the pickups to the metrics
+		:param interval: simulated seconds between samples
+		:param filename: CSV file for the time series, None to keep only the last sample
+		:param port: port of the local Prometheus endpoint, 0 for any free port, None to disable it
+		:param labels: dictionary of Prometheus labels of the simulation, e.g. {'strategy': 'fifo'}
+		"""
+		self.__env = env
+		self.__kitchen = kitchen
+		self.__delivery = delivery
+		self.__interval = interval
+		self.__labels = labels or {}
+		self.order_wait = Histogram()
+		self.courier_wait = Histogram()
+		self.last_sample = None
+		self.__file = None
+		self.__writer = None
+		if filename:
+			self.__file = open(filename, 'w', newline='')
+			self.__writer = csv.DictWriter(self.__file, SERIES_COLUMNS)
+			self.__writer.writeheader()
+		self.__server = None
+		self.port = None
+		if port is not None:
+			self.__server = MetricsServer(self, port)
+			self.port = self.__server.port
+		delivery.metrics = self
+		env.process(self.run())
+
+	def on_pickup(self, orders, courier):
+		"""
+		:param orders: orders picked up, with their wait time
+		:param courier: courier that picked up the orders, with its wait time
+		"""
+		for order in orders:
+			self.order_wait.add(order.wait_time)
+		self.courier_wait.add(courier.wait_time)
+
+	def snapshot(self):
+		"""
+		:return: dictionary with the current value of each of SERIES_COLUMNS
+		"""
+		kitchen = self.__kitchen
+		delivery = self.__delivery
+		now = self.__env.now
+		row = {
+			'time': now,
+			'orders_received': kitchen.orders_received,
+			'orders_queued': len(kitchen.orders),
+			'orders_processing': len(kitchen.orders_processing),
+			'orders_for_delivery': len(kitchen.orders_for_delivery),
+			'orders_delivered': len(kitchen.orders_delivered),
+			'couriers_dispatched': delivery.couriers_dispatched,
+			'couriers_arrived': delivery.couriers_arrived,
+			'couriers_waiting': delivery.couriers_arrived - len(delivery.couriers_done) - delivery.couriers_recalled,
+			'cooks_busy': kitchen.cooks_busy(),
+			'cook_utilization': kitchen.busy_time / (kitchen.num_cooks * now) if now else 0.0,
+			'avg_order_wait_time': self.order_wait.mean(),
+			'avg_courier_wait_time': self.courier_wait.mean()
+		}
+		for name, histogram in [('order_wait', self.order_wait), ('courier_wait', self.courier_wait)]:
+			for p, quantile in histogram.quantiles.items():
+				row['{0}_p{1:g}'.format(name, p * 100)] = quantile.value()
+		return row
+
+	def sample(self):
+		"""
+		Add a row to the time series
+		:return: the row
+		"""
+		self.last_sample = self.snapshot()
+		if self.__writer is not None:
+			self.__writer.writerow(self.last_sample)
+		return self.last_sample
+
+	def run(self):
+		while True:
+			self.sample()
+			yield self.__env.timeout(self.__interval)
+
+	def prometheus(self):
+		"""
+		:return: current metrics in the Prometheus text exposition format
+		"""
+		labels = ','.join('{0}="{1}"'.format(k, v) for k, v in self.__labels.items())
+
+		def series(name, value, extra_labels=''):
+			all_labels = ','.join(label for label in [labels, extra_labels] if label)
+			return '{0}{1}{2} {3}'.format(METRICS_PREFIX, name, '{' + all_labels + '}' if all_labels else '', value)
+
+		lines = []
+		snapshot = self.snapshot()
+		for column in SERIES_COLUMNS:
+			if column.startswith('avg_') or '_wait_p' in column:
+				continue
+			name = column + '_total' if column in COUNTERS else column
+			lines.append('# TYPE {0}{1} {2}'.format(METRICS_PREFIX, name, 'counter' if column in COUNTERS else 'gauge'))
+			lines.append(series(name, snapshot[column]))
+		for name, histogram in [('order_wait_seconds', self.order_wait), ('courier_wait_seconds', self.courier_wait)]:
+			lines.append('# TYPE {0}{1} histogram'.format(METRICS_PREFIX, name))
+			for bound, count in histogram.cumulative_counts():
+				lines.append(series(name + '_bucket', count, 'le="{0}"'.format(bound)))
+			lines.append(series(name + '_sum', histogram.sum))
+			lines.append(series(name + '_count', histogram.count))
+		return '\n'.join(lines) + '\n'
+
+	def close(self):
+		"""
+		Add the final state of the simulation to the time series, close its file and stop the Prometheus endpoint
+		"""
+		# The sample of the last interval may be taken before the events of the same simulated time
+		if self.snapshot() != self.last_sample:
+			self.sample()
+		if self.__file is not None:
+			self.__file.close()
+			self.__file = None
+		if self.__server is not None:
+			self.__server.close()
+			self.__server = None
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+	metrics = None
+
+	def do_GET(self):
+		if self.path != '/metrics':
+			self.send_error(404)
+			return
+		body = self.metrics.prometheus().encode()
+		self.send_response(200)
+		self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+		self.send_header('Content-Length', str(len(body)))
+		self.end_headers()
+		self.wfile.write(body)
+
+	def log_message(self, *args):
+		pass
+
+
+class MetricsServer:
+	"""
+	Serve the metrics on http://127.0.0.1:port/metrics from a background thread while the simulation runs
+	"""
+	def __init__(self, metrics, port, host=METRICS_HOST):
+		"""
+		:param metrics: LiveMetrics to serve
+		:param port: port to listen on, 0 for any free port
+		:param host: address to listen on
+		"""
+		handler = type('LiveMetricsHandler', (MetricsHandler,), {'metrics': metrics})
+		self.__server = ThreadingHTTPServer((host, port), handler)
+		self.port = self.__server.server_address[1]
+		self.__thread = Thread(target=self.__server.serve_forever, daemon=True)
+		self.__thread.start()
+
+	def close(self):
+		self.__server.shutdown()
+		self.__server.server_close()
+		self.__thread.join()
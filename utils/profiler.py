@@ -0,0 +1,161 @@
+import marshal
+from heapq import heappush, heappushpop
+from time import monotonic, perf_counter
+from simpy.events import Process, Condition
+from simpy.rt import RealtimeEnvironment
+from .stats import RunningStats, P2Quantile
+
+
+PROFILE_SLOWEST_STEPS = 10
+
+
+def waiting_process(event):
+	"""
+	:param event: simpy event about to be processed
+	:return: Process resumed by the event, directly or through the conditions waiting for it, e.g. the AnyOf of
+		`Delivery.run`, None if no process waits for it
+	"""
+	callbacks = event.callbacks or ()
+	for callback in callbacks:
+		if isinstance(getattr(callback, '__self__', None), Process):
+			return callback.__self__
+	for callback in callbacks:
+		if isinstance(getattr(callback, '__self__', None), Condition):
+			process = waiting_process(callback.__self__)
+			if process is not None:
+				return process
+	return None
+
+
+def event_code(event):
+	"""
+	:param event: simpy event about to be processed
+	:return: (filename, line, name) of the code run by the event, the generator of the process it resumes, see
+		`waiting_process`, or else its first callback, in the format of the cProfile function keys.  A process ending
+		without waiters is its own code.
+	"""
+	process = waiting_process(event)
+	if process is not None:
+		code = process._generator.gi_code
+	else:
+		for callback in event.callbacks or ():
+			code = getattr(getattr(callback, '__func__', callback), '__code__', None)
+			if code is not None:
+				break
+		else:
+			if not isinstance(event, Process):
+				return '~', 0, '<{0}>'.format(type(event).__name__)
+			code = event._generator.gi_code
+	# co_qualname, e.g. 'Kitchen.process_order', is new in Python 3.11
+	return code.co_filename, code.co_firstlineno, getattr(code, 'co_qualname', code.co_name)
+
+
+class StepProfiler:
+	"""
+	Profile a simulation wrapping `env.step`: the wall time and number of events of each process type, e.g.
+	'Kitchen.process_order', and for realtime environments the lag of each step behind the wall clock
+
+	Attributes:
+		stats: dictionary where key is the (filename, line, name) of the process and value [events, seconds]
+		lag: RunningStats of the realtime lag in seconds, measured before each step
+		lag_p99: P2Quantile of the realtime lag
+		max_lag: largest realtime lag in seconds
+		slowest: heap of the (seconds, simulation time, name) of the slowest steps
+		events: number of events processed
+	"""
+	def __init__(self, env, slowest_steps=PROFILE_SLOWEST_STEPS):
+		"""
+		:param env: simpy environment to profile, its `step` is replaced
+		:param slowest_steps: number of slowest steps to keep
+		"""
+		self.stats = {}
+		self.lag = RunningStats()
+		self.lag_p99 = P2Quantile(0.99)
+		self.max_lag = 0.0
+		self.slowest = []
+		self.events = 0
+		self.__slowest_steps = slowest_steps
+		self.__env = env
+		self.__step = env.step
+		self.__realtime = isinstance(env, RealtimeEnvironment)
+		env.step = self.step
+
+	def step(self):
+		env = self.__env
+		# The queue is a heap of (time, priority, id, event), the next event is the first one
+		queue = env._queue
+		if not queue:
+			return self.__step()
+		evt_time, _, _, event = queue[0]
+		key = event_code(event)
+		sleep = 0.0
+		if self.__realtime:
+			lag = monotonic() - (env.real_start + (evt_time - env.env_start) * env.factor)
+			self.lag.add(lag)
+			self.lag_p99.add(lag)
+			self.max_lag = max(self.max_lag, lag)
+			# RealtimeEnvironment.step sleeps until the time of the event, it is not processing time
+			sleep = max(0.0, -lag)
+		start = perf_counter()
+		try:
+			self.__step()
+		finally:
+			# The last step raises StopSimulation
+			self.__add(key, evt_time, max(0.0, perf_counter() - start - sleep))
+
+	def __add(self, key, evt_time, elapsed):
+		self.events += 1
+		stats = self.stats.get(key)
+		if stats is None:
+			self.stats[key] = stats = [0, 0.0]
+		stats[0] += 1
+		stats[1] += elapsed
+		slow = (elapsed, evt_time, key[2])
+		if len(self.slowest) < self.__slowest_steps:
+			heappush(self.slowest, slow)
+		elif slow > self.slowest[0]:
+			heappushpop(self.slowest, slow)
+
+	def total_time(self):
+		return sum(seconds for _, seconds in self.stats.values())
+
+	def dump_pstats(self, filename):
+		"""
+		Write the profile in the cProfile format, readable with `pstats.Stats(filename)`, snakeviz, etc.
+		:param filename: output file
+		"""
+		with open(filename, 'wb') as f:
+			marshal.dump({
+				key: (events, events, seconds, seconds, {}) for key, (events, seconds) in self.stats.items()
+			}, f)
+
+	def dump_folded(self, filename):
+		"""
+		Write the profile as folded stacks in microseconds, the input of flamegraph.pl and speedscope
+		:param filename: output file
+		"""
+		with open(filename, 'w') as f:
+			for (_, _, name), (_, seconds) in sorted(self.stats.items()):
+				f.write('env.step;{0} {1}\n'.format(name, round(seconds * 1e6)))
+
+	def print_report(self):
+		total = self.total_time()
+		print('=' * 120)
+		print('=== PROFILE ========' + '='*100)
+		print('- EVENTS: {0}  TIME: {1:.4f}s'.format(self.events, total))
+		print('{0:<60}{1:>12}{2:>14}{3:>14}{4:>10}'.format('PROCESS', 'EVENTS', 'TIME', 'PER EVENT', 'SHARE'))
+		for (_, _, name), (events, seconds) in sorted(self.stats.items(), key=lambda item: -item[1][1]):
+			print('{0:<60}{1:>12}{2:>13.4f}s{3:>12.2f}us{4:>9.1f}%'.format(
+				name,
+				events,
+				seconds,
+				seconds / events * 1e6,
+				seconds / total * 100 if total else 0.0
+			))
+		if self.__realtime:
+			print('- REALTIME LAG: MEAN {0:.4f}s  P99 {1:.4f}s  MAX {2:.4f}s'.format(
+				self.lag.mean, self.lag_p99.value(), self.max_lag
+			))
+		print('{0:<60}{1:>12}{2:>14}'.format('SLOWEST STEPS', 'AT', 'TIME'))
+		for seconds, evt_time, name in sorted(self.slowest, reverse=True):
+			print('{0:<60}{1:>12.3f}{2:>13.4f}s'.format(name, evt_time, seconds))
@@ -0,0 +1,143 @@
+import csv
+import json
+from heapq import nlargest
+from .log import format_times
+
+
+REPORT_CHUNK_SIZE = 10000
+REPORT_FORMATS = ['text', 'csv', 'json']
+# Row order of the views: as picked up or longest wait first
+REPORT_SORTS = ['pickup', 'wait']
+
+
+def format_prep_times(prep_times):
+	return list(map('{0:g}s'.format, prep_times))
+
+
+# Columns of the tables: (header, key in CSV/JSON, attribute of the results store, text width, text formatter),
+# the formatter is a function of the column values or a format string of the cell
+ORDER_COLUMNS = [
+	('ID', 'id', 'ids', 37, None),
+	('Name', 'name', 'names', 25, None),
+	('Time', 'prep_time', 'prep_times', 5, format_prep_times),
+	('Added', 'added_time', 'added_times', 10, format_times),
+	('Started', 'start_time', 'start_times', 10, format_times),
+	('Finished', 'end_time', 'end_times', 10, format_times),
+	('Delivered', 'delivered_time', 'delivered_times', 10, format_times),
+	('Wait', 'wait_time', 'wait_times', 10, '{:>10.4f}s')
+]
+COURIER_COLUMNS = [
+	('ID', 'id', 'ids', 37, None),
+	('Order ID', 'order_id', 'order_ids', 37, None),
+	('Arrival', 'arrival_time', 'arrival_times', 10, format_times),
+	('Delivery', 'delivery_time', 'delivery_times', 10, format_times),
+	('Wait', 'wait_time', 'wait_times', 10, '{:>10.4f}s')
+]
+
+
+def report_rows(results, sort='pickup', offset=0, limit=None):
+	"""
+	Select the rows of a view of the results: a page of `limit` rows from `offset`, e.g. the top N with 'wait'
+	:param results: OrderResults or CourierResults store
+	:param sort: one of REPORT_SORTS
+	:param offset: number of rows to skip
+	:param limit: number of rows, None for all the rows after `offset`
+	:return: range or list of row indexes
+	"""
+	size = len(results)
+	stop = size if limit is None else min(size, offset + limit)
+	if sort == 'pickup':
+		return range(min(offset, size), stop)
+	if sort != 'wait':
+		raise ValueError('Unknown report sort: {0}'.format(sort))
+	if stop <= offset:
+		return []
+	rows = range(size)
+	if stop < size:
+		# Top N without sorting all the rows, ties keep the pickup order as in `sorted`
+		return nlargest(stop, rows, key=results.wait_times.__getitem__)[offset:]
+	return sorted(rows, key=results.wait_times.__getitem__, reverse=True)[offset:]
+
+
+def report_column(results, attribute, rows):
+	"""
+	:return: list with the values of a column of the results for the rows
+	"""
+	values = getattr(results, attribute)
+	if isinstance(rows, range):
+		return values[rows.start:rows.stop]
+	return [values[row] for row in rows]
+
+
+def render_text(results, columns, title, rows):
+	"""
+	Render a table column by column, in chunks of REPORT_CHUNK_SIZE rows
+	:param results: OrderResults or CourierResults store
+	:param columns: ORDER_COLUMNS or COURIER_COLUMNS
+	:param title: title of the table
+	:param rows: row indexes from `report_rows`
+	:return: text of the table
+	"""
+	header_format = ''.join('{{:>{0}}}'.format(width) for _, _, _, width, _ in columns)
+	row_format = ''.join(
+		formatter if isinstance(formatter, str) else '{{:>{0}}}'.format(width) for _, _, _, width, formatter in columns
+	)
+	parts = ['-' * 120, '- ' + title, header_format.format(*[header for header, _, _, _, _ in columns])]
+	for start in range(0, len(rows), REPORT_CHUNK_SIZE):
+		chunk = rows[start:start + REPORT_CHUNK_SIZE]
+		cells = []
+		for _, _, attribute, _, formatter in columns:
+			values = report_column(results, attribute, chunk)
+			cells.append(formatter(values) if callable(formatter) else values)
+		parts.append('\n'.join(map(row_format.format, *cells)))
+	return '\n'.join(parts)
+
+
+def write_csv(f, results, columns, rows):
+	"""
+	:param f: text file opened with newline=''
+	:param results: OrderResults or CourierResults store
+	:param columns: ORDER_COLUMNS or COURIER_COLUMNS
+	:param rows: row indexes from `report_rows`
+	"""
+	writer = csv.writer(f)
+	writer.writerow([key for _, key, _, _, _ in columns])
+	for start in range(0, len(rows), REPORT_CHUNK_SIZE):
+		chunk = rows[start:start + REPORT_CHUNK_SIZE]
+		writer.writerows(zip(*[report_column(results, attribute, chunk) for _, _, attribute, _, _ in columns]))
+
+
+def write_json(f, results, columns, rows):
+	"""
+	Write the rows as a JSON array of objects
+	:param f: text file
+	:param results: OrderResults or CourierResults store
+	:param columns: ORDER_COLUMNS or COURIER_COLUMNS
+	:param rows: row indexes from `report_rows`
+	"""
+	keys = [key for _, key, _, _, _ in columns]
+	f.write('[')
+	separator = '\n'
+	for start in range(0, len(rows), REPORT_CHUNK_SIZE):
+		chunk = rows[start:start + REPORT_CHUNK_SIZE]
+		values = zip(*[report_column(results, attribute, chunk) for _, _, attribute, _, _ in columns])
+		f.write(separator + ',\n'.join(json.dumps(dict(zip(keys, row))) for row in values))
+		separator = ',\n'
+	f.write('\n]\n')
+
+
+def write_report(filename, results, columns, rows, report_format):
+	"""
+	:param filename: output file
+	:param results: OrderResults or CourierResults store
+	:param columns: ORDER_COLUMNS or COURIER_COLUMNS
+	:param rows: row indexes from `report_rows`
+	:param report_format: 'csv' or 'json'
+	"""
+	with open(filename, 'w', newline='') as f:
+		if report_format == 'csv':
+			write_csv(f, results, columns, rows)
+		elif report_format == 'json':
+			write_json(f, results, columns, rows)
+		else:
+			raise ValueError('Unknown report format: {0}'.format(report_format))
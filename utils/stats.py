@@ -0,0 +1,146 @@
+from math import sqrt, tan, pi
+from statistics import NormalDist
+
+
+class RunningStats:
+	"""
+	Online mean and variance (Welford's algorithm) with constant memory
+
+	Attributes:
+		count: number of observations
+		mean: mean of the observations
+	"""
+	def __init__(self):
+		self.count = 0
+		self.mean = 0.0
+		self.__m2 = 0.0
+
+	def add(self, x):
+		"""
+		:param x: new observation
+		"""
+		self.count += 1
+		delta = x - self.mean
+		self.mean += delta / self.count
+		self.__m2 += delta * (x - self.mean)
+
+	def merge(self, other):
+		"""
+		Combine the observations of another RunningStats into this one (Chan's parallel algorithm)
+		:param other: RunningStats object
+		"""
+		count = self.count + other.count
+		if count == 0:
+			return
+		delta = other.mean - self.mean
+		self.__m2 += other._RunningStats__m2 + delta * delta * self.count * other.count / count
+		self.mean += delta * other.count / count
+		self.count = count
+
+	def variance(self):
+		"""
+		:return: sample variance of the observations
+		"""
+		return self.__m2 / (self.count - 1) if self.count > 1 else 0.0
+
+	def stdev(self):
+		"""
+		:return: sample standard deviation of the observations
+		"""
+		return sqrt(self.variance())
+
+
+class P2Quantile:
+	"""
+	Online quantile estimation with the P-square algorithm (Jain & Chlamtac) keeping only 5 markers in memory
+	"""
+	def __init__(self, p):
+		"""
+		:param p: quantile to estimate, between 0 and 1
+		"""
+		self.p = p
+		self.count = 0
+		self.__q = []
+		self.__n = [0, 1, 2, 3, 4]
+		self.__np = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+		self.__dn = [0, p / 2, p, (1 + p) / 2, 1]
+
+	def add(self, x):
+		"""
+		:param x: new observation
+		"""
+		self.count += 1
+		q, n = self.__q, self.__n
+		if self.count <= 5:
+			q.append(x)
+			q.sort()
+			return
+		if x < q[0]:
+			q[0] = x
+			k = 0
+		elif x >= q[4]:
+			q[4] = x
+			k = 3
+		else:
+			k = 0
+			while x >= q[k + 1]:
+				k += 1
+		for i in range(k + 1, 5):
+			n[i] += 1
+		for i in range(5):
+			self.__np[i] += self.__dn[i]
+		for i in range(1, 4):
+			d = self.__np[i] - n[i]
+			if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+				d = 1 if d > 0 else -1
+				qp = q[i] + d / (n[i + 1] - n[i - 1]) * (
+					(n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i]) +
+					(n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+				)
+				if not q[i - 1] < qp < q[i + 1]:
+					qp = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+				q[i] = qp
+				n[i] += d
+
+	def value(self):
+		"""
+		:return: estimated quantile, exact while there are 5 observations or less
+		"""
+		if self.count == 0:
+			return 0.0
+		if self.count <= 5:
+			return self.__q[min(int(self.p * self.count), self.count - 1)]
+		return self.__q[2]
+
+
+def t_quantile(p, df):
+	"""
+	Quantile of the Student's t distribution, exact for 1 and 2 degrees of freedom and
+	Cornish-Fisher expansion (Abramowitz & Stegun 26.7.5) otherwise
+	:param p: probability
+	:param df: degrees of freedom
+	:return: t such that P(T <= t) = p
+	"""
+	if df == 1:
+		return tan(pi * (p - 0.5))
+	if df == 2:
+		return (2 * p - 1) / sqrt(2 * p * (1 - p))
+	z = NormalDist().inv_cdf(p)
+	g1 = (z ** 3 + z) / 4
+	g2 = (5 * z ** 5 + 16 * z ** 3 + 3 * z) / 96
+	g3 = (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / 384
+	g4 = (79 * z ** 9 + 776 * z ** 7 + 1482 * z ** 5 - 1920 * z ** 3 - 945 * z) / 92160
+	return z + g1 / df + g2 / df ** 2 + g3 / df ** 3 + g4 / df ** 4
+
+
+def confidence_interval(stats, confidence=0.95):
+	"""
+	Confidence interval for the mean of independent observations
+	:param stats: RunningStats object with the observations
+	:param confidence: confidence level
+	:return: (low, high) bounds, (mean, mean) with less than 2 observations
+	"""
+	if stats.count < 2:
+		return stats.mean, stats.mean
+	half_width = t_quantile((1 + confidence) / 2, stats.count - 1) * stats.stdev() / sqrt(stats.count)
+	return stats.mean - half_width, stats.mean + half_width